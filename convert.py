@@ -2,7 +2,6 @@ import numpy as np
 import os
 from collections import OrderedDict
 import argparse
-from scipy.spatial.transform import Rotation as R # Import Rotation for SLERP
 
 # Assuming these files exist and are correctly defined
 from nymeria_files.xsens_constants import XSensConstants
@@ -61,6 +60,43 @@ def get_proto_skeleton_tree():
         'local_translation': OrderedDict({'arr': local_translation_data, 'context': {'dtype': 'float32'}})
     })
 
+# Define the mapping based on your requirements and ProtoMotion joint names/indices
+# Format: { ProtoMotion_Joint_Name : (Source_Nymeria_Joint_Name, Source_Type) }
+# Source_Type can be 'direct', 'interpolated_trans', 'interpolated_rot'
+MAPPING_PLAN = {
+    # Root and Spine
+    'Pelvis': ('L5', 'direct'),           # Nymeria L5 -> Proto Pelvis (Index 0)
+    'Torso': ('L3', 'direct'),            # Nymeria L3 -> Proto Torso (Index 9)
+    'Spine': ('T12', 'direct'),           # Nymeria T12 -> Proto Spine (Index 10)
+    'Chest': ('T8', 'direct'),            # Nymeria T8 -> Proto Chest (Index 11)
+    # Head
+    'Neck': ('Neck', 'direct'),           # Nymeria Neck -> Proto Neck (Index 12)
+    'Head': ('Head', 'direct'),           # Nymeria Head -> Proto Head (Index 13)
+    # Left Leg
+    'L_Hip': ('L_UpperLeg', 'direct'),    # Nymeria L_UpperLeg -> Proto L_Hip (Index 1)
+    'L_Knee': ('L_LowerLeg', 'direct'),   # Nymeria L_LowerLeg -> Proto L_Knee (Index 2)
+    'L_Ankle': ('L_Foot', 'direct'),      # Nymeria L_Foot -> Proto L_Ankle (Index 3)
+    'L_Toe': ('L_Toe', 'direct'),         # Nymeria L_Toe -> Proto L_Toe (Index 4)
+    # Right Leg
+    'R_Hip': ('R_UpperLeg', 'direct'),    # Nymeria R_UpperLeg -> Proto R_Hip (Index 5)
+    'R_Knee': ('R_LowerLeg', 'direct'),   # Nymeria R_LowerLeg -> Proto R_Knee (Index 6)
+    'R_Ankle': ('R_Foot', 'direct'),      # Nymeria R_Foot -> Proto R_Ankle (Index 7)
+    'R_Toe': ('R_Toe', 'direct'),         # Nymeria R_Toe -> Proto R_Toe (Index 8)
+    # Thorax/Collar (Using T8 as proxy like original code, adjust if needed)
+    'L_Thorax': ('T8', 'direct'),         # Nymeria T8 -> Proto L_Thorax (Index 14)
+    'R_Thorax': ('T8', 'direct'),         # Nymeria T8 -> Proto R_Thorax (Index 19)
+    # Left Arm
+    'L_Shoulder': ('L_Shoulder', 'direct'), # Nymeria L_Shoulder -> Proto L_Shoulder (Index 15)
+    'L_Elbow': ('L_UpperArm', 'direct'),    # Nymeria L_UpperArm -> Proto L_Elbow (Index 16)
+    'L_Wrist': ('L_Wrist', 'interpolated'), # Use interpolated data for Proto L_Wrist (Index 17)
+    'L_Hand': ('L_Hand', 'direct'),         # Nymeria L_Hand -> Proto L_Hand (Index 18)
+    # Right Arm
+    'R_Shoulder': ('R_Shoulder', 'direct'), # Nymeria R_Shoulder -> Proto R_Shoulder (Index 20)
+    'R_Elbow': ('R_UpperArm', 'direct'),    # Nymeria R_UpperArm -> Proto R_Elbow (Index 21)
+    'R_Wrist': ('R_Wrist', 'interpolated'), # Use interpolated data for Proto R_Wrist (Index 22)
+    'R_Hand': ('R_Hand', 'direct'),         # Nymeria R_Hand -> Proto R_Hand (Index 23)
+}
+
 def create_proto_motion_from_dataprovider(data_provider):
     if data_provider is None:
         print("Error: Data provider is None.")
@@ -115,42 +151,7 @@ def create_proto_motion_from_dataprovider(data_provider):
     print("\nMapping Nymeria joints to ProtoMotion joints:")
     mapping_summary = {} # To store what was mapped
 
-    # Define the mapping based on your requirements and ProtoMotion joint names/indices
-    # Format: { ProtoMotion_Joint_Name : (Source_Nymeria_Joint_Name, Source_Type) }
-    # Source_Type can be 'direct', 'interpolated_trans', 'interpolated_rot'
-    mapping_plan = {
-        # Root and Spine
-        'Pelvis': ('L5', 'direct'),           # Nymeria L5 -> Proto Pelvis (Index 0)
-        'Torso': ('L3', 'direct'),            # Nymeria L3 -> Proto Torso (Index 9)
-        'Spine': ('T12', 'direct'),           # Nymeria T12 -> Proto Spine (Index 10)
-        'Chest': ('T8', 'direct'),            # Nymeria T8 -> Proto Chest (Index 11)
-        # Head
-        'Neck': ('Neck', 'direct'),           # Nymeria Neck -> Proto Neck (Index 12)
-        'Head': ('Head', 'direct'),           # Nymeria Head -> Proto Head (Index 13)
-        # Left Leg
-        'L_Hip': ('L_UpperLeg', 'direct'),    # Nymeria L_UpperLeg -> Proto L_Hip (Index 1)
-        'L_Knee': ('L_LowerLeg', 'direct'),   # Nymeria L_LowerLeg -> Proto L_Knee (Index 2)
-        'L_Ankle': ('L_Foot', 'direct'),      # Nymeria L_Foot -> Proto L_Ankle (Index 3)
-        'L_Toe': ('L_Toe', 'direct'),         # Nymeria L_Toe -> Proto L_Toe (Index 4)
-        # Right Leg
-        'R_Hip': ('R_UpperLeg', 'direct'),    # Nymeria R_UpperLeg -> Proto R_Hip (Index 5)
-        'R_Knee': ('R_LowerLeg', 'direct'),   # Nymeria R_LowerLeg -> Proto R_Knee (Index 6)
-        'R_Ankle': ('R_Foot', 'direct'),      # Nymeria R_Foot -> Proto R_Ankle (Index 7)
-        'R_Toe': ('R_Toe', 'direct'),         # Nymeria R_Toe -> Proto R_Toe (Index 8)
-        # Thorax/Collar (Using T8 as proxy like original code, adjust if needed)
-        'L_Thorax': ('T8', 'direct'),         # Nymeria T8 -> Proto L_Thorax (Index 14)
-        'R_Thorax': ('T8', 'direct'),         # Nymeria T8 -> Proto R_Thorax (Index 19)
-        # Left Arm
-        'L_Shoulder': ('L_Shoulder', 'direct'), # Nymeria L_Shoulder -> Proto L_Shoulder (Index 15)
-        'L_Elbow': ('L_UpperArm', 'direct'),    # Nymeria L_UpperArm -> Proto L_Elbow (Index 16)
-        'L_Wrist': ('L_Wrist', 'interpolated'), # Use interpolated data for Proto L_Wrist (Index 17)
-        'L_Hand': ('L_Hand', 'direct'),         # Nymeria L_Hand -> Proto L_Hand (Index 18)
-        # Right Arm
-        'R_Shoulder': ('R_Shoulder', 'direct'), # Nymeria R_Shoulder -> Proto R_Shoulder (Index 20)
-        'R_Elbow': ('R_UpperArm', 'direct'),    # Nymeria R_UpperArm -> Proto R_Elbow (Index 21)
-        'R_Wrist': ('R_Wrist', 'interpolated'), # Use interpolated data for Proto R_Wrist (Index 22)
-        'R_Hand': ('R_Hand', 'direct'),         # Nymeria R_Hand -> Proto R_Hand (Index 23)
-    }
+    mapping_plan = MAPPING_PLAN
 
     # Apply the mapping plan
     for proto_idx, proto_name in enumerate(proto_node_names):
@@ -221,14 +222,64 @@ def save_proto_npy(proto_data, output_file):
     else:
         print("No ProtoMotion data generated to save.")
 
+def append_to_dataset(proto_data, dataset_dir):
+    """Appends the ProtoMotion data (dictionary or SkeletonMotion) as a clip of a sharded motion dataset (see poselib.skeleton.motion_dataset)."""
+    from poselib.skeleton.skeleton3d import SkeletonMotion
+    from poselib.skeleton.motion_dataset import MotionDatasetWriter
+
+    motion = proto_data if isinstance(proto_data, SkeletonMotion) else SkeletonMotion.from_dict(proto_data)
+    with MotionDatasetWriter(dataset_dir) as writer:
+        clip_id = writer.append(motion)
+    print(f"\nProtoMotion clip {clip_id} appended to dataset: {dataset_dir}")
+
+def import_cached(data_dir, glb_file, cache_dir, cache_max_gb):
+    """Imports the Nymeria data as a ProtoMotion SkeletonMotion through an on-disk cache (see poselib.skeleton.import_cache),
+    keyed by the content of the data directory and GLB file and by the mapping plan and target skeleton."""
+    from poselib.skeleton.skeleton3d import SkeletonMotion
+    from poselib.skeleton.import_cache import ImportCache
+
+    def importer():
+        print(f"Loading data from: {data_dir}")
+        data_provider = create_body_data_provider(data_dir, glb_file)
+        if not data_provider:
+            raise RuntimeError("Failed to create BodyDataProvider object. Check your data directory and dependencies.")
+        proto_data = create_proto_motion_from_dataprovider(data_provider)
+        if not proto_data:
+            raise RuntimeError("Failed to generate ProtoMotion data.")
+        return SkeletonMotion.from_dict(proto_data)
+
+    cache = ImportCache(cache_dir, max_bytes=int(cache_max_gb * 2**30))
+    sources = [data_dir] + ([glb_file] if glb_file else [])
+    motion = cache.get_or_import(
+        sources,
+        importer,
+        source_format="nymeria",
+        mapping_plan=MAPPING_PLAN,
+        skeleton_tree=get_proto_skeleton_tree(),
+    )
+    print(cache.report())
+    return motion
+
 def main():
     parser = argparse.ArgumentParser(description='Convert Nymeria data to ProtoMotion format with wrist interpolation and custom mapping.')
     parser.add_argument('--data_dir', type=str, required=True, help='Directory containing Nymeria .npy files (used by BodyDataProvider)')
     parser.add_argument('--output_file', type=str, default='proto_motion_mapped.npy', help='Path to save the ProtoMotion-formatted .npy file')
     parser.add_argument('--glb_file', type=str, default='', help='Optional GLB file path for BodyDataProvider (if needed by it)')
+    parser.add_argument('--dataset_dir', type=str, default='', help='Optional sharded motion dataset directory to append the clip to, instead of writing --output_file')
+    parser.add_argument('--cache_dir', type=str, default='', help='Optional import cache directory, the import is skipped when the same data was already converted with the same mapping')
+    parser.add_argument('--cache_max_gb', type=float, default=16.0, help='Size bound of the import cache, the least recently used entries are evicted above it')
 
     args = parser.parse_args()
 
+    if args.cache_dir:
+        motion = import_cached(args.data_dir, args.glb_file, args.cache_dir, args.cache_max_gb)
+        if args.dataset_dir:
+            append_to_dataset(motion, args.dataset_dir)
+        else:
+            motion.to_file(args.output_file)
+            print(f"\nProtoMotion-formatted data saved to: {args.output_file}")
+        return
+
     print(f"Loading data from: {args.data_dir}")
     # Create the data provider (assuming this function handles loading Nymeria data)
     data_provider = create_body_data_provider(args.data_dir, args.glb_file)
@@ -237,7 +288,9 @@ def main():
         print("Data provider created successfully.")
         # Generate ProtoMotion data using the new logic
         proto_motion_data = create_proto_motion_from_dataprovider(data_provider)
-        if proto_motion_data:
+        if proto_motion_data and args.dataset_dir:
+            append_to_dataset(proto_motion_data, args.dataset_dir)
+        elif proto_motion_data:
             # Save the results
             save_proto_npy(proto_motion_data, args.output_file)
         else:
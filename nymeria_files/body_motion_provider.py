@@ -23,7 +23,9 @@ class BodyDataProvider:
     # coordinates tranform between momentum and xsens
     _A_Wx_Wm = torch.tensor([0.01, 0, 0, 0, 0, -0.01, 0, 0.01, 0]).reshape([3, 3])
 
-    def __init__(self, npzfile: str, glbfile: str) -> None:
+    def __init__(
+        self, npzfile: str, glbfile: str, enforce_hemisphere: bool = False
+    ) -> None:
         if not Path(npzfile).is_file():
             logger.error(f"{npzfile=} not found")
             return
@@ -35,7 +37,7 @@ class BodyDataProvider:
             print(f"{k=}, {v.shape=}")
 
         self.__correct_timestamps()
-        self.__correct_quaternion()
+        self.__correct_quaternion(enforce_hemisphere)
 
         # load glb if exist
         self.character: Character = None
@@ -76,24 +78,33 @@ class BodyDataProvider:
 
         self.xsens_data[XSensConstants.k_timestamps_us] = t_corrected
 
-    def __correct_quaternion(self) -> None:
+    def __correct_quaternion(self, enforce_hemisphere: bool = False) -> None:
         qWXYZ = self.xsens_data[XSensConstants.k_part_qWXYZ].reshape(
             -1, XSensConstants.num_parts, 4
         )
         qn = np.linalg.norm(qWXYZ, axis=-1, keepdims=False)
         invalid = qn < 0.1
-        if invalid.sum() == 0:
+        if invalid.sum() == 0 and not enforce_hemisphere:
             return
-        else:
+        elif invalid.sum() > 0:
             logger.error(f"number of invalid quaternions {invalid.sum()}")
+            # forward fill: each degenerate quaternion takes the value of the last valid frame of
+            # its part, identity before the first one
+            source = np.where(qn < 0.5, -1, np.arange(qn.shape[0])[:, None])
+            np.maximum.accumulate(source, axis=0, out=source)
+            qWXYZ = np.where(
+                (source < 0)[..., None],
+                np.array([1, 0, 0, 0], dtype=qWXYZ.dtype),
+                qWXYZ[np.maximum(source, 0), np.arange(qn.shape[1])],
+            )
 
-        for p in range(XSensConstants.num_parts):
-            if qn[0, p] < 0.5:
-                qWXYZ[0, p] = np.array([1, 0, 0, 0])
-        for f in range(1, qn.shape[0]):
-            for p in range(XSensConstants.num_parts):
-                if qn[f, p] < 0.5:
-                    qWXYZ[f, p] = qWXYZ[f - 1, p]
+        if enforce_hemisphere:
+            # q and -q are the same rotation, flip the frames whose quaternion is on the other
+            # hemisphere of the previous one, the flips accumulate along the frames
+            flips = np.sum(qWXYZ[1:] * qWXYZ[:-1], axis=-1) < 0
+            signs = 1 - 2 * (np.cumsum(flips, axis=0) % 2)
+            qWXYZ = qWXYZ.copy()
+            qWXYZ[1:] *= signs[..., None].astype(qWXYZ.dtype)
         self.xsens_data[XSensConstants.k_part_qWXYZ] = qWXYZ.reshape(
             -1, XSensConstants.num_parts * 4
         )
@@ -0,0 +1,106 @@
+"""
+Benchmark the peak memory and the time of SkeletonMotion.from_file() on a large float64 motion
+like the ones written by convert.py (24 joints), with the previous always-copying
+TensorUtils.from_dict() and with the current one. Every load runs in a fresh process so that
+the peak resident memory of each of them can be measured (Linux only).
+
+    PYTHONPATH=. python benchmarks/bench_load.py --frames 360000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import torch
+
+from poselib.core import *
+from poselib.skeleton.skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+
+MODES = {
+    # name: (file extension, from_file() kwargs)
+    "npy, copying from_dict": (".npy", {}),
+    "npy": (".npy", {}),
+    "npy, downcast": (".npy", {"downcast": True}),
+    "plib": (".plib", {}),
+    "plib, downcast": (".plib", {"downcast": True}),
+}
+
+
+def write_motion(path, num_frames):
+    node_names = ["joint_{}".format(i) for i in range(24)]
+    parent_indices = torch.arange(-1, 23)
+    skeleton_tree = SkeletonTree(
+        node_names, parent_indices, torch.rand(24, 3, dtype=torch.float64)
+    )
+    r = quat_normalize(torch.randn(num_frames, 24, 4, dtype=torch.float64))
+    t = torch.randn(num_frames, 3, dtype=torch.float64)
+    skeleton_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=False
+    )
+    motion = SkeletonMotion.from_skeleton_state(skeleton_state, fps=60)
+    motion.to_file(path + ".npy")
+    motion.to_file(path + ".plib")
+    return motion.tensor.nbytes
+
+
+def peak_rss():
+    # VmHWM (unlike ru_maxrss) is reset by exec, it does not include the peak of the parent
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def load(path, mode):
+    extension, kwargs = MODES[mode]
+    if mode == "npy, copying from_dict":
+        TensorUtils.from_dict = classmethod(
+            lambda cls, dict_repr, *args, **kwargs: torch.from_numpy(
+                dict_repr["arr"].astype(dict_repr["context"]["dtype"])
+            )
+        )
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    motion = SkeletonMotion.from_file(path + extension, **kwargs)
+    # touch every page, a memory-mapped motion is only read when used
+    motion.tensor.sum()
+    elapsed = time.perf_counter() - start
+    print("{} {}".format(elapsed, peak_rss() - rss_before))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=360000)
+    parser.add_argument("--load", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--mode", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.load is not None:
+        load(args.load, args.mode)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "motion")
+        nbytes = write_motion(path, args.frames)
+        print(
+            "{} frames x 24 joints, float64 state tensor of {:.1f} MB".format(
+                args.frames, nbytes / 2**20
+            )
+        )
+        for mode in MODES:
+            output = subprocess.check_output(
+                [sys.executable, __file__, "--load", path, "--mode", mode],
+                stderr=subprocess.DEVNULL,
+            )
+            elapsed, peak = map(float, output.split()[-2:])
+            print(
+                "{:>24}: {:8.1f} ms | peak memory increase {:8.1f} MB".format(
+                    mode, elapsed * 1e3, peak
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
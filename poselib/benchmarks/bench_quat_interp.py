@@ -0,0 +1,66 @@
+"""
+Throughput of the quaternion interpolation kernels of poselib.core.rotation3d, with SciPy's
+Rotation as a baseline for slerp.
+
+    PYTHONPATH=. python benchmarks/bench_quat_interp.py --sizes 1e3,1e5,1e7 [--device cuda]
+"""
+
+import argparse
+import time
+
+import torch
+from scipy.spatial.transform import Rotation
+
+from poselib.core import *
+
+
+def scipy_slerp(q0, q1, t):
+    r0 = Rotation.from_quat(q0.cpu().numpy())
+    r1 = Rotation.from_quat(q1.cpu().numpy())
+    rotvec = (r0.inv() * r1).as_rotvec() * t.cpu().numpy()[:, None]
+    return torch.from_numpy((r0 * Rotation.from_rotvec(rotvec)).as_quat())
+
+
+def timeit(fn, repeat, device):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=str, default="1e3,1e4,1e5,1e6,1e7")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--no-scipy", action="store_true")
+    args = parser.parse_args()
+    device = torch.device(args.device)
+
+    print("{:>10} {:>12} {:>12}".format("n", "kernel", "Mquat/s"))
+    for n in [int(float(size)) for size in args.sizes.split(",")]:
+        q_prev, q0, q1, q_next = quat_unit(torch.randn(4, n, 4, device=device))
+        t = torch.rand(n, device=device)
+        a0 = quat_squad_tangent(q_prev, q0, q1)
+        a1 = quat_squad_tangent(q0, q1, q_next)
+        kernels = [
+            ("nlerp", lambda: quat_nlerp(q0, q1, t)),
+            ("slerp", lambda: quat_slerp(q0, q1, t)),
+            ("squad", lambda: quat_squad(q0, a0, a1, q1, t)),
+        ]
+        if not args.no_scipy:
+            kernels.append(("scipy slerp", lambda: scipy_slerp(q0, q1, t)))
+        for name, fn in kernels:
+            elapsed = timeit(fn, args.repeat, device)
+            print("{:>10} {:>12} {:>12.1f}".format(n, name, n / elapsed / 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Latency and allocations of quat_rotate / transform_mul / transform_inverse / transform_apply on
+(T, J) batches, against the previous quaternion-sandwich implementations.
+
+    PYTHONPATH=. python benchmarks/bench_transform.py --frames 2000 --joints 24 [--device cuda]
+"""
+
+import argparse
+import time
+
+import torch
+from torch.profiler import profile, ProfilerActivity
+
+from poselib.core import *
+
+
+@torch.jit.script
+def legacy_quat_rotate(rot, vec):
+    other_q = torch.cat([vec, torch.zeros_like(vec[..., :1])], dim=-1)
+    return quat_imaginary(quat_mul(quat_mul(rot, other_q), quat_conjugate(rot)))
+
+
+@torch.jit.script
+def legacy_transform_mul(x, y):
+    return torch.cat(
+        [
+            quat_mul_norm(x[..., :4], y[..., :4]),
+            legacy_quat_rotate(x[..., :4], y[..., 4:]) + x[..., 4:],
+        ],
+        dim=-1,
+    )
+
+
+@torch.jit.script
+def legacy_transform_inverse(x):
+    inv_so3 = quat_inverse(x[..., :4])
+    return torch.cat([inv_so3, legacy_quat_rotate(inv_so3, -x[..., 4:])], dim=-1)
+
+
+@torch.jit.script
+def legacy_transform_apply(rot, vec):
+    return legacy_quat_rotate(rot[..., :4], vec) + rot[..., 4:]
+
+
+def timeit(fn, repeat, device):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def count_allocations(fn):
+    """number of tensor allocations and allocated bytes of one call"""
+    fn()
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+    # the operators that allocate their output report it as self memory usage
+    allocations = [
+        event.self_cpu_memory_usage + event.self_device_memory_usage
+        for event in prof.events()
+    ]
+    allocations = [size for size in allocations if size > 0]
+    return len(allocations), sum(allocations)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--joints", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--device", type=str, default="cpu")
+    args = parser.parse_args()
+    device = torch.device(args.device)
+
+    shape = (args.frames, args.joints)
+    x = transform_from_rotation_translation(
+        r=quat_normalize(torch.randn(*shape, 4, device=device)),
+        t=torch.randn(*shape, 3, device=device),
+    )
+    y = transform_inverse(x)
+    vec = torch.randn(*shape, 3, device=device)
+    out = torch.empty_like(x)
+    out_vec = torch.empty_like(vec)
+
+    rows = [
+        (
+            "quat_rotate",
+            lambda: legacy_quat_rotate(x[..., :4], vec),
+            lambda: quat_rotate(x[..., :4], vec),
+            lambda: quat_rotate(x[..., :4], vec, out=out_vec),
+        ),
+        (
+            "transform_mul",
+            lambda: legacy_transform_mul(x, y),
+            lambda: transform_mul(x, y),
+            lambda: transform_mul(x, y, out=out),
+        ),
+        (
+            "transform_inverse",
+            lambda: legacy_transform_inverse(x),
+            lambda: transform_inverse(x),
+            lambda: transform_inverse(x, out=out),
+        ),
+        (
+            "transform_apply",
+            lambda: legacy_transform_apply(x, vec),
+            lambda: transform_apply(x, vec),
+            lambda: transform_apply(x, vec, out=out_vec),
+        ),
+    ]
+    print("(T, J) = {} on {}".format(shape, device))
+    print(
+        "{:>18} {:>10} {:>10} {:>8} {:>10}".format(
+            "kernel", "variant", "time (us)", "allocs", "MB"
+        )
+    )
+    for name, *variants in rows:
+        for variant, fn in zip(("legacy", "fused", "fused+out"), variants):
+            elapsed = timeit(fn, args.repeat, device)
+            num_allocations, num_bytes = count_allocations(fn)
+            print(
+                "{:>18} {:>10} {:>10.1f} {:>8} {:>10.2f}".format(
+                    name, variant, elapsed * 1e6, num_allocations, num_bytes / 2**20
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
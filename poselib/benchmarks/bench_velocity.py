@@ -0,0 +1,103 @@
+"""
+Benchmark the velocity estimation of SkeletonMotion.from_skeleton_state() against the
+previous NumPy/SciPy implementation on long clips.
+
+    PYTHONPATH=. python benchmarks/bench_velocity.py --frames 36000 --repeat 5 [--device cuda]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from scipy.ndimage import gaussian_filter1d
+
+from poselib.core import *
+from poselib.skeleton.skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+
+
+def scipy_velocity(p, time_delta):
+    velocity = np.gradient(p.cpu().numpy(), axis=-3) / time_delta
+    return torch.from_numpy(gaussian_filter1d(velocity, 2, axis=-3, mode="nearest")).to(
+        p
+    )
+
+
+def scipy_angular_velocity(r, time_delta):
+    diff_quat_data = quat_identity_like(r).to(r)
+    diff_quat_data[..., :-1, :, :] = quat_mul_norm(
+        r[..., 1:, :, :], quat_inverse(r[..., :-1, :, :])
+    )
+    diff_angle, diff_axis = quat_angle_axis(diff_quat_data)
+    angular_velocity = diff_axis * diff_angle.unsqueeze(-1) / time_delta
+    return torch.from_numpy(
+        gaussian_filter1d(angular_velocity.cpu().numpy(), 2, axis=-3, mode="nearest")
+    ).to(r)
+
+
+def timeit(fn, repeat, device):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=36000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--device", type=str, default="cpu")
+    args = parser.parse_args()
+    device = torch.device(args.device)
+
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    r = quat_normalize(torch.randn(args.frames, skeleton_tree.num_joints, 4))
+    t = torch.randn(args.frames, 3)
+    skeleton_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=True
+    )
+    p = skeleton_state.global_translation.to(device)
+    r = skeleton_state.global_rotation.to(device)
+    time_delta = 1 / 30
+
+    rows = [
+        (
+            "velocity",
+            lambda: scipy_velocity(p, time_delta),
+            lambda: SkeletonMotion._compute_velocity(p, time_delta),
+        ),
+        (
+            "angular velocity",
+            lambda: scipy_angular_velocity(r, time_delta),
+            lambda: SkeletonMotion._compute_angular_velocity(r, time_delta),
+        ),
+    ]
+    print(
+        "{} frames x {} joints on {}".format(
+            args.frames, skeleton_tree.num_joints, device
+        )
+    )
+    for name, scipy_fn, torch_fn in rows:
+        max_error = (scipy_fn() - torch_fn()).abs().max().item()
+        scipy_time = timeit(scipy_fn, args.repeat, device)
+        torch_time = timeit(torch_fn, args.repeat, device)
+        print(
+            "{:>18}: scipy {:8.2f} ms | torch {:8.2f} ms | x{:.1f} | max err {:.2e}".format(
+                name,
+                scipy_time * 1e3,
+                torch_time * 1e3,
+                scipy_time / torch_time,
+                max_error,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
 from .tensor_utils import *
 from .rotation3d import *
+from .compression import (
+    quat_to_smallest_three,
+    quat_from_smallest_three,
+    translation_to_fixed_point,
+    translation_from_fixed_point,
+)
 from .backend import Serializable, logger
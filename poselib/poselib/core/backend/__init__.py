@@ -1,3 +1,3 @@
-from .abstract import Serializable
+from .abstract import ArrayInfo, Serializable
 
 from .logger import logger
@@ -7,11 +7,16 @@
 
 from abc import ABCMeta, abstractmethod, abstractclassmethod
 from collections import OrderedDict
+from functools import partial
+from typing import NamedTuple, Tuple
+import base64
 import json
 
 import numpy as np
 import os
 
+from .packed import packed_layout, read_packed, read_packed_header, write_packed
+
 TENSOR_CLASS = {}
 
 
@@ -30,41 +35,169 @@ def _get_cls(name):
     return TENSOR_CLASS[name]
 
 
+SIDECAR_ALIGNMENT = 64
+
+
 class NumpyEncoder(json.JSONEncoder):
-    """ Special json encoder for numpy types """
+    """ Special json encoder for numpy types. The arrays are stored as base64 strings of their
+    raw bytes, or as aligned raw blocks of a binary sidecar file if one is given
+    """
+
+    def __init__(self, *args, sidecar=None, sidecar_name=None, **kwargs):
+        """
+        :param sidecar: binary file opened for writing where the arrays are stored
+        :type sidecar: file object, optional
+        :param sidecar_name: name of the sidecar file recorded in the json file
+        :type sidecar_name: string, optional
+        """
+        super().__init__(*args, **kwargs)
+        self._sidecar = sidecar
+        self._sidecar_name = sidecar_name
 
     def default(self, obj):
-        if isinstance(
-            obj,
-            (
-                np.int_,
-                np.intc,
-                np.intp,
-                np.int8,
-                np.int16,
-                np.int32,
-                np.int64,
-                np.uint8,
-                np.uint16,
-                np.uint32,
-                np.uint64,
-            ),
-        ):
+        if isinstance(obj, np.integer):
             return int(obj)
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
+        elif isinstance(obj, np.floating):
             return float(obj)
+        elif isinstance(obj, np.bool_):
+            return bool(obj)
         elif isinstance(obj, (np.ndarray,)):
-            return dict(__ndarray__=obj.tolist(), dtype=str(obj.dtype), shape=obj.shape)
+            data = np.ascontiguousarray(obj)
+            if self._sidecar is None:
+                encoded = base64.b64encode(data.data).decode("ascii")
+            else:
+                offset = self._sidecar.tell()
+                padding = -offset % SIDECAR_ALIGNMENT
+                self._sidecar.write(b"\0" * padding)
+                self._sidecar.write(data.data)
+                encoded = dict(sidecar=self._sidecar_name, offset=offset + padding)
+            return dict(__ndarray__=encoded, dtype=data.dtype.str, shape=data.shape)
         return json.JSONEncoder.default(self, obj)
 
 
-def json_numpy_obj_hook(dct):
+def json_numpy_obj_hook(dct, load_sidecar=None):
+    """ Rebuild the arrays written by NumpyEncoder, and the nested lists of older files
+
+    :param load_sidecar: returns the content of a sidecar file from the name recorded in the
+    json file, for the arrays stored in one
+    :type load_sidecar: Callable[[str], np.ndarray (uint8)], optional
+    """
     if isinstance(dct, dict) and "__ndarray__" in dct:
-        data = np.asarray(dct["__ndarray__"], dtype=dct["dtype"])
+        dtype = np.dtype(dct["dtype"])
+        encoded = dct["__ndarray__"]
+        if isinstance(encoded, str):
+            # decoded into a writable buffer, torch refuses to share read-only memory
+            data = np.frombuffer(bytearray(base64.b64decode(encoded)), dtype=dtype)
+        elif isinstance(encoded, dict):
+            if load_sidecar is None:
+                raise FileNotFoundError(
+                    "missing sidecar file {}".format(encoded["sidecar"])
+                )
+            sidecar = load_sidecar(encoded["sidecar"])
+            count = int(np.prod(dct["shape"], dtype=np.int64))
+            data = np.frombuffer(
+                sidecar, dtype=dtype, count=count, offset=encoded["offset"]
+            )
+        else:
+            data = np.asarray(encoded, dtype=dtype)
         return data.reshape(dct["shape"])
     return dct
 
 
+def _flatten_arrays(dct, arrays, prefix=""):
+    # replace the arrays of a nested dictionary by references to packed array blocks
+    flat = OrderedDict()
+    for key, value in dct.items():
+        name = prefix + str(key)
+        if isinstance(value, dict):
+            value = _flatten_arrays(value, arrays, name + "/")
+        elif isinstance(value, np.ndarray):
+            arrays[name] = value
+            value = {"__block__": name}
+        elif isinstance(value, np.generic):
+            value = value.item()
+        flat[key] = value
+    return flat
+
+
+def _unflatten_arrays(dct, arrays):
+    if "__block__" in dct:
+        return arrays[dct["__block__"]]
+    return OrderedDict(
+        (key, _unflatten_arrays(value, arrays) if isinstance(value, dict) else value)
+        for key, value in dct.items()
+    )
+
+
+class ArrayInfo(NamedTuple):
+    """ Shape and dtype of an array of a file, see `Serializable.read_file_header()` """
+
+    shape: Tuple[int, ...]
+    dtype: np.dtype
+
+
+def _describe_arrays(dct):
+    # replace the arrays of a nested dictionary by their shape and dtype
+    described = OrderedDict()
+    for key, value in dct.items():
+        if isinstance(value, dict):
+            value = _describe_arrays(value)
+        elif isinstance(value, np.ndarray):
+            value = ArrayInfo(value.shape, value.dtype)
+        described[key] = value
+    return described
+
+
+def _array_stats(array, chunk_size):
+    # min, max and mean of an array, reading at most chunk_size elements at a time
+    flat = array.reshape(-1)
+    if flat.size == 0 or not np.issubdtype(flat.dtype, np.number):
+        return None
+    minimum, maximum, total = np.inf, -np.inf, 0.0
+    for start in range(0, flat.size, chunk_size):
+        chunk = np.asarray(flat[start : start + chunk_size])
+        minimum = min(minimum, chunk.min().item())
+        maximum = max(maximum, chunk.max().item())
+        total += chunk.sum(dtype=np.float64).item()
+    return OrderedDict(
+        [("min", minimum), ("max", maximum), ("mean", total / flat.size)]
+    )
+
+
+def _sidecar_loader(directory, mmap_mode):
+    # maps the sidecar files recorded in a json file, relative to its directory, once each
+    sidecars = {}
+
+    def load_sidecar(name):
+        if name not in sidecars:
+            sidecar_path = os.path.join(directory, name)
+            if not os.path.isfile(sidecar_path):
+                raise FileNotFoundError("missing sidecar file {}".format(sidecar_path))
+            if os.path.getsize(sidecar_path) == 0:
+                # only empty arrays, an empty file cannot be memory-mapped
+                sidecars[name] = np.zeros(0, dtype=np.uint8)
+            else:
+                sidecars[name] = np.memmap(sidecar_path, dtype=np.uint8, mode=mmap_mode)
+        return sidecars[name]
+
+    return load_sidecar
+
+
+def _read_file(path, mmap_mode):
+    if path.endswith(".json"):
+        load_sidecar = _sidecar_loader(os.path.dirname(path), mmap_mode)
+        with open(path, "r") as f:
+            return json.load(
+                f, object_hook=partial(json_numpy_obj_hook, load_sidecar=load_sidecar)
+            )
+    elif path.endswith(".npy"):
+        return np.load(path, allow_pickle=True).item()
+    elif path.endswith(".plib"):
+        header, arrays = read_packed(np.memmap(path, dtype=np.uint8, mode=mmap_mode))
+        return _unflatten_arrays(header, arrays)
+    raise ValueError("unsupported file format: {}".format(path))
+
+
 class Serializable:
     """ Implementation to read/write to file.
     All class the is inherited from this class needs to implement to_dict() and 
@@ -90,38 +223,127 @@ class Serializable:
         """
         pass
 
+    def to_packed_dict(self):
+        """ Construct the ordered dictionary written to .plib files, its arrays are stored as raw
+        blocks that are memory-mapped back when loading. Defaults to `to_dict()`, classes whose
+        `to_dict()` splits a single tensor into several arrays can keep it in one block so that
+        `from_dict()` does not have to copy it
+
+        :rtype: OrderedDict
+        """
+        return self.to_dict()
+
+    def to_compact_dict(self, **kwargs):
+        """ Construct the ordered dictionary written by `to_file(compact=True)`, where the
+        arrays may be stored with a lossy, smaller encoding. Defaults to `to_dict()`,
+        `from_dict()` must accept both dictionaries
+
+        :param kwargs: the parameters of the encoding
+        :rtype: OrderedDict
+        """
+        return self.to_dict()
+
     @classmethod
     def from_file(cls, path, *args, **kwargs):
-        """ Read the object from a file (either .npy or .json)
+        """ Read the object from a file (either .npy, .json or .plib). A .plib file is
+        memory-mapped (copy-on-write) and its arrays are not copied nor unpickled
 
         :param path: path of the file
         :type path: string
         :param args, kwargs: the arguments that need to be passed into from_dict()
         :type args, kwargs: additional arguments
         """
-        if path.endswith(".json"):
-            with open(path, "r") as f:
-                d = json.load(f, object_hook=json_numpy_obj_hook)
-        elif path.endswith(".npy"):
-            d = np.load(path, allow_pickle=True).item()
-        else:
-            assert False, "failed to load {} from {}".format(cls.__name__, path)
+        assert path.endswith(
+            (".json", ".npy", ".plib")
+        ), "failed to load {} from {}".format(cls.__name__, path)
+        d = _read_file(path, mmap_mode="c")
         assert d["__name__"] == cls.__name__, "the file belongs to {}, not {}".format(
             d["__name__"], cls.__name__
         )
         return cls.from_dict(d, *args, **kwargs)
 
-    def to_file(self, path: str) -> None:
-        """ Write the object to a file (either .npy or .json)
+    @staticmethod
+    def read_file_header(path):
+        """ Read the metadata of a file written by `to_file()` without loading its arrays: the
+        class name (under "__name__") and the nested dictionary of the object, where every array
+        is replaced by its ArrayInfo (shape and dtype). Only the header of a .plib file is read,
+        .npy and .json files have to be parsed entirely
 
         :param path: path of the file
         :type path: string
+        :rtype: OrderedDict
+        """
+        if not path.endswith(".plib"):
+            return _describe_arrays(_read_file(path, mmap_mode="r"))
+        header = read_packed_header(np.memmap(path, dtype=np.uint8, mode="r"))
+        array_infos = {
+            name: ArrayInfo(tuple(entry["shape"]), np.dtype(entry["dtype"]))
+            for name, entry in header.pop("__arrays__").items()
+        }
+        return _unflatten_arrays(header, array_infos)
+
+    @staticmethod
+    def read_file_stats(path, chunk_size: int = 1 << 20):
+        """ Compute the min, max and mean of every numeric array of a file written by
+        `to_file()`. The arrays of a .plib file are memory-mapped and streamed through in chunks,
+        so the whole file is never in memory at once
+
+        :param path: path of the file
+        :type path: string
+        :param chunk_size: number of elements read at a time
+        :type chunk_size: int
+        :rtype: OrderedDict
+        :return: the stats by array name ("/"-separated path in the nested dictionary), None
+        for the empty and non-numeric arrays
+        """
+        arrays = OrderedDict()
+        _flatten_arrays(_read_file(path, mmap_mode="r"), arrays)
+        return OrderedDict(
+            (name, _array_stats(array, chunk_size)) for name, array in arrays.items()
+        )
+
+    def to_file(
+        self, path: str, sidecar: bool = False, compact: bool = False, **kwargs
+    ) -> None:
+        """ Write the object to a file (either .npy, .json or .plib)
+
+        :param path: path of the file
+        :type path: string
+        :param sidecar: for .json files, store the arrays in a binary sidecar file (the path
+        followed by .bin, memory-mapped when loading) instead of base64 strings
+        :type sidecar: bool, optional
+        :param compact: store the object with its lossy compact encoding, see
+        `to_compact_dict()`
+        :type compact: bool, optional
+        :param kwargs: the parameters of the compact encoding
         """
         if os.path.dirname(path) != "" and not os.path.exists(os.path.dirname(path)):
             os.makedirs(os.path.dirname(path))
-        d = self.to_dict()
+        if compact:
+            d = self.to_compact_dict(**kwargs)
+        elif path.endswith(".plib"):
+            d = self.to_packed_dict()
+        else:
+            d = self.to_dict()
         d["__name__"] = self.__class__.__name__
-        if path.endswith(".json"):
+        if path.endswith(".plib"):
+            arrays = OrderedDict()
+            header = _flatten_arrays(d, arrays)
+            size = packed_layout(header, arrays)[2]
+            buffer = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+            write_packed(buffer, header, arrays)
+            buffer.flush()
+        elif path.endswith(".json") and sidecar:
+            with open(path + ".bin", "wb") as sidecar_file, open(path, "w") as f:
+                json.dump(
+                    d,
+                    f,
+                    cls=NumpyEncoder,
+                    indent=4,
+                    sidecar=sidecar_file,
+                    sidecar_name=os.path.basename(path) + ".bin",
+                )
+        elif path.endswith(".json"):
             with open(path, "w") as f:
                 json.dump(d, f, cls=NumpyEncoder, indent=4)
         elif path.endswith(".npy"):
@@ -0,0 +1,127 @@
+"""
+A flat binary layout for a JSON header and a set of arrays, that can be read in place (from a
+memory-mapped file or a shared memory segment) without copying or unpickling anything:
+
+    magic (4 bytes) | version (uint32) | header size (uint64) | header (utf-8 JSON)
+    | padding | array block | padding | array block | ...
+
+The data section starts at the first multiple of ALIGNMENT bytes after the header, and so does
+every array block. The header lists the name, dtype, shape and offset (from the start of the
+data section) of each array under "__arrays__".
+"""
+
+from collections import OrderedDict
+import json
+
+import numpy as np
+
+MAGIC = b"PLIB"
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = np.dtype([("magic", "S4"), ("version", "<u4"), ("header_size", "<u8")])
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def packed_layout(header, arrays):
+    """Compute the layout of the header and the arrays
+
+    :param header: JSON-serializable metadata
+    :type header: dict
+    :param arrays: the arrays to store, by name
+    :type arrays: OrderedDict[str, np.ndarray]
+    :rtype: Tuple[bytes, int, int]
+    :return: the encoded header (including the array table), the offset of the data section and
+    the total size in bytes
+    """
+    array_table = OrderedDict()
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        offset = _align(offset)
+        array_table[name] = OrderedDict(
+            [
+                ("dtype", array.dtype.str),
+                ("shape", list(array.shape)),
+                ("offset", offset),
+            ]
+        )
+        offset += array.nbytes
+    header = OrderedDict(header)
+    header["__arrays__"] = array_table
+    encoded = json.dumps(header).encode("utf-8")
+    data_start = _align(_PREFIX.itemsize + len(encoded))
+    return encoded, data_start, data_start + offset
+
+
+def write_packed(buffer, header, arrays):
+    """Write the header and the arrays into a buffer of at least `packed_layout()` bytes
+
+    :param buffer: a writable buffer (bytearray, memoryview, mmap or uint8 array)
+    :param header: JSON-serializable metadata
+    :type header: dict
+    :param arrays: the arrays to store, by name
+    :type arrays: OrderedDict[str, np.ndarray]
+    """
+    encoded, data_start, size = packed_layout(header, arrays)
+    buffer = np.frombuffer(buffer, dtype=np.uint8, count=size)
+    prefix = np.array([(MAGIC, VERSION, len(encoded))], dtype=_PREFIX)
+    buffer[: _PREFIX.itemsize] = prefix.view(np.uint8)
+    buffer[_PREFIX.itemsize : _PREFIX.itemsize + len(encoded)] = np.frombuffer(
+        encoded, dtype=np.uint8
+    )
+    array_table = json.loads(encoded)["__arrays__"]
+    for name, array in arrays.items():
+        start = data_start + array_table[name]["offset"]
+        array = np.ascontiguousarray(array)
+        buffer[start : start + array.nbytes] = array.reshape(-1).view(np.uint8)
+
+
+def read_packed(buffer):
+    """Read the header and the arrays of a buffer written by `write_packed()`, the arrays are
+    views of the buffer (read-only if the buffer is)
+
+    :param buffer: the buffer (bytes, memoryview, mmap or uint8 array)
+    :rtype: Tuple[OrderedDict, OrderedDict[str, np.ndarray]]
+    """
+    header, data_start = _read_header(buffer)
+    arrays = OrderedDict()
+    for name, entry in header.pop("__arrays__").items():
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            buffer,
+            dtype=np.dtype(entry["dtype"]),
+            count=count,
+            offset=data_start + entry["offset"],
+        ).reshape(entry["shape"])
+    return header, arrays
+
+
+def read_packed_header(buffer):
+    """Read only the header of a buffer written by `write_packed()` (including the array table
+    under "__arrays__"), none of the array data is touched
+
+    :param buffer: the buffer
+    :rtype: OrderedDict
+    """
+    return _read_header(buffer)[0]
+
+
+def _read_header(buffer):
+    prefix = np.frombuffer(buffer, dtype=_PREFIX, count=1)[0]
+    if prefix["magic"] != MAGIC:
+        raise ValueError("not a packed poselib buffer")
+    if prefix["version"] > VERSION:
+        raise ValueError(
+            "unsupported packed format version {}".format(prefix["version"])
+        )
+    header_size = int(prefix["header_size"])
+    encoded = bytes(
+        np.frombuffer(
+            buffer, dtype=np.uint8, count=header_size, offset=_PREFIX.itemsize
+        )
+    )
+    header = json.loads(encoded.decode("utf-8"), object_pairs_hook=OrderedDict)
+    return header, _align(_PREFIX.itemsize + header_size)
@@ -152,47 +152,43 @@ def quat_from_rotation_matrix(m):
     Reference can be found here:
     http://www.cg.info.hiroshima-cu.ac.jp/~miyazaki/knowledge/teche52.html
 
+    All four candidate quaternions (each one derived from a different largest component) are
+    computed, and the best conditioned one is gathered per matrix, so there is no data-dependent
+    branching or masked indexing. Degenerate matrices are handled by clamping the denominators.
+
     :param m: 3x3 orthogonal rotation matrices.
     :type m: Tensor
 
     :rtype: Tensor
     """
-    m = m.unsqueeze(0)
-    diag0 = m[..., 0, 0]
-    diag1 = m[..., 1, 1]
-    diag2 = m[..., 2, 2]
-
-    # Math stuff.
-    w = (((diag0 + diag1 + diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
-    x = (((diag0 - diag1 - diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
-    y = (((-diag0 + diag1 - diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
-    z = (((-diag0 - diag1 + diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
-
-    # Only modify quaternions where w > x, y, z.
-    c0 = (w >= x) & (w >= y) & (w >= z)
-    x[c0] *= (m[..., 2, 1][c0] - m[..., 1, 2][c0]).sign()
-    y[c0] *= (m[..., 0, 2][c0] - m[..., 2, 0][c0]).sign()
-    z[c0] *= (m[..., 1, 0][c0] - m[..., 0, 1][c0]).sign()
-
-    # Only modify quaternions where x > w, y, z
-    c1 = (x >= w) & (x >= y) & (x >= z)
-    w[c1] *= (m[..., 2, 1][c1] - m[..., 1, 2][c1]).sign()
-    y[c1] *= (m[..., 1, 0][c1] + m[..., 0, 1][c1]).sign()
-    z[c1] *= (m[..., 0, 2][c1] + m[..., 2, 0][c1]).sign()
-
-    # Only modify quaternions where y > w, x, z.
-    c2 = (y >= w) & (y >= x) & (y >= z)
-    w[c2] *= (m[..., 0, 2][c2] - m[..., 2, 0][c2]).sign()
-    x[c2] *= (m[..., 1, 0][c2] + m[..., 0, 1][c2]).sign()
-    z[c2] *= (m[..., 2, 1][c2] + m[..., 1, 2][c2]).sign()
-
-    # Only modify quaternions where z > w, x, y.
-    c3 = (z >= w) & (z >= x) & (z >= y)
-    w[c3] *= (m[..., 1, 0][c3] - m[..., 0, 1][c3]).sign()
-    x[c3] *= (m[..., 2, 0][c3] + m[..., 0, 2][c3]).sign()
-    y[c3] *= (m[..., 2, 1][c3] + m[..., 1, 2][c3]).sign()
-
-    return quat_normalize(torch.stack([x, y, z, w], dim=-1)).squeeze(0)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+
+    # 4 * (x^2, y^2, z^2, w^2)
+    squared = torch.stack(
+        [
+            1.0 + m00 - m11 - m22,
+            1.0 - m00 + m11 - m22,
+            1.0 - m00 - m11 + m22,
+            1.0 + m00 + m11 + m22,
+        ],
+        dim=-1,
+    )
+    # row i is 4 * q_i * (x, y, z, w)
+    candidates = torch.stack(
+        [
+            torch.stack([squared[..., 0], m10 + m01, m02 + m20, m21 - m12], dim=-1),
+            torch.stack([m10 + m01, squared[..., 1], m21 + m12, m02 - m20], dim=-1),
+            torch.stack([m02 + m20, m21 + m12, squared[..., 2], m10 - m01], dim=-1),
+            torch.stack([m21 - m12, m02 - m20, m10 - m01, squared[..., 3]], dim=-1),
+        ],
+        dim=-2,
+    )
+    best = squared.argmax(dim=-1, keepdim=True)
+    q = candidates.gather(-2, best.unsqueeze(-1).expand(best.shape[:-1] + (1, 4)))
+    scale = squared.gather(-1, best).clamp(min=1e-12).sqrt()
+    return quat_normalize(q.squeeze(-2) / scale)
 
 
 @torch.jit.script
@@ -205,12 +201,24 @@ def quat_mul_norm(x, y):
 
 
 @torch.jit.script
-def quat_rotate(rot, vec):
+def quat_rotate(rot, vec, out: Optional[torch.Tensor] = None):
     """
-    Rotate a 3D vector with the 3D rotation
+    Rotate a 3D vector with the 3D rotation. This uses the cross product form
+    v' = |q|^2 * v + w * t + xyz x t with t = 2 * xyz x v, so no 4D quaternion is built. Like
+    the conjugate sandwich q * v * conj(q) it replaces, it scales the result by |q|^2, which is
+    not exactly 1 for a float32 quaternion. The result is written into `out` if it is given,
+    which does not support autograd; without `out` the computation is differentiable.
     """
-    other_q = torch.cat([vec, torch.zeros_like(vec[..., :1])], dim=-1)
-    return quat_imaginary(quat_mul(quat_mul(rot, other_q), quat_conjugate(rot)))
+    dtype = torch.promote_types(rot.dtype, vec.dtype)
+    rot = rot.to(dtype)
+    xyz, vec = torch.broadcast_tensors(rot[..., :3], vec.to(dtype))
+    t = 2 * torch.linalg.cross(xyz, vec, dim=-1)
+    rotated = torch.linalg.cross(xyz, t, dim=-1) + rot[..., 3:] * t
+    norm_squared = (rot * rot).sum(dim=-1, keepdim=True)
+    if out is None:
+        return rotated + vec * norm_squared
+    # same operations as without `out`, so that both give the same result
+    return torch.mul(vec, norm_squared, out=out).add_(rotated)
 
 
 @torch.jit.script
@@ -235,10 +243,11 @@ def quat_angle_axis(x):
     The (angle, axis) representation of the rotation. The axis is normalized to unit length.
     The angle is guaranteed to be between [0, pi].
     """
-    s = 2 * (x[..., 3] ** 2) - 1
-    angle = s.clamp(-1, 1).arccos()  # just to be safe
+    # same as arccos(2 * w^2 - 1), but accurate for small angles
+    sin_half_angle = x[..., :3].norm(p=2, dim=-1)
+    angle = 2 * torch.atan2(sin_half_angle, x[..., 3].abs())
     axis = x[..., :3]
-    axis /= axis.norm(p=2, dim=-1, keepdim=True).clamp(min=1e-9)
+    axis /= sin_half_angle.unsqueeze(-1).clamp(min=1e-9)
     return angle, axis
 
 
@@ -263,6 +272,109 @@ def quat_yaw_rotation(x, z_up: bool = True):
     return quat_normalize(q)
 
 
+@torch.jit.script
+def quat_nlerp(q0, q1, t):
+    """
+    Normalized linear interpolation from q0 (t = 0) to q1 (t = 1) along the shortest path. The
+    blend weight t is broadcast against the quaternions without their last dimension. This is
+    cheaper than slerp but does not interpolate at a constant angular velocity.
+    """
+    t = t.unsqueeze(-1)
+    q1 = torch.where((q0 * q1).sum(dim=-1, keepdim=True) < 0, -q1, q1)
+    return quat_unit(torch.lerp(q0, q1, t))
+
+
+@torch.jit.script
+def quat_slerp(q0, q1, t, shortest_path: bool = True):
+    """
+    Spherical linear interpolation from q0 (t = 0) to q1 (t = 1) along the shortest path. The
+    blend weight t is broadcast against the quaternions without their last dimension. Nearly
+    identical rotations fall back to nlerp, which is accurate there and avoids dividing by a
+    vanishing sine. With shortest_path=False, q1 is not flipped to the hemisphere of q0: the
+    interpolation follows the great arc between the two quaternions as given, which is smooth
+    in q0 and q1 but may take the long way round (it is undefined for q1 = -q0).
+    """
+    t = t.unsqueeze(-1)
+    cos_half_theta = (q0 * q1).sum(dim=-1, keepdim=True)
+    if shortest_path:
+        q1 = torch.where(cos_half_theta < 0, -q1, q1)
+        cos_half_theta = cos_half_theta.abs()
+    small_angle = cos_half_theta > 0.9995
+    half_theta = torch.acos(cos_half_theta.clamp(min=-0.9995, max=0.9995))
+    sin_half_theta = torch.sin(half_theta)
+    w0 = torch.where(
+        small_angle, 1 - t, torch.sin((1 - t) * half_theta) / sin_half_theta
+    )
+    w1 = torch.where(small_angle, t, torch.sin(t * half_theta) / sin_half_theta)
+    return quat_unit(w0 * q0 + w1 * q1)
+
+
+@torch.jit.script
+def quat_log(x):
+    """
+    Logarithm of unit quaternions, i.e. the rotation axis scaled by half the rotation angle.
+    The output has 3 components (the real part of the logarithm is zero). q and -q have the
+    same logarithm: the quaternions are taken with w >= 0, so that the angle is at most pi and
+    rotations close to the identity stay accurate on both sides of the double cover.
+    """
+    x = torch.where(x[..., 3:] < 0, -x, x)
+    xyz = x[..., :3]
+    sin_half_theta = xyz.norm(p=2, dim=-1, keepdim=True)
+    half_theta = torch.atan2(sin_half_theta, x[..., 3:])
+    scale = torch.where(
+        sin_half_theta < 1e-6,
+        1.0 / x[..., 3:],
+        half_theta / sin_half_theta.clamp(min=1e-6),
+    )
+    return xyz * scale
+
+
+@torch.jit.script
+def quat_exp(v):
+    """
+    Exponential of pure quaternions given by their 3 imaginary components, the inverse of
+    quat_log()
+    """
+    half_theta = v.norm(p=2, dim=-1, keepdim=True)
+    scale = torch.where(
+        half_theta < 1e-6,
+        1.0 - half_theta**2 / 6.0,
+        torch.sin(half_theta) / half_theta.clamp(min=1e-6),
+    )
+    return torch.cat([v * scale, torch.cos(half_theta)], dim=-1)
+
+
+@torch.jit.script
+def quat_squad_tangent(q_prev, q, q_next):
+    """
+    Inner control point of squad at the key q, given its neighbouring keys q_prev and q_next.
+    The neighbours are flipped to the hemisphere of q so that the spline takes the shortest path.
+    """
+    q_prev = torch.where((q * q_prev).sum(dim=-1, keepdim=True) < 0, -q_prev, q_prev)
+    q_next = torch.where((q * q_next).sum(dim=-1, keepdim=True) < 0, -q_next, q_next)
+    q_inv = quat_conjugate(q)
+    v = quat_log(quat_mul(q_inv, q_next)) + quat_log(quat_mul(q_inv, q_prev))
+    return quat_unit(quat_mul(q, quat_exp(-0.25 * v)))
+
+
+@torch.jit.script
+def quat_squad(q0, a0, a1, q1, t):
+    """
+    Spherical quadrangle interpolation from q0 (t = 0) to q1 (t = 1) with the inner control points
+    a0 and a1 (see quat_squad_tangent()), which is C1 continuous across consecutive keys. The
+    blend weight t is broadcast against the quaternions without their last dimension.
+    The inner slerp between a0 and a1 does not flip either of them to the other's hemisphere,
+    a flip would make the spline jump where their dot product changes sign. The keys should be
+    sign-aligned beforehand (each key flipped to the hemisphere of the previous one), which
+    keeps every control point in the hemisphere of its key.
+    """
+    return quat_slerp(
+        quat_slerp(q0, q1, t),
+        quat_slerp(a0, a1, t, shortest_path=False),
+        2 * t * (1 - t),
+    )
+
+
 @torch.jit.script
 def transform_from_rotation_translation(
     r: Optional[torch.Tensor] = None, t: Optional[torch.Tensor] = None
@@ -302,14 +414,19 @@ def transform_translation(x):
 
 
 @torch.jit.script
-def transform_inverse(x):
+def transform_inverse(x, out: Optional[torch.Tensor] = None):
     """
-    Inverse transformation
+    Inverse transformation. The result is written into `out` if it is given (not
+    differentiable).
     """
     inv_so3 = quat_inverse(transform_rotation(x))
-    return transform_from_rotation_translation(
-        r=inv_so3, t=quat_rotate(inv_so3, -transform_translation(x))
-    )
+    if out is None:
+        return torch.cat(
+            [inv_so3, -quat_rotate(inv_so3, transform_translation(x))], dim=-1
+        )
+    out[..., :4] = inv_so3
+    quat_rotate(inv_so3, transform_translation(x), out=out[..., 4:]).neg_()
+    return out
 
 
 @torch.jit.script
@@ -321,25 +438,35 @@ def transform_identity_like(x):
 
 
 @torch.jit.script
-def transform_mul(x, y):
+def transform_mul(x, y, out: Optional[torch.Tensor] = None):
     """
-    Combine two transformation together
+    Combine two transformation together. The result is written into `out` if it is given,
+    which must not overlap with the inputs (not differentiable).
     """
-    z = transform_from_rotation_translation(
-        r=quat_mul_norm(transform_rotation(x), transform_rotation(y)),
-        t=quat_rotate(transform_rotation(x), transform_translation(y))
-        + transform_translation(x),
+    r = quat_mul_norm(transform_rotation(x), transform_rotation(y))
+    if out is None:
+        t = quat_rotate(transform_rotation(x), transform_translation(y)) + (
+            transform_translation(x)
+        )
+        return torch.cat([r, t.to(r.dtype)], dim=-1)
+    out[..., :4] = r
+    quat_rotate(transform_rotation(x), transform_translation(y), out=out[..., 4:]).add_(
+        transform_translation(x)
     )
-    return z
+    return out
 
 
 @torch.jit.script
-def transform_apply(rot, vec):
+def transform_apply(rot, vec, out: Optional[torch.Tensor] = None):
     """
-    Transform a 3D vector
+    Transform a 3D vector. The result is written into `out` if it is given (not
+    differentiable).
     """
     assert isinstance(vec, torch.Tensor)
-    return quat_rotate(transform_rotation(rot), vec) + transform_translation(rot)
+    if out is None:
+        return quat_rotate(transform_rotation(rot), vec) + transform_translation(rot)
+    rotated = quat_rotate(transform_rotation(rot), vec, out=out)
+    return rotated.add_(transform_translation(rot))
 
 
 @torch.jit.script
@@ -393,7 +520,7 @@ def rot_matrix_from_quaternion(q):
 
     R0 = torch.stack([R00, R01, R02], dim=-1)
     R1 = torch.stack([R10, R11, R12], dim=-1)
-    R2 = torch.stack([R10, R21, R22], dim=-1)
+    R2 = torch.stack([R20, R21, R22], dim=-1)
 
     R = torch.stack([R0, R1, R2], dim=-2)
 
@@ -478,3 +605,181 @@ def euclidean_to_transform(transformation_matrix):
         ),
         t=euclidean_translation(transformation_matrix),
     )
+
+
+@torch.jit.script
+def quat_to_rot6d(q):
+    """
+    6D representation of the rotation (Zhou et al. 2019), the first two columns of its rotation
+    matrix concatenated into (..., 6)
+    """
+    m = rot_matrix_from_quaternion(q)
+    return torch.cat([m[..., :, 0], m[..., :, 1]], dim=-1)
+
+
+@torch.jit.script
+def quat_from_rot6d(x):
+    """
+    Construct a 3D rotation from its 6D representation, the two columns are orthonormalized with
+    Gram-Schmidt so that any (non-degenerate) network output maps to a valid rotation
+    """
+    b1 = x[..., :3] / x[..., :3].norm(p=2, dim=-1, keepdim=True).clamp(min=1e-9)
+    b2 = x[..., 3:] - (b1 * x[..., 3:]).sum(dim=-1, keepdim=True) * b1
+    b2 = b2 / b2.norm(p=2, dim=-1, keepdim=True).clamp(min=1e-9)
+    b3 = torch.linalg.cross(b1, b2, dim=-1)
+    return quat_from_rotation_matrix(torch.stack([b1, b2, b3], dim=-1))
+
+
+@torch.jit.script
+def quat_to_exp_map(q):
+    """
+    Exponential map of the rotation, i.e. the rotation axis scaled by the rotation angle which is
+    between [0, pi]. This is stable near the identity.
+    """
+    return 2 * quat_log(quat_pos(q))
+
+
+@torch.jit.script
+def quat_from_exp_map(e):
+    """
+    Construct a 3D rotation from its exponential map (axis scaled by angle)
+    """
+    return quat_normalize(quat_exp(0.5 * e))
+
+
+@torch.jit.script
+def _euler_axes(order: str) -> List[int]:
+    assert len(order) == 3, "expected 3 axes, got {}".format(order)
+    assert (
+        order.isupper() or order.islower()
+    ), "expected all intrinsic (XYZ) or all extrinsic (xyz) axes, " "got {}".format(
+        order
+    )
+    axes: List[int] = []
+    for axis in order.lower():
+        axis_index = "xyz".find(axis)
+        assert axis_index >= 0, "expected axes from xyz or XYZ, got {}".format(order)
+        axes.append(axis_index)
+    assert (
+        axes[0] != axes[1] and axes[1] != axes[2]
+    ), "expected consecutive axes to be different, got {}".format(order)
+    return axes
+
+
+@torch.jit.script
+def quat_from_euler(angles, order: str, degree: bool = False):
+    """
+    Construct a 3D rotation from Euler angles (..., 3). The axis order is given as a string such
+    as "xyz" or "ZXZ", uppercase letters are intrinsic rotations (about the rotating axes) and
+    lowercase letters are extrinsic ones (about the fixed axes), same as SciPy
+
+    :param angles: the three rotation angles, in the order of the axes
+    :type angles: Tensor
+    :param order: the axis order
+    :type order: str
+    :param degree: put True here if the angles are given by degree
+    :type degree: bool, optional, default=False
+    """
+    axes = _euler_axes(order)
+    intrinsic = order.isupper()
+    if degree:
+        angles = angles / 180.0 * math.pi
+    half_angles = 0.5 * angles
+    q = torch.zeros(angles.shape[:-1] + (4,), dtype=angles.dtype, device=angles.device)
+    for i in range(3):
+        elementary = torch.zeros_like(q)
+        elementary[..., axes[i]] = half_angles[..., i].sin()
+        elementary[..., 3] = half_angles[..., i].cos()
+        if i == 0:
+            q = elementary
+        elif intrinsic:
+            q = quat_mul(q, elementary)
+        else:
+            q = quat_mul(elementary, q)
+    return quat_normalize(q)
+
+
+@torch.jit.script
+def quat_to_euler(q, order: str, degree: bool = False):
+    """
+    Euler angles (..., 3) of the rotation in the given axis order, see quat_from_euler(). The
+    angles are between [-pi, pi] (the second one between [0, pi] for symmetric orders such as
+    "zxz", [-pi/2, pi/2] otherwise). At gimbal lock the third angle is set to zero. This uses
+    the direct method of Bernardes and Viollet (2022), without going through rotation matrices.
+
+    :param q: the rotation
+    :type q: Tensor
+    :param order: the axis order
+    :type order: str
+    :param degree: put True here to get the angles in degrees
+    :type degree: bool, optional, default=False
+    """
+    axes = _euler_axes(order)
+    extrinsic = order.islower()
+    if not extrinsic:
+        axes = [axes[2], axes[1], axes[0]]
+    i, j, k = axes[0], axes[1], axes[2]
+    symmetric = i == k
+    if symmetric:
+        k = 3 - i - j
+    sign = float((i - j) * (j - k) * (k - i) // 2)
+
+    if symmetric:
+        a, b, c, d = q[..., 3], q[..., i], q[..., j], q[..., k] * sign
+    else:
+        a = q[..., 3] - q[..., j]
+        b = q[..., i] + q[..., k] * sign
+        c = q[..., j] + q[..., 3]
+        d = q[..., k] * sign - q[..., i]
+
+    half_sum = torch.atan2(b, a)
+    half_diff = torch.atan2(d, c)
+    middle = 2 * torch.atan2(torch.hypot(c, d), torch.hypot(a, b))
+    near_zero = middle.abs() <= 1e-7
+    near_pi = (middle - math.pi).abs() <= 1e-7
+    regular = ~(near_zero | near_pi)
+    # at gimbal lock only the sum (or difference) of the first and third angles is defined
+    locked = torch.where(
+        near_zero, 2 * half_sum, 2 * half_diff * (-1.0 if extrinsic else 1.0)
+    )
+    # the angle zeroed out is always the last one of the order, which is stored as `first` for
+    # intrinsic orders since their axes were reversed above
+    zeros = torch.zeros_like(locked)
+    first = torch.where(regular, half_sum - half_diff, locked if extrinsic else zeros)
+    third = torch.where(regular, half_sum + half_diff, zeros if extrinsic else locked)
+    if not symmetric:
+        third = third * sign
+        middle = middle - math.pi / 2
+    if extrinsic:
+        angles = torch.stack([first, middle, third], dim=-1)
+    else:
+        angles = torch.stack([third, middle, first], dim=-1)
+    angles = torch.remainder(angles + math.pi, 2 * math.pi) - math.pi
+    if degree:
+        angles = angles * 180.0 / math.pi
+    return angles
+
+
+@torch.jit.script
+def quat_swing_twist(q, axis):
+    """
+    Decompose the rotation into q = swing * twist, where twist is the rotation about the (unit)
+    axis and swing is a rotation about an axis perpendicular to it. The twist of a rotation that
+    swings the axis by exactly pi is undefined, the identity is returned for it.
+
+    :param q: the rotation
+    :type q: Tensor
+    :param axis: the twist axis, broadcastable against the rotation
+    :type axis: Tensor
+
+    :rtype: Tuple[Tensor, Tensor]
+    """
+    axis = axis / axis.norm(p=2, dim=-1, keepdim=True).clamp(min=1e-9)
+    projection = (q[..., :3] * axis).sum(dim=-1, keepdim=True)
+    twist = torch.cat([projection * axis, q[..., 3:]], dim=-1)
+    twist_norm = twist.norm(p=2, dim=-1, keepdim=True)
+    identity = torch.zeros_like(twist)
+    identity[..., 3] = 1.0
+    twist = torch.where(twist_norm < 1e-9, identity, twist / twist_norm.clamp(min=1e-9))
+    swing = quat_mul(q, quat_conjugate(twist))
+    return swing, twist
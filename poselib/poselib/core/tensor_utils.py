@@ -9,20 +9,53 @@
 
 from collections import OrderedDict
 from .backend import Serializable
+import numpy as np
 import torch
 
 
 class TensorUtils(Serializable):
     @classmethod
-    def from_dict(cls, dict_repr, *args, **kwargs):
-        """ Read the object from an ordered dictionary
+    def from_dict(
+        cls,
+        dict_repr,
+        *args,
+        device=None,
+        downcast: bool = False,
+        pin_memory: bool = False,
+        share_memory: bool = False,
+        **kwargs
+    ):
+        """ Read the object from an ordered dictionary. The array is only copied when it has to
+        be: to cast it to the dtype of the context (or down-cast it), or to move it to pinned
+        memory, shared memory or another device. Otherwise the tensor shares its memory (e.g. a
+        memory-mapped file) with the array.
 
         :param dict_repr: the ordered dictionary that is used to construct the object
         :type dict_repr: OrderedDict
+        :param device: the device of the tensor
+        :type device: torch.device or str, optional
+        :param downcast: load float64 arrays as float32
+        :type downcast: bool, optional
+        :param pin_memory: place the tensor in page-locked host memory, for faster (and
+        asynchronous) copies to the GPU
+        :type pin_memory: bool, optional
+        :param share_memory: place the tensor in shared memory, to send it to other processes
+        without copying it
+        :type share_memory: bool, optional
         :param kwargs: the arguments that need to be passed into from_dict()
         :type kwargs: additional arguments
         """
-        return torch.from_numpy(dict_repr["arr"].astype(dict_repr["context"]["dtype"]))
+        dtype = np.dtype(dict_repr["context"]["dtype"])
+        if downcast and dtype == np.float64:
+            dtype = np.dtype(np.float32)
+        x = torch.from_numpy(dict_repr["arr"].astype(dtype, copy=False))
+        if pin_memory:
+            x = x.pin_memory()
+        if share_memory:
+            x = x.clone().share_memory_() if not x.is_shared() else x
+        if device is not None:
+            x = x.to(device, non_blocking=pin_memory)
+        return x
 
     def to_dict(self):
         """ Construct an ordered dictionary from the object
@@ -43,3 +76,36 @@ def tensor_to_dict(x):
             "dtype": x_np.dtype.name
         }
     }
+
+
+def tensor_gaussian_filter1d(x, sigma: float, dim: int = -1, truncate: float = 4.0):
+    """ 1-D Gaussian filter along one dimension of a tensor, the edges are padded with the
+    nearest value. This is the torch counterpart of `scipy.ndimage.gaussian_filter1d()` with
+    `mode="nearest"`, it keeps the dtype and the device of the input. The kernel taps are
+    accumulated as shifted slices of the padded input, which avoids moving the filtered
+    dimension last and is faster than a single-channel `conv1d()` on long inputs
+
+    :param x: the input tensor
+    :type x: Tensor
+    :param sigma: standard deviation of the Gaussian kernel
+    :type sigma: float
+    :param dim: the dimension to filter along
+    :type dim: int
+    :param truncate: truncate the kernel at this many standard deviations
+    :type truncate: float
+
+    :rtype: Tensor
+    """
+    radius = int(truncate * sigma + 0.5)
+    offsets = torch.arange(-radius, radius + 1, dtype=torch.float64)
+    kernel = torch.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel = (kernel / kernel.sum()).tolist()
+
+    x = x.movedim(dim, 0)
+    length = x.shape[0]
+    padded_indices = torch.arange(-radius, length + radius, device=x.device)
+    padded = x[padded_indices.clamp_(0, length - 1)]
+    y = padded[:length] * kernel[0]
+    for i in range(1, len(kernel)):
+        y.add_(padded[i : i + length], alpha=kernel[i])
+    return y.movedim(0, dim)
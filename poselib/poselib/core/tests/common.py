@@ -0,0 +1,10 @@
+"""
+Helpers shared by the tests
+"""
+
+
+def same_rotation(q0, q1, atol):
+    """Whether the unit quaternions q0 and q1 are the same rotations (q and -q are), i.e.
+    whether the absolute value of their dot product is above 1 - atol everywhere
+    """
+    return bool(((q0 * q1).sum(dim=-1).abs() > 1 - atol).all())
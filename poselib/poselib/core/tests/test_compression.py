@@ -0,0 +1,36 @@
+from ..rotation3d import *
+from ..compression import *
+
+import torch
+
+
+def test_smallest_three():
+    torch.manual_seed(0)
+    q = quat_normalize(torch.randn(100000, 4, dtype=torch.float64))
+    # the quaternions with a component of each sign at the largest position, and the edge
+    # cases where the largest component is not unique
+    q = torch.cat([q, torch.eye(4, dtype=torch.float64), -torch.eye(4)])
+    q = torch.cat([q, quat_normalize(torch.tensor([[1.0, -1.0, 0, 0], [0, 0, 1, 1]]))])
+    codes, index = quat_to_smallest_three(q)
+    assert codes.min() >= 0 and codes.max() < 1 << 16 and index.max() < 4
+    decoded = quat_from_smallest_three(codes, index, dtype=torch.float64)
+    # same rotation up to the sign
+    decoded = torch.where((q * decoded).sum(-1, keepdim=True) < 0, -decoded, decoded)
+    smallest = q.abs() < q.abs().max(dim=-1, keepdim=True).values
+    assert (decoded - q).abs()[smallest].max() <= smallest_three_step() / 2 + 1e-12
+    assert (decoded - q).abs().max() < 3.5e-5
+    angle = 2 * torch.asin((decoded - q).norm(dim=-1).clamp(max=2) / 2) * 2
+    assert angle.max() < 1e-4
+
+    # fewer bits, larger (but still bounded) error
+    codes, index = quat_to_smallest_three(q, bits=10)
+    decoded = quat_from_smallest_three(codes, index, bits=10, dtype=torch.float64)
+    assert ((q * decoded).sum(-1).abs() > 1 - (4 * smallest_three_step(10)) ** 2).all()
+
+
+def test_fixed_point():
+    t = torch.randn(1000, 3, dtype=torch.float64) * 100
+    codes, origin = translation_to_fixed_point(t, resolution=1e-4)
+    assert torch.equal(origin, t[0]) and (codes[0] == 0).all()
+    decoded = translation_from_fixed_point(codes, origin, 1e-4, dtype=torch.float64)
+    assert (decoded - t).abs().max() <= 0.5e-4 + 1e-9
@@ -0,0 +1,99 @@
+from ..rotation3d import *
+from .common import same_rotation
+
+import itertools
+import warnings
+
+import numpy as np
+import pytest
+import torch
+from scipy.spatial.transform import Rotation
+
+
+def _euler_orders():
+    for axes in itertools.product("xyz", repeat=3):
+        if axes[0] != axes[1] and axes[1] != axes[2]:
+            yield "".join(axes)
+            yield "".join(axes).upper()
+
+
+def test_rot6d():
+    rotations = Rotation.random(1000, random_state=0)
+    q = torch.from_numpy(rotations.as_quat())
+    rot6d = quat_to_rot6d(q)
+    m = rotations.as_matrix()
+    assert np.allclose(rot6d.numpy(), np.concatenate([m[..., 0], m[..., 1]], -1))
+    assert same_rotation(quat_from_rot6d(rot6d), q, atol=1e-12)
+    # non-orthonormal inputs are projected back to rotations
+    noisy = rot6d.view(10, 100, 6) * 3 + 0.01 * torch.randn(10, 100, 6).double()
+    assert same_rotation(quat_from_rot6d(noisy), q.view(10, 100, 4), atol=1e-3)
+
+
+def test_exp_map():
+    rotations = Rotation.random(1000, random_state=0)
+    q = torch.from_numpy(rotations.as_quat())
+    e = quat_to_exp_map(q)
+    assert np.allclose(e.numpy(), rotations.as_rotvec())
+    assert same_rotation(quat_from_exp_map(e), q, atol=1e-12)
+    assert bool((quat_from_exp_map(e)[..., 3] >= 0).all())
+
+    # near the identity
+    small = torch.tensor([[1e-9, 0, 0], [1e-5, -2e-5, 3e-6], [0, 0, 0]]).double()
+    q = quat_from_exp_map(small)
+    assert np.allclose(q.numpy(), Rotation.from_rotvec(small.numpy()).as_quat())
+    assert torch.allclose(quat_to_exp_map(q), small, atol=1e-15)
+    assert torch.allclose(quat_to_exp_map(-q), small, atol=1e-15)
+
+
+@pytest.mark.parametrize("order", list(_euler_orders()))
+def test_euler(order):
+    rotations = Rotation.random(500, random_state=0)
+    q = torch.from_numpy(rotations.as_quat())
+    angles = quat_to_euler(q.view(20, 25, 4), order)
+    assert angles.shape == (20, 25, 3)
+    assert np.allclose(angles.view(-1, 3).numpy(), rotations.as_euler(order))
+    assert same_rotation(quat_from_euler(angles, order).view(-1, 4), q, atol=1e-12)
+
+    angles = torch.rand(500, 3).double() * 360 - 180
+    q = quat_from_euler(angles, order, degree=True)
+    expected = Rotation.from_euler(order, angles.numpy(), degrees=True).as_quat()
+    assert same_rotation(q, torch.from_numpy(expected), atol=1e-12)
+
+    # gimbal lock
+    locked = torch.tensor([[0.3, 0.0, 0.0], [0.3, np.pi / 2, 0.0]]).double()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = Rotation.from_euler(order, locked.numpy()).as_euler(order)
+    actual = quat_to_euler(quat_from_euler(locked, order), order)
+    assert same_rotation(
+        quat_from_euler(actual, order), quat_from_euler(locked, order), atol=1e-10
+    )
+    assert np.allclose(actual.numpy(), expected, atol=1e-6)
+
+    with pytest.raises(Exception):
+        quat_to_euler(q, "xYz")
+
+
+def test_swing_twist():
+    rotations = Rotation.random(1000, random_state=0)
+    q = torch.from_numpy(rotations.as_quat())
+    axis = torch.tensor([0.0, 0.0, 1.0], dtype=torch.float64)
+    swing, twist = quat_swing_twist(q, axis)
+    assert same_rotation(quat_mul(swing, twist), q, atol=1e-12)
+    # the twist rotates about the axis, the swing leaves no component along it
+    assert torch.allclose(twist[..., :2], torch.zeros(1000, 2, dtype=q.dtype))
+    assert torch.allclose(swing[..., 2], torch.zeros(1000, dtype=q.dtype))
+
+    # per-joint axes broadcast over (T, J)
+    axes = torch.nn.functional.normalize(torch.randn(5, 3, dtype=torch.float64), dim=-1)
+    swing, twist = quat_swing_twist(q.view(200, 5, 4), axes)
+    assert same_rotation(quat_mul(swing, twist), q.view(200, 5, 4), atol=1e-12)
+    assert torch.allclose(
+        (swing[..., :3] * axes).sum(dim=-1), torch.zeros(200, 5).double()
+    )
+
+    # a half turn swing has no defined twist
+    half_turn = torch.tensor([1.0, 0.0, 0.0, 0.0])
+    swing, twist = quat_swing_twist(half_turn, torch.tensor([0.0, 0.0, 1.0]))
+    assert torch.equal(twist, torch.tensor([0.0, 0.0, 0.0, 1.0]))
+    assert torch.equal(swing, half_turn)
@@ -0,0 +1,120 @@
+from ..rotation3d import *
+from .common import same_rotation
+
+import numpy as np
+import torch
+from scipy.spatial.transform import Rotation
+
+
+def _random_quat(*shape, dtype=torch.float64):
+    return quat_unit(torch.randn(*shape, 4, dtype=dtype))
+
+
+def _scipy_slerp(q0, q1, t):
+    r0 = Rotation.from_quat(q0.reshape(-1, 4).numpy())
+    r1 = Rotation.from_quat(q1.reshape(-1, 4).numpy())
+    rotvec = (r0.inv() * r1).as_rotvec() * t.reshape(-1, 1).numpy()
+    return torch.from_numpy((r0 * Rotation.from_rotvec(rotvec)).as_quat())
+
+
+def test_slerp_matches_scipy():
+    torch.manual_seed(0)
+    q0, q1 = _random_quat(1000), _random_quat(1000)
+    t = torch.rand(1000, dtype=torch.float64)
+    assert same_rotation(quat_slerp(q0, q1, t), _scipy_slerp(q0, q1, t), atol=1e-10)
+    assert same_rotation(quat_slerp(q0, q1, torch.zeros_like(t)), q0, atol=1e-6)
+    assert same_rotation(quat_slerp(q0, q1, torch.ones_like(t)), q1, atol=1e-6)
+    # q and -q are the same rotation, the interpolation takes the shortest path either way
+    assert same_rotation(quat_slerp(q0, -q1, t), quat_slerp(q0, q1, t), atol=1e-6)
+
+    # float32 and small angles (nlerp fallback)
+    q0 = q0.float()
+    q1 = quat_unit(q0 + 1e-4 * torch.randn_like(q0))
+    t = t.float()
+    expected = _scipy_slerp(q0.double(), q1.double(), t.double())
+    assert same_rotation(quat_slerp(q0, q1, t).double(), expected, atol=1e-6)
+
+
+def test_broadcasting():
+    torch.manual_seed(0)
+    q0, q1 = _random_quat(7, 1, 4), _random_quat(1, 5, 4)
+    t = torch.rand(3, 1, 1, 1, dtype=torch.float64)
+    for fn in (quat_slerp, quat_nlerp):
+        q = fn(q0, q1, t)
+        assert q.shape == (3, 7, 5, 4, 4)
+        expected = fn(q0.expand(7, 5, 4, 4), q1.expand(7, 5, 4, 4), t[1, ..., 0])
+        assert torch.allclose(q[1], expected)
+
+
+def test_nlerp():
+    torch.manual_seed(0)
+    q0, q1 = _random_quat(1000), _random_quat(1000)
+    t = torch.rand(1000, dtype=torch.float64)
+    q = quat_nlerp(q0, q1, t)
+    assert torch.allclose(quat_abs(q), torch.ones_like(t))
+    # nlerp follows the same great arc as slerp, only the speed differs
+    _, axis = quat_angle_axis(quat_mul(quat_conjugate(q0), q))
+    _, expected_axis = quat_angle_axis(
+        quat_mul(quat_conjugate(q0), quat_slerp(q0, q1, t))
+    )
+    assert torch.allclose(axis.abs(), expected_axis.abs(), atol=1e-6)
+
+
+def test_log_exp():
+    torch.manual_seed(0)
+    q = quat_pos(_random_quat(1000))
+    rotvec = Rotation.from_quat(q.numpy()).as_rotvec()
+    assert np.allclose(2 * quat_log(q).numpy(), rotvec)
+    assert torch.allclose(quat_exp(quat_log(q)), q)
+    identity = quat_identity([1]).double()
+    assert torch.allclose(quat_exp(quat_log(identity)), identity)
+
+
+def test_squad():
+    torch.manual_seed(0)
+    # keys at a constant angular velocity: squad reduces to slerp and matches the exact rotation
+    axis = torch.nn.functional.normalize(torch.randn(3, dtype=torch.float64), dim=0)
+    angles = torch.arange(4, dtype=torch.float64) * 0.4
+    keys = torch.from_numpy(
+        Rotation.from_rotvec(angles.unsqueeze(-1).numpy() * axis.numpy()).as_quat()
+    )
+    a1 = quat_squad_tangent(keys[0], keys[1], keys[2])
+    a2 = quat_squad_tangent(keys[1], keys[2], keys[3])
+    assert same_rotation(a1, keys[1], atol=1e-6)
+    assert same_rotation(a2, keys[2], atol=1e-6)
+    t = torch.linspace(0, 1, 11, dtype=torch.float64)
+    q = quat_squad(keys[1], a1, a2, keys[2], t)
+    expected = Rotation.from_rotvec(
+        (0.4 + 0.4 * t).unsqueeze(-1).numpy() * axis.numpy()
+    ).as_quat()
+    assert same_rotation(q, torch.from_numpy(expected), atol=1e-10)
+
+    # random keys: the spline interpolates its end points
+    q_prev, q0, q1, q_next = _random_quat(4, 100)
+    a0 = quat_squad_tangent(q_prev, q0, q1)
+    a1 = quat_squad_tangent(q0, q1, q_next)
+    zeros = torch.zeros(100, dtype=torch.float64)
+    assert same_rotation(quat_squad(q0, a0, a1, q1, zeros), q0, atol=1e-6)
+    assert same_rotation(quat_squad(q0, a0, a1, q1, zeros + 1), q1, atol=1e-6)
+
+
+def test_log_near_double_cover():
+    # -q and q are the same rotation, close to the identity on both sides
+    torch.manual_seed(0)
+    v = 1e-7 * torch.randn(100, 3, dtype=torch.float64)
+    q = quat_exp(v)
+    assert torch.allclose(quat_log(q), v, rtol=1e-6, atol=0)
+    assert torch.allclose(quat_log(-q), v, rtol=1e-6, atol=0)
+    q = _random_quat(1000)
+    assert torch.allclose(quat_log(-q), quat_log(q))
+
+
+def test_squad_inner_term_does_not_flip():
+    # the spline moves continuously with its control points, also where a0 . a1 changes sign
+    torch.manual_seed(0)
+    q0, q1, a0, direction = _random_quat(4, 100)
+    direction = quat_unit(direction - (direction * a0).sum(-1, keepdim=True) * a0)
+    t = torch.full((100,), 0.5, dtype=torch.float64)
+    below = quat_squad(q0, a0, quat_unit(direction - 1e-6 * a0), q1, t)
+    above = quat_squad(q0, a0, quat_unit(direction + 1e-6 * a0), q1, t)
+    assert same_rotation(below, above, atol=1e-10)
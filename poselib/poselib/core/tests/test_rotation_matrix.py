@@ -0,0 +1,72 @@
+from ..rotation3d import *
+from .common import same_rotation
+
+import numpy as np
+import torch
+from scipy.spatial.transform import Rotation
+
+
+def _masked_quat_from_rotation_matrix(m):
+    # reference implementation: boolean-mask sign fixes for each of the four cases
+    m = m.unsqueeze(0)
+    diag0, diag1, diag2 = m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]
+    w = (((diag0 + diag1 + diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
+    x = (((diag0 - diag1 - diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
+    y = (((-diag0 + diag1 - diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
+    z = (((-diag0 - diag1 + diag2 + 1.0) / 4.0).clamp(0.0, None)) ** 0.5
+    c0 = (w >= x) & (w >= y) & (w >= z)
+    x[c0] *= (m[..., 2, 1][c0] - m[..., 1, 2][c0]).sign()
+    y[c0] *= (m[..., 0, 2][c0] - m[..., 2, 0][c0]).sign()
+    z[c0] *= (m[..., 1, 0][c0] - m[..., 0, 1][c0]).sign()
+    c1 = (x >= w) & (x >= y) & (x >= z)
+    w[c1] *= (m[..., 2, 1][c1] - m[..., 1, 2][c1]).sign()
+    y[c1] *= (m[..., 1, 0][c1] + m[..., 0, 1][c1]).sign()
+    z[c1] *= (m[..., 0, 2][c1] + m[..., 2, 0][c1]).sign()
+    c2 = (y >= w) & (y >= x) & (y >= z)
+    w[c2] *= (m[..., 0, 2][c2] - m[..., 2, 0][c2]).sign()
+    x[c2] *= (m[..., 1, 0][c2] + m[..., 0, 1][c2]).sign()
+    z[c2] *= (m[..., 2, 1][c2] + m[..., 1, 2][c2]).sign()
+    c3 = (z >= w) & (z >= x) & (z >= y)
+    w[c3] *= (m[..., 1, 0][c3] - m[..., 0, 1][c3]).sign()
+    x[c3] *= (m[..., 2, 0][c3] + m[..., 0, 2][c3]).sign()
+    y[c3] *= (m[..., 2, 1][c3] + m[..., 1, 2][c3]).sign()
+    return quat_normalize(torch.stack([x, y, z, w], dim=-1)).squeeze(0)
+
+
+def test_quat_from_rotation_matrix():
+    rotations = Rotation.random(10000, random_state=0)
+    q = torch.from_numpy(rotations.as_quat())
+    m = torch.from_numpy(rotations.as_matrix())
+    actual = quat_from_rotation_matrix(m)
+    assert same_rotation(actual, q, atol=1e-12)
+    assert torch.allclose(actual, _masked_quat_from_rotation_matrix(m))
+    assert bool((actual[..., 3] >= 0).all())
+    assert quat_from_rotation_matrix(m.view(100, 100, 3, 3)).shape == (100, 100, 4)
+    assert quat_from_rotation_matrix(m[0]).shape == (4,)
+
+    # half turns have a zero real part, the largest imaginary component is picked instead
+    half_turns = torch.from_numpy(
+        Rotation.from_rotvec(np.pi * np.eye(3)).as_matrix()
+    ).float()
+    assert same_rotation(
+        quat_from_rotation_matrix(half_turns), torch.eye(4)[:3], atol=1e-6
+    )
+
+    # degenerate matrices stay finite
+    degenerate = torch.stack([torch.zeros(3, 3), torch.ones(3, 3), -torch.eye(3)])
+    assert bool(torch.isfinite(quat_from_rotation_matrix(degenerate)).all())
+
+
+def test_rotation_matrix_round_trip():
+    rotations = Rotation.random(1000, random_state=1)
+    q = torch.from_numpy(rotations.as_quat())
+    m = rot_matrix_from_quaternion(q)
+    assert np.allclose(m.numpy(), rotations.as_matrix())
+    assert same_rotation(quat_from_rotation_matrix(m), q, atol=1e-12)
+
+    transformation_matrix = torch.eye(4, dtype=torch.float64).repeat(1000, 1, 1)
+    transformation_matrix[:, :3, :3] = m
+    transformation_matrix[:, :3, 3] = torch.randn(1000, 3, dtype=torch.float64)
+    transform = euclidean_to_transform(transformation_matrix)
+    assert same_rotation(transform[..., :4], q, atol=1e-12)
+    assert torch.equal(transform[..., 4:], transformation_matrix[:, :3, 3])
@@ -0,0 +1,21 @@
+from ..tensor_utils import TensorUtils, tensor_to_dict
+
+import torch
+
+
+def test_from_dict():
+    x = torch.rand(5, 3, dtype=torch.float64)
+    d = tensor_to_dict(x)
+    # the dtype already matches: no copy
+    assert TensorUtils.from_dict(d).data_ptr() == d["arr"].ctypes.data
+    # unknown kwargs (e.g. backend="pytorch") are ignored
+    assert torch.equal(TensorUtils.from_dict(d, backend="pytorch"), x)
+
+    downcast = TensorUtils.from_dict(d, downcast=True)
+    assert downcast.dtype == torch.float32 and torch.allclose(downcast, x.float())
+    indices = TensorUtils.from_dict(tensor_to_dict(torch.arange(4)), downcast=True)
+    assert indices.dtype == torch.int64
+
+    shared = TensorUtils.from_dict(d, share_memory=True)
+    assert shared.is_shared() and torch.equal(shared, x)
+    assert shared.data_ptr() != d["arr"].ctypes.data
@@ -0,0 +1,54 @@
+from ..rotation3d import *
+
+import torch
+
+
+def _quat_rotate_sandwich(rot, vec):
+    # reference implementation: q * (v, 0) * q^-1
+    other_q = torch.cat([vec, torch.zeros_like(vec[..., :1])], dim=-1)
+    return quat_imaginary(quat_mul(quat_mul(rot, other_q), quat_conjugate(rot)))
+
+
+def _random_transform(*shape):
+    r = quat_normalize(torch.randn(*shape, 4, dtype=torch.float64))
+    t = torch.randn(*shape, 3, dtype=torch.float64)
+    return transform_from_rotation_translation(r=r, t=t)
+
+
+def test_quat_rotate():
+    torch.manual_seed(0)
+    rot = quat_normalize(torch.randn(20, 1, 4, dtype=torch.float64))
+    vec = torch.randn(8, 3, dtype=torch.float64)
+    expected = _quat_rotate_sandwich(rot, vec)
+    assert torch.allclose(quat_rotate(rot, vec), expected)
+    out = torch.empty(20, 8, 3, dtype=torch.float64)
+    assert quat_rotate(rot, vec, out=out) is out
+    assert torch.allclose(out, expected)
+    # mixed precision promotes like quat_mul()
+    assert quat_rotate(rot.float(), vec).dtype == torch.float64
+
+
+def test_transform_mul_inverse_apply():
+    torch.manual_seed(0)
+    x, y = _random_transform(10, 5), _random_transform(5)
+    z = transform_mul(x, y)
+    expected_t = _quat_rotate_sandwich(x[..., :4], y[..., 4:]) + x[..., 4:]
+    assert torch.allclose(z[..., :4], quat_mul_norm(x[..., :4], y[..., :4]))
+    assert torch.allclose(z[..., 4:], expected_t)
+    out = torch.empty(10, 5, 7, dtype=torch.float64)
+    assert transform_mul(x, y, out=out) is out
+    assert torch.equal(out, z)
+
+    identity = transform_mul(x, transform_inverse(x))
+    assert torch.allclose(identity[..., 3].abs(), torch.ones(10, 5, dtype=x.dtype))
+    assert torch.allclose(identity[..., 4:], torch.zeros(10, 5, 3, dtype=x.dtype))
+    out = torch.empty_like(x)
+    assert transform_inverse(x, out=out) is out
+    assert torch.equal(out, transform_inverse(x))
+
+    vec = torch.randn(10, 5, 3, dtype=torch.float64)
+    expected = _quat_rotate_sandwich(x[..., :4], vec) + x[..., 4:]
+    assert torch.allclose(transform_apply(x, vec), expected)
+    out = torch.empty_like(vec)
+    assert transform_apply(x, vec, out=out) is out
+    assert torch.allclose(out, expected)
@@ -0,0 +1,139 @@
+"""
+Reads BVH (Biovision hierarchy) files with plain python and numpy: the hierarchy is parsed line
+by line, the motion block (usually almost all of the file) is parsed by a single numpy call
+"""
+
+import numpy as np
+
+_ROTATION_CHANNELS = {"Xrotation": "X", "Yrotation": "Y", "Zrotation": "Z"}
+_POSITION_CHANNELS = {"Xposition": 0, "Yposition": 1, "Zposition": 2}
+
+
+def _parse_hierarchy(lines):
+    """
+    Parses the HIERARCHY section, the End Sites are skipped
+
+    :param lines: list of str, the lines of the section
+    :return: tuple with joint_names, parents, offsets and channels (the channel names of
+    every joint)
+    """
+    joint_names = []
+    parents = []
+    offsets = []
+    channels = []
+    # index of the joint of every open brace, None for an End Site
+    stack = []
+    pending = None
+    for line in lines:
+        words = line.split()
+        if len(words) == 0 or words[0] == "HIERARCHY":
+            continue
+        keyword = words[0]
+        if keyword in ("ROOT", "JOINT"):
+            pending = len(joint_names)
+            joint_names.append(" ".join(words[1:]))
+            parents.append(next((j for j in reversed(stack) if j is not None), -1))
+            offsets.append([0.0, 0.0, 0.0])
+            channels.append([])
+        elif keyword == "End":
+            pending = None
+        elif keyword == "{":
+            stack.append(pending)
+        elif keyword == "}":
+            if len(stack) == 0:
+                raise ValueError("unbalanced braces in the BVH hierarchy")
+            stack.pop()
+        elif keyword == "OFFSET":
+            if len(stack) > 0 and stack[-1] is not None:
+                offsets[stack[-1]] = [float(word) for word in words[1:4]]
+        elif keyword == "CHANNELS":
+            if len(stack) == 0 or stack[-1] is None:
+                raise ValueError("CHANNELS outside of a joint in the BVH hierarchy")
+            channels[stack[-1]] = words[2 : 2 + int(words[1])]
+        else:
+            raise ValueError("unexpected line in the BVH hierarchy: {}".format(line))
+    if len(stack) != 0:
+        raise ValueError("unbalanced braces in the BVH hierarchy")
+    if len(joint_names) == 0:
+        raise ValueError("no joint found in the BVH hierarchy")
+    return joint_names, parents, np.array(offsets), channels
+
+
+def bvh_to_array(bvh_file_path):
+    """
+    Reads a bvh file to arrays.
+
+    :param bvh_file_path: str, file path to bvh
+    :return: tuple with joint_names, parents, offsets (J, 3), channels (the channel names of
+    every joint, in the order of the columns of the motion), motion (frames, channels) and frame
+    time
+    """
+    with open(bvh_file_path, "rb") as f:
+        lines = []
+        for line in f:
+            if line.strip() == b"MOTION":
+                break
+            lines.append(line.decode("utf-8"))
+        else:
+            raise ValueError("no MOTION section in {}".format(bvh_file_path))
+        joint_names, parents, offsets, channels = _parse_hierarchy(lines)
+
+        num_frames = int(f.readline().decode().split(":")[1])
+        frame_time = float(f.readline().decode().split(":")[1])
+        motion = np.fromstring(f.read(), dtype=np.float64, sep=" ")
+
+    num_channels = sum(len(joint_channels) for joint_channels in channels)
+    if motion.size != num_frames * num_channels:
+        raise ValueError(
+            "expected {} frames of {} channels in {}, got {} values".format(
+                num_frames, num_channels, bvh_file_path, motion.size
+            )
+        )
+    return (
+        joint_names,
+        parents,
+        offsets,
+        channels,
+        motion.reshape(num_frames, num_channels),
+        frame_time,
+    )
+
+
+def channel_indices(channels):
+    """
+    Finds the columns of the rotation and root position channels of the motion
+
+    :param channels: the channel names of every joint, as returned by bvh_to_array()
+    :return: tuple with rotation_columns, a dict from each euler order (intrinsic, such as "ZXY")
+    to the list of (joint index, [3 columns]) using it, and position_columns, the 3 columns of
+    the root position (None if the root has no position channels)
+    """
+    rotation_columns = {}
+    position_columns = None
+    column = 0
+    for joint_index, joint_channels in enumerate(channels):
+        rotation = [
+            (_ROTATION_CHANNELS[name], column + i)
+            for i, name in enumerate(joint_channels)
+            if name in _ROTATION_CHANNELS
+        ]
+        if len(rotation) == 3:
+            order = "".join(axis for axis, _ in rotation)
+            rotation_columns.setdefault(order, []).append(
+                (joint_index, [c for _, c in rotation])
+            )
+        elif len(rotation) != 0:
+            raise ValueError(
+                "expected 0 or 3 rotation channels, got {}".format(joint_channels)
+            )
+        if joint_index == 0:
+            position = [0, 0, 0]
+            found = 0
+            for i, name in enumerate(joint_channels):
+                if name in _POSITION_CHANNELS:
+                    position[_POSITION_CHANNELS[name]] = column + i
+                    found += 1
+            if found == 3:
+                position_columns = position
+        column += len(joint_channels)
+    return rotation_columns, position_columns
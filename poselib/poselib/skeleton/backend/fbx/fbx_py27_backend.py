@@ -11,10 +11,15 @@ without an express license agreement from NVIDIA CORPORATION is strictly prohibi
 This script reads an fbx file and saves the joint names, parents, and transforms to a 
 numpy array.
 
+With --serve, it instead stays alive and converts the files requested on its stdin, streaming
+the arrays back on its stdout (see serve()).
+
 NOTE: It must be run from python 2.7 with the fbx SDK installed. To use this script, 
 please use the read_fbx file
 """
 
+import json
+import os
 import sys
 
 import numpy as np
@@ -43,6 +48,24 @@ def fbx_to_npy(file_name_in, file_name_out, root_joint_name, fps):
     """
     This function reads in an fbx file, and saves the relevant info to a numpy array
 
+    :param file_name_in: str, file path in. Should be .fbx file
+    :param file_name_out: str, file path out. Should be .npz file
+    :return: nothing, it just writes a file.
+    """
+    joint_names, parents, local_transforms, fbx_fps = fbx_to_arrays(
+        file_name_in, root_joint_name, fps
+    )
+
+    # Write to numpy array
+    np.savez_compressed(
+        file_name_out, names=joint_names, parents=parents, transforms=local_transforms, fps=fbx_fps
+    )
+
+
+def fbx_to_arrays(file_name_in, root_joint_name, fps, fbx_sdk_manager=None):
+    """
+    This function reads in an fbx file, and returns the relevant info as numpy arrays
+
     Fbx files have a series of animation curves, each of which has animations at different 
     times. This script assumes that for mocap data, there is only one animation curve that
     contains all the joints. Otherwise it is unclear how to read in the data.
@@ -50,12 +73,30 @@ def fbx_to_npy(file_name_in, file_name_out, root_joint_name, fps):
     If this condition isn't met, then the method throws an error
 
     :param file_name_in: str, file path in. Should be .fbx file
-    :param file_name_out: str, file path out. Should be .npz file
-    :return: nothing, it just writes a file.
+    :param fbx_sdk_manager: an existing sdk manager to load the file with, a new one is
+    initialized if not given
+    :return: joint names, parents, local transforms and fps
     """
 
     # Create the fbx scene object and load the .fbx file
-    fbx_sdk_manager, fbx_scene = FbxCommon.InitializeSdkObjects()
+    if fbx_sdk_manager is None:
+        fbx_sdk_manager, fbx_scene = FbxCommon.InitializeSdkObjects()
+        try:
+            return _scene_to_arrays(
+                fbx_sdk_manager, fbx_scene, file_name_in, root_joint_name, fps
+            )
+        finally:
+            fbx_sdk_manager.Destroy()
+    fbx_scene = fbx.FbxScene.Create(fbx_sdk_manager, "")
+    try:
+        return _scene_to_arrays(
+            fbx_sdk_manager, fbx_scene, file_name_in, root_joint_name, fps
+        )
+    finally:
+        fbx_scene.Destroy()
+
+
+def _scene_to_arrays(fbx_sdk_manager, fbx_scene, file_name_in, root_joint_name, fps):
     FbxCommon.LoadScene(fbx_sdk_manager, fbx_scene, file_name_in)
 
     """
@@ -105,77 +146,158 @@ def fbx_to_npy(file_name_in, file_name_out, root_joint_name, fps):
     joint_list, joint_names, parents = _get_skeleton(root_joint)
 
     """
-    Read in the transformation matrices of the animation, taking the scaling into account
+    Read in the transformation matrices of the animation
     """
 
     anim_range, frame_count, frame_rate = _get_frame_count(fbx_scene)
 
-    local_transforms = []
-    #for frame in range(frame_count):
     time_sec = anim_range.GetStart().GetSecondDouble()
     time_range_sec = anim_range.GetStop().GetSecondDouble() - time_sec
     fbx_fps = frame_count / time_range_sec
     if fps != 120:
         fbx_fps = fps
     print("FPS: ", fbx_fps)
+    frame_times = []
     while time_sec < anim_range.GetStop().GetSecondDouble():
+        # Fbx has a unique time object which you need
         fbx_time = fbx.FbxTime()
         fbx_time.SetSecondDouble(time_sec)
-        fbx_time = fbx_time.GetFramedTime()
-        transforms_current_frame = []
+        frame_times.append(fbx_time.GetFramedTime())
+        time_sec += (1.0/fbx_fps)
+    frame_ticks = np.array([fbx_time.Get() for fbx_time in frame_times], dtype=np.int64)
+
+    # Sample every translation and rotation curve on all the frames, then build the transforms of
+    # all the joints and frames at once
+    translations = np.empty((len(frame_times), len(joint_list), 3))
+    rotations = np.empty((len(frame_times), len(joint_list), 3))
+    for joint_index, joint in enumerate(joint_list):
+        for lcl_property, samples in (
+            (joint.LclTranslation, translations), (joint.LclRotation, rotations)
+        ):
+            default = lcl_property.Get()
+            for axis, channel in enumerate(["X", "Y", "Z"]):
+                samples[:, joint_index, axis] = _sample_curve(
+                    lcl_property.GetCurve(anim_layer, channel),
+                    default[axis],
+                    frame_times,
+                    frame_ticks,
+                )
+    local_transforms = _euler_xyz_to_transforms(rotations, translations)
+    print("Frame Count: ", len(local_transforms))
+    return joint_names, parents, local_transforms, fbx_fps
 
-        # Fbx has a unique time object which you need
-        #fbx_time = root_curve.KeyGetTime(frame)
-        for joint in joint_list:
-            arr = np.array(_recursive_to_list(joint.EvaluateLocalTransform(fbx_time)))
-            scales = np.array(_recursive_to_list(joint.EvaluateLocalScaling(fbx_time)))
-
-            lcl_trans = joint.LclTranslation.Get()
-            lcl_rot = joint.LclRotation.Get()
-            lcl_matrix = fbx.FbxAMatrix()
-            # lcl_matrix.SetR(fbx.FbxVector4(lcl_rot[0], lcl_rot[1], lcl_rot[2], 1.0))
-            # lcl_matrix.SetT(fbx.FbxVector4(lcl_trans[0], lcl_trans[1], lcl_trans[2], 1.0))
-            # lcl_matrix = np.array(_recursive_to_list(lcl_matrix))
-            curve = joint.LclTranslation.GetCurve(anim_layer, "X")
-            transX = curve.Evaluate(fbx_time)[0] if curve else lcl_trans[0]
-            curve = joint.LclTranslation.GetCurve(anim_layer, "Y")
-            transY = curve.Evaluate(fbx_time)[0] if curve else lcl_trans[1]
-            curve = joint.LclTranslation.GetCurve(anim_layer, "Z")
-            transZ = curve.Evaluate(fbx_time)[0] if curve else lcl_trans[2]
-
-            curve = joint.LclRotation.GetCurve(anim_layer, "X")
-            rotX = curve.Evaluate(fbx_time)[0] if curve else lcl_rot[0]
-            curve = joint.LclRotation.GetCurve(anim_layer, "Y")
-            rotY = curve.Evaluate(fbx_time)[0] if curve else lcl_rot[1]
-            curve = joint.LclRotation.GetCurve(anim_layer, "Z")
-            rotZ = curve.Evaluate(fbx_time)[0] if curve else lcl_rot[2]
-            
-            lcl_matrix.SetR(fbx.FbxVector4(rotX, rotY, rotZ, 1.0))
-            lcl_matrix.SetT(fbx.FbxVector4(transX, transY, transZ, 1.0))
-            lcl_matrix = np.array(_recursive_to_list(lcl_matrix))
-            # if not np.allclose(scales[0:3], scales[0]):
-            #     raise ValueError(
-            #         "Different X, Y and Z scaling. Unsure how this should be handled. "
-            #         "To solve this, look at this link and try to upgrade the script "
-            #         "http://help.autodesk.com/view/FBX/2017/ENU/?guid=__files_GUID_10CDD"
-            #         "63C_79C1_4F2D_BB28_AD2BE65A02ED_htm"
-            #     )
-            # Adjust the array for scaling
-            arr /= scales[0]
-            arr[3, 3] = 1.0
-            lcl_matrix[3, 3] = 1.0
-            transforms_current_frame.append(lcl_matrix)
-        local_transforms.append(transforms_current_frame)
 
-        time_sec += (1.0/fbx_fps)
+def serve():
+    """
+    Converts fbx files until stdin is closed, reusing the same sdk manager. Each request is a
+    line of json on stdin:
 
-    local_transforms = np.array(local_transforms)
-    print("Frame Count: ", len(local_transforms))
+        {"fbx_file_path": ..., "root_joint": ..., "fps": ...}
+
+    and each response a line of json on stdout, followed by the raw bytes of the transforms:
+
+        {"names": [...], "parents": [...], "fps": ..., "dtype": "<f8", "shape": [...]}
+
+    or {"error": ...} without any bytes if the conversion failed.
+    """
+    # the responses own the original stdout, anything else printed (by this script or by the
+    # sdk) goes to stderr
+    protocol_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    fbx_sdk_manager, fbx_scene = FbxCommon.InitializeSdkObjects()
+    fbx_scene.Destroy()
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        request = json.loads(line)
+        try:
+            joint_names, parents, local_transforms, fbx_fps = fbx_to_arrays(
+                request["fbx_file_path"],
+                request["root_joint"],
+                int(request["fps"]),
+                fbx_sdk_manager,
+            )
+            local_transforms = np.ascontiguousarray(local_transforms, dtype="<f8")
+            response = {
+                "names": [str(name) for name in joint_names],
+                "parents": [int(parent) for parent in parents],
+                "fps": float(fbx_fps),
+                "dtype": "<f8",
+                "shape": list(local_transforms.shape),
+            }
+            payload = local_transforms.tobytes()
+        except Exception as e:
+            response = {"error": "{}: {}".format(type(e).__name__, e)}
+            payload = b""
+        protocol_out.write((json.dumps(response) + "\n").encode("utf-8"))
+        protocol_out.write(payload)
+        protocol_out.flush()
+    fbx_sdk_manager.Destroy()
+
+
+def _sample_curve(curve, default, frame_times, frame_ticks):
+    """
+    Samples an animation curve on the frame times, reading its keys only once
+
+    The samples falling on a key take the value of the key, which is what curve.Evaluate returns
+    there. Only the other ones (between keys, or outside of them) are evaluated by the SDK, for
+    mocap sampled at its own frame rate there are none.
+
+    :param curve: the animation curve, possibly None
+    :param default: the value of the property when there is no curve
+    :param frame_times: list of FbxTime, the times of the frames
+    :param frame_ticks: np.array of int64, the same times in FbxTime ticks
+    :return: np.array of the samples
+    """
+    if not curve:
+        return np.full(len(frame_ticks), default)
+    key_count = curve.KeyGetCount()
+    samples = np.empty(len(frame_ticks))
+    on_key = np.zeros(len(frame_ticks), dtype=bool)
+    if key_count > 0:
+        key_ticks = np.array(
+            [curve.KeyGetTime(i).Get() for i in range(key_count)], dtype=np.int64
+        )
+        key_values = np.array([curve.KeyGetValue(i) for i in range(key_count)])
+        keys = np.minimum(np.searchsorted(key_ticks, frame_ticks), key_count - 1)
+        on_key = key_ticks[keys] == frame_ticks
+        samples[on_key] = key_values[keys[on_key]]
+    for frame in np.flatnonzero(~on_key):
+        samples[frame] = curve.Evaluate(frame_times[frame])[0]
+    return samples
+
+
+def _euler_xyz_to_transforms(rotations, translations):
+    """
+    Vectorized FbxAMatrix.SetR / SetT on an identity matrix: the rotation is made of the euler
+    angles applied in the X, Y, Z order and, as in FbxAMatrix, the rows of the result are the
+    transformed axes followed by the translation
+
+    :param rotations: np.array of shape (..., 3), euler angles in degrees
+    :param translations: np.array of shape (..., 3)
+    :return: np.array of shape (..., 4, 4)
+    """
+    x, y, z = np.moveaxis(np.radians(rotations), -1, 0)
+    cos_x, sin_x = np.cos(x), np.sin(x)
+    cos_y, sin_y = np.cos(y), np.sin(y)
+    cos_z, sin_z = np.cos(z), np.sin(z)
+    transforms = np.zeros(rotations.shape[:-1] + (4, 4))
+    transforms[..., 0, 0] = cos_y * cos_z
+    transforms[..., 0, 1] = cos_y * sin_z
+    transforms[..., 0, 2] = -sin_y
+    transforms[..., 1, 0] = sin_x * sin_y * cos_z - cos_x * sin_z
+    transforms[..., 1, 1] = sin_x * sin_y * sin_z + cos_x * cos_z
+    transforms[..., 1, 2] = sin_x * cos_y
+    transforms[..., 2, 0] = cos_x * sin_y * cos_z + sin_x * sin_z
+    transforms[..., 2, 1] = cos_x * sin_y * sin_z - sin_x * cos_z
+    transforms[..., 2, 2] = cos_x * cos_y
+    transforms[..., 3, :3] = translations
+    transforms[..., 3, 3] = 1.0
+    return transforms
 
-    # Write to numpy array
-    np.savez_compressed(
-        file_name_out, names=joint_names, parents=parents, transforms=local_transforms, fps=fbx_fps
-    )
 
 def _get_frame_count(fbx_scene):
     # Get the animation stacks and layers, in order to pull off animation curves later
@@ -283,23 +405,12 @@ def _get_skeleton(root_joint):
     return joint_list, joint_names, parents
 
 
-def _recursive_to_list(array):
-    """
-    Takes some iterable that might contain iterables and converts it to a list of lists 
-    [of lists... etc]
-
-    Mainly used for converting the strange fbx wrappers for c++ arrays into python lists
-    :param array: array to be converted
-    :return: array converted to lists
-    """
-    try:
-        return float(array)
-    except TypeError:
-        return [_recursive_to_list(a) for a in array]
-
-
 if __name__ == "__main__":
 
+    if sys.argv[1:] == ["--serve"]:
+        serve()
+        sys.exit(0)
+
     # Read in the input and output files, then read the fbx
     file_name_in, file_name_out = sys.argv[1:3]
     root_joint_name = sys.argv[3]
@@ -1,9 +1,9 @@
 """
 Copyright (c) 2021, NVIDIA CORPORATION. All rights reserved.
 
-NVIDIA CORPORATION and its licensors retain all intellectual property and proprietary 
-rights in and to this software, related documentation and any modifications thereto. Any 
-use, reproduction, disclosure or distribution of this software and related documentation 
+NVIDIA CORPORATION and its licensors retain all intellectual property and proprietary
+rights in and to this software, related documentation and any modifications thereto. Any
+use, reproduction, disclosure or distribution of this software and related documentation
 without an express license agreement from NVIDIA CORPORATION is strictly prohibited.
 """
 
@@ -12,12 +12,21 @@ Script that reads in fbx files from python 2
 
 This requires a configs file, which contains the command necessary to switch conda
 environments to run the fbx reading script from python 2
+
+The python 2 script runs as a pool of long-lived worker processes (see FbxWorkerPool) that
+receive the conversion requests on their stdin and stream the arrays back on their stdout, so
+that many files can be read in parallel without temporary files or changes of directory.
 """
 
 from ....core import logger
 
+import atexit
 import inspect
+import json
 import os
+import shlex
+import subprocess
+import threading
 
 import numpy as np
 
@@ -25,15 +34,191 @@ import numpy as np
 current_folder = os.path.realpath(
     os.path.abspath(os.path.split(inspect.getfile(inspect.currentframe()))[0])
 )
+backend_path = os.path.join(current_folder, "fbx_py27_backend.py")
+
+
+class FbxWorkerPool:
+    """
+    A pool of python 2.7 processes running `fbx_py27_backend.py --serve`. The workers are started
+    on demand, up to `num_workers`, and kept alive until the pool is closed. `convert()` is
+    thread-safe: each call takes an idle worker (or waits for one), so up to `num_workers` files
+    are read in parallel when called from as many threads.
+
+    Example:
+        >>> with FbxWorkerPool(fbx_configs["fbx_py27_path"], num_workers=4) as pool:
+        ...     with ThreadPoolExecutor(4) as executor:
+        ...         arrays = list(executor.map(lambda path: pool.convert(path, "Hips", 120), paths))
+
+    A worker that crashes or breaks the protocol is discarded, and a call waiting for a worker
+    starts a new one in its place.
+    """
+
+    def __init__(self, fbx_py27_path, num_workers=1):
+        """
+        :param fbx_py27_path: the command running python 2.7 with the fbx SDK installed
+        :type fbx_py27_path: str
+        :param num_workers: maximum number of worker processes
+        :type num_workers: int
+        """
+        assert num_workers > 0, "expected at least one worker"
+        self._command = shlex.split(fbx_py27_path) + [backend_path, "--serve"]
+        self._num_workers = num_workers
+        # the idle workers and all the started ones, guarded by the condition, which is notified
+        # whenever a worker becomes idle or is discarded
+        self._idle = []
+        self._workers = []
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def num_workers(self):
+        """maximum number of worker processes"""
+        return self._num_workers
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("the fbx worker pool is closed")
+                if len(self._idle) > 0:
+                    return self._idle.pop()
+                if len(self._workers) < self._num_workers:
+                    logger.debug("starting fbx worker: {}".format(self._command))
+                    worker = subprocess.Popen(
+                        self._command,
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        cwd=current_folder,
+                    )
+                    self._workers.append(worker)
+                    return worker
+                self._condition.wait()
+
+    def _release(self, worker):
+        with self._condition:
+            self._idle.append(worker)
+            self._condition.notify_all()
+
+    def _discard(self, worker):
+        with self._condition:
+            self._workers.remove(worker)
+            # a waiting call can start a worker in its place
+            self._condition.notify_all()
+        worker.kill()
+        worker.wait()
+
+    def convert(self, fbx_file_path, root_joint, fps):
+        """
+        Reads an fbx file with one of the workers
+
+        :param fbx_file_path: str, file path to fbx
+        :param root_joint: str, name of the root joint, the first joint found if empty
+        :param fps: int, the sampling rate of the animation
+        :return: tuple with joint_names, parents, transforms, fps
+        """
+        worker = self._acquire()
+        try:
+            request = {
+                "fbx_file_path": fbx_file_path,
+                "root_joint": root_joint,
+                "fps": fps,
+            }
+            worker.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+            if not line:
+                raise RuntimeError(
+                    "the fbx worker exited with code {}".format(worker.wait())
+                )
+            try:
+                response = json.loads(line)
+            except ValueError:
+                raise RuntimeError(
+                    "unexpected output of the fbx worker: {}".format(
+                        line.decode().strip()
+                    )
+                )
+            if "error" not in response:
+                transforms = np.empty(response["shape"], dtype=response["dtype"])
+                view = memoryview(transforms.reshape(-1).view(np.uint8))
+                received = 0
+                while received < len(view):
+                    count = worker.stdout.readinto(view[received:])
+                    if not count:
+                        raise RuntimeError("the fbx worker exited mid-response")
+                    received += count
+        except BaseException:
+            self._discard(worker)
+            raise
+        self._release(worker)
+        if "error" in response:
+            raise RuntimeError(
+                "failed to read {}: {}".format(fbx_file_path, response["error"])
+            )
+        return (
+            response["names"],
+            np.array(response["parents"]),
+            transforms,
+            response["fps"],
+        )
+
+    def close(self):
+        """Stops the workers, waiting for the current conversions to complete. The calls waiting
+        for a worker raise a RuntimeError"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            while len(self._idle) < len(self._workers):
+                self._condition.wait()
+            workers = list(self._workers)
+            self._idle = []
+            self._workers = []
+        for worker in workers:
+            # the workers exit at the end of their stdin
+            worker.stdin.close()
+        for worker in workers:
+            worker.wait()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(fbx_configs):
+    """
+    The worker pool shared by every read with the same configuration, created on first use and
+    closed at exit
+
+    :param fbx_configs: dict, {"fbx_py27_path": ..., "num_workers": ...}, `num_workers`
+    defaults to the number of cpus
+    :return: FbxWorkerPool
+    """
+    key = (fbx_configs["fbx_py27_path"], fbx_configs.get("num_workers"))
+    with _pools_lock:
+        if key not in _pools:
+            pool = FbxWorkerPool(
+                fbx_configs["fbx_py27_path"],
+                num_workers=fbx_configs.get("num_workers") or os.cpu_count() or 1,
+            )
+            atexit.register(pool.close)
+            _pools[key] = pool
+        return _pools[key]
 
 
 def fbx_to_array(fbx_file_path, fbx_configs, root_joint, fps):
     """
     Reads an fbx file to an array.
 
-    Currently reading of the frame time is not supported. 120 fps is hard coded TODO
-
     :param fbx_file_path: str, file path to fbx
+    :param fbx_configs: dict, {"fbx_py27_path": ..., "num_workers": ...}, see get_worker_pool()
+    :param root_joint: str, name of the root joint, the first joint found if empty
+    :param fps: int, the sampling rate of the animation
     :return: tuple with joint_names, parents, transforms, frame time
     """
 
@@ -41,35 +226,7 @@ def fbx_to_array(fbx_file_path, fbx_configs, root_joint, fps):
     fbx_file_path = os.path.abspath(fbx_file_path)
     assert os.path.exists(fbx_file_path)
 
-    # Switch directories to the env_utils folder to ensure the reading works
-    previous_cwd = os.getcwd()
-    os.chdir(current_folder)
-
-    # Call the python 2.7 script
-    temp_file_path = os.path.join(current_folder, fbx_configs["tmp_path"])
-    python_path = fbx_configs["fbx_py27_path"]
-    logger.info("executing python script to read fbx data using Autodesk FBX SDK...")
-    command = '{} fbx_py27_backend.py "{}" "{}" "{}" "{}"'.format(
-        python_path, fbx_file_path, temp_file_path, root_joint, fps
-    )
-    logger.debug("executing command: {}".format(command))
-    os.system(command)
-    logger.info(
-        "executing python script to read fbx data using Autodesk FBX SDK... done"
-    )
-
-    with open(temp_file_path, "rb") as f:
-        data = np.load(f)
-        output = (
-            data["names"],
-            data["parents"],
-            data["transforms"],
-            data["fps"],
-        )
-
-    # Remove the temporary file
-    os.remove(temp_file_path)
-
-    # Return the os to its previous cwd, otherwise reading multiple files might fail
-    os.chdir(previous_cwd)
+    logger.info("reading fbx data using Autodesk FBX SDK...")
+    output = get_worker_pool(fbx_configs).convert(fbx_file_path, root_joint, fps)
+    logger.info("reading fbx data using Autodesk FBX SDK... done")
     return output
@@ -0,0 +1,262 @@
+"""
+An on-disk cache of imported motions (from_fbx, from_bvh, convert.py, ...), keyed by the content
+of the source files and the parameters of the import. The motions are stored as .plib files and
+memory-mapped when loaded; the least recently used ones are evicted to keep the cache under a
+size bound.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import torch
+
+from .motion_dataset import skeleton_tree_hash
+from .skeleton3d import SkeletonMotion, SkeletonTree
+
+ENTRY_PATTERN = "{}.plib"
+ENTRY_GLOB = "*.plib"
+# digests of the source files already hashed, by path, with their size and modification time
+HASHES_FILE = "hashes.json"
+
+
+def _encode_param(value):
+    if isinstance(value, dict):
+        return {str(key): _encode_param(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_param(item) for item in value]
+    if isinstance(value, SkeletonTree):
+        return "SkeletonTree:{:016x}".format(skeleton_tree_hash(value))
+    if isinstance(value, torch.Tensor):
+        value = value.detach().cpu().numpy()
+    if isinstance(value, (np.ndarray, np.generic)):
+        value = np.ascontiguousarray(value)
+        return "ndarray:{}:{}:{}".format(
+            value.dtype.str,
+            value.shape,
+            hashlib.blake2b(value.tobytes(), digest_size=16).hexdigest(),
+        )
+    return repr(value)
+
+
+class ImportCache:
+    """
+    A directory of imported motions. An entry is found by `key()` from the source files (hashed
+    by content, so renaming or touching a file does not invalidate it, editing it does) and the
+    parameters of the import (root joint, fps, mapping plan...). Reading an entry marks it as
+    recently used, adding one evicts the least recently used entries until the cache fits in
+    `max_bytes`. Several processes can share a cache: entries are written to a temporary file
+    then renamed, and the recency is the modification time of the entry.
+
+    Example:
+        >>> cache = ImportCache("~/.cache/poselib/imports")
+        >>> motion = cache.get_or_import(
+        ...     fbx_path,
+        ...     lambda: SkeletonMotion.from_fbx(fbx_path, fbx_configs, root_joint="Hips"),
+        ...     source_format="fbx",
+        ...     root_joint="Hips",
+        ... )
+        >>> print(cache.report())
+        import cache: 0 hits, 1 misses (0.0% hit rate), 0 evictions, 12.3 MB / 16384.0 MB
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 34):
+        """
+        :param directory: the cache directory, created if it does not exist
+        :type directory: str
+        :param max_bytes: the maximum total size of the entries
+        :type max_bytes: int
+        """
+        self._directory = os.path.expanduser(directory)
+        self._max_bytes = max_bytes
+        os.makedirs(self._directory, exist_ok=True)
+        self._hashes_path = os.path.join(self._directory, HASHES_FILE)
+        try:
+            with open(self._hashes_path) as f:
+                self._hashes = json.load(f)
+        except (OSError, ValueError):
+            self._hashes = {}
+        self._hashes_dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return "ImportCache(directory={}, max_bytes={})".format(
+            self._directory, self._max_bytes
+        )
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _hash_file(self, path, digest):
+        stat = os.stat(path)
+        memo_key = os.path.abspath(path)
+        memo = self._hashes.get(memo_key)
+        if memo is None or memo[:2] != [stat.st_size, stat.st_mtime_ns]:
+            file_digest = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    file_digest.update(chunk)
+            # replaces the digest of an earlier version of the file
+            memo = [stat.st_size, stat.st_mtime_ns, file_digest.hexdigest()]
+            self._hashes[memo_key] = memo
+            self._hashes_dirty = True
+        digest.update(memo[2].encode("utf-8"))
+
+    def _save_hashes(self):
+        if not self._hashes_dirty:
+            return
+        temp_path = "{}.{}.tmp".format(self._hashes_path, os.getpid())
+        with open(temp_path, "w") as f:
+            json.dump(self._hashes, f)
+        os.replace(temp_path, self._hashes_path)
+        self._hashes_dirty = False
+
+    def key(self, sources: Union[str, List[str]], **params) -> str:
+        """The key of an import: a hash of the content of the source files (the files of a
+        source directory are all hashed, with their relative paths) and of the parameters
+
+        :param sources: the source files or directories
+        :type sources: str or List[str]
+        :param params: the parameters of the import, SkeletonTree, tensor and array values
+        (possibly nested in dicts, lists and tuples) are hashed by content, the other ones by
+        repr()
+        :rtype: str
+        """
+        if isinstance(sources, str):
+            sources = [sources]
+        digest = hashlib.blake2b(digest_size=16)
+        for source in sources:
+            if os.path.isdir(source):
+                for root, directories, files in os.walk(source):
+                    directories.sort()
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        digest.update(os.path.relpath(path, source).encode("utf-8"))
+                        self._hash_file(path, digest)
+            else:
+                self._hash_file(source, digest)
+        encoded = json.dumps(
+            {name: _encode_param(value) for name, value in params.items()},
+            sort_keys=True,
+        )
+        digest.update(encoded.encode("utf-8"))
+        self._save_hashes()
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._directory, ENTRY_PATTERN.format(key))
+
+    def get(self, key: str) -> Optional[SkeletonMotion]:
+        """The motion of an entry (memory-mapped), None if it is not in the cache
+
+        :param key: the key of the entry, see `key()`
+        :type key: str
+        :rtype: SkeletonMotion, optional
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+            motion = SkeletonMotion.from_file(path)
+        except FileNotFoundError:
+            # not in the cache, or evicted by another process since utime()
+            self.misses += 1
+            return None
+        self.hits += 1
+        return motion
+
+    def put(self, key: str, motion: SkeletonMotion) -> None:
+        """Add an entry, then evict the least recently used ones above the size bound
+
+        :param key: the key of the entry, see `key()`
+        :type key: str
+        :param motion: the imported motion
+        :type motion: SkeletonMotion
+        """
+        # hidden from ENTRY_GLOB until it is complete
+        temp_path = os.path.join(
+            self._directory, ".{}.{}.plib".format(key, os.getpid())
+        )
+        motion.to_file(temp_path)
+        os.replace(temp_path, self._path(key))
+        self._evict(keep=self._path(key))
+
+    def _entries(self):
+        entries = []
+        for path in glob.glob(os.path.join(self._directory, ENTRY_GLOB)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(entries)
+
+    def _evict(self, keep=None):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def get_or_import(
+        self,
+        sources: Union[str, List[str]],
+        importer: Callable[[], SkeletonMotion],
+        **params
+    ) -> SkeletonMotion:
+        """The cached motion of an import, running the import and caching its motion on a miss
+
+        :param sources: the source files or directories
+        :type sources: str or List[str]
+        :param importer: the import, called without arguments on a miss
+        :type importer: Callable[[], SkeletonMotion]
+        :param params: the parameters of the import, see `key()`
+        :rtype: SkeletonMotion
+        """
+        key = self.key(sources, **params)
+        motion = self.get(key)
+        if motion is None:
+            motion = importer()
+            self.put(key, motion)
+        return motion
+
+    def nbytes(self) -> int:
+        """the total size of the entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def report(self) -> str:
+        """A summary of the hits, misses and evictions of this instance and of the cache size"""
+        lookups = self.hits + self.misses
+        return (
+            "import cache: {} hits, {} misses ({:.1f}% hit rate), {} evictions, "
+            "{:.1f} MB / {:.1f} MB".format(
+                self.hits,
+                self.misses,
+                100.0 * self.hits / lookups if lookups > 0 else 0.0,
+                self.evictions,
+                self.nbytes() / 2**20,
+                self._max_bytes / 2**20,
+            )
+        )
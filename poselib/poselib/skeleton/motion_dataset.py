@@ -0,0 +1,312 @@
+"""
+A sharded container for many motion clips: a dataset is a directory of shard files, each of them
+holding many clips in the packed layout of :mod:`poselib.core.backend.packed`. Every shard has
+an index table giving, for each of its clips, the clip id, the byte offset of its state tensor in
+the shard, its number of frames, fps, is_local and the hash of its skeleton tree. The distinct
+skeleton trees are stored once per shard.
+"""
+
+from collections import OrderedDict
+import glob
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import torch
+
+from ..core.backend.packed import packed_layout, read_packed, write_packed
+from .skeleton3d import SkeletonMotion, SkeletonTree
+
+SHARD_PATTERN = "shard_{:05d}.plib"
+SHARD_GLOB = "shard_*.plib"
+INDEX_COLUMNS = OrderedDict(
+    [
+        ("clip_id", np.int64),
+        ("offset", np.int64),
+        ("length", np.int64),
+        ("fps", np.float64),
+        ("is_local", np.bool_),
+        ("skeleton_hash", np.uint64),
+    ]
+)
+
+
+def skeleton_tree_hash(skeleton_tree: SkeletonTree) -> int:
+    """A 64-bit hash of the node names, parent indices and local translations of a skeleton
+    tree, equal trees have equal hashes
+
+    :param skeleton_tree: the skeleton tree
+    :type skeleton_tree: SkeletonTree
+    :rtype: int
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(json.dumps(list(skeleton_tree.node_names)).encode("utf-8"))
+    digest.update(skeleton_tree.parent_indices.cpu().numpy().astype("<i8").tobytes())
+    digest.update(skeleton_tree.local_translation.cpu().numpy().astype("<f4").tobytes())
+    return int.from_bytes(digest.digest(), "little")
+
+
+def _shard_number(path):
+    return int(os.path.basename(path)[len("shard_") : -len(".plib")])
+
+
+class MotionDatasetWriter:
+    """
+    Appends clips to a sharded motion dataset. The clips are buffered until they reach
+    `max_shard_bytes`, then written to a new shard, numbered after the last shard of the
+    directory (an existing shard is never replaced). Clip ids are consecutive integers starting
+    after the largest clip id already in the directory. The writer must be closed (or used as a
+    context manager) for the last shard to be written.
+
+    Example:
+        >>> with MotionDatasetWriter("data/motions") as writer:
+        ...     for path in paths:
+        ...         clip_id = writer.append(SkeletonMotion.from_file(path))
+    """
+
+    def __init__(self, directory: str, max_shard_bytes: int = 1 << 28):
+        """
+        :param directory: the dataset directory, created if it does not exist
+        :type directory: str
+        :param max_shard_bytes: size of the clip data from which a shard is written
+        :type max_shard_bytes: int
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._max_shard_bytes = max_shard_bytes
+        existing = MotionDataset._shard_paths(directory)
+        self._next_shard = (
+            max((_shard_number(path) for path in existing), default=-1) + 1
+        )
+        self._num_clips = 0
+        for path in existing:
+            _, arrays = read_packed(np.memmap(path, dtype=np.uint8, mode="r"))
+            if len(arrays["index_clip_id"]) > 0:
+                self._num_clips = max(
+                    self._num_clips, int(arrays["index_clip_id"].max()) + 1
+                )
+        self._pending = []
+        self._pending_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        """number of clips in the dataset, including the ones not written yet (the next clip id)"""
+        return self._num_clips
+
+    def append(self, motion: SkeletonMotion) -> int:
+        """Add a clip to the dataset
+
+        :param motion: the clip, it must have a single (time) dimension
+        :type motion: SkeletonMotion
+        :rtype: int
+        :return: the clip id
+        """
+        assert len(motion.shape) == 1, "expected a motion with a single dimension"
+        tensor = motion.tensor.detach().cpu().contiguous().numpy()
+        self._pending.append((self._num_clips, motion, tensor))
+        self._num_clips += 1
+        self._pending_bytes += tensor.nbytes
+        if self._pending_bytes >= self._max_shard_bytes:
+            self.flush()
+        return self._num_clips - 1
+
+    def flush(self):
+        """Write the buffered clips to a new shard"""
+        if len(self._pending) == 0:
+            return
+        header = OrderedDict(
+            [
+                ("__name__", "MotionDatasetShard"),
+                ("num_clips", len(self._pending)),
+                ("node_names", OrderedDict()),
+            ]
+        )
+        arrays = OrderedDict()
+        index = OrderedDict((name, []) for name in INDEX_COLUMNS)
+        for clip_id, motion, tensor in self._pending:
+            skeleton_hash = skeleton_tree_hash(motion.skeleton_tree)
+            key = "{:016x}".format(skeleton_hash)
+            if key not in header["node_names"]:
+                header["node_names"][key] = list(motion.skeleton_tree.node_names)
+                arrays["skeleton_{}_parent_indices".format(key)] = (
+                    motion.skeleton_tree.parent_indices.cpu().numpy()
+                )
+                arrays["skeleton_{}_local_translation".format(key)] = (
+                    motion.skeleton_tree.local_translation.cpu().numpy()
+                )
+            arrays["clip_{}".format(clip_id)] = tensor
+            index["clip_id"].append(clip_id)
+            index["length"].append(len(tensor))
+            index["fps"].append(np.asarray(motion.fps, dtype=np.float64).item())
+            index["is_local"].append(motion.is_local)
+            index["skeleton_hash"].append(skeleton_hash)
+        # the offsets are known once the layout is, they do not change the layout
+        index["offset"] = [0] * len(self._pending)
+        for name, dtype in INDEX_COLUMNS.items():
+            arrays["index_" + name] = np.array(index[name], dtype=dtype)
+        encoded, data_start, size = packed_layout(header, arrays)
+        array_table = json.loads(encoded)["__arrays__"]
+        arrays["index_offset"][:] = [
+            data_start + array_table["clip_{}".format(clip_id)]["offset"]
+            for clip_id in index["clip_id"]
+        ]
+
+        temp_path = os.path.join(self._directory, ".shard.{}.tmp".format(os.getpid()))
+        buffer = np.memmap(temp_path, dtype=np.uint8, mode="w+", shape=(size,))
+        write_packed(buffer, header, arrays)
+        buffer.flush()
+        del buffer
+        # readers never see a partially written shard, and linking fails instead of replacing
+        # a shard with the same name (written by another writer)
+        while True:
+            path = os.path.join(self._directory, SHARD_PATTERN.format(self._next_shard))
+            self._next_shard += 1
+            try:
+                os.link(temp_path, path)
+                break
+            except FileExistsError:
+                pass
+        os.remove(temp_path)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def close(self):
+        """Write the buffered clips"""
+        self.flush()
+
+
+class MotionDataset:
+    """
+    Random access to the clips of a sharded motion dataset written by `MotionDatasetWriter`. The
+    shards are memory-mapped (copy-on-write) and the index tables of all the shards are
+    concatenated when opening the dataset, after that any clip or range of frames is a
+    zero-copy view found in constant time.
+
+    Example:
+        >>> dataset = MotionDataset("data/motions")
+        >>> motion = dataset[42]
+        >>> window = dataset.clip(42, start=10, end=70)
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: the dataset directory
+        :type directory: str
+        """
+        self._directory = directory
+        self._buffers = []
+        self._skeleton_trees = {}
+        self._clip_dtypes = []
+        columns = OrderedDict((name, []) for name in INDEX_COLUMNS)
+        shard_indices = []
+        for shard_index, path in enumerate(self._shard_paths(directory)):
+            buffer = np.memmap(path, dtype=np.uint8, mode="c")
+            header, arrays = read_packed(buffer)
+            self._buffers.append(buffer)
+            for key, node_names in header["node_names"].items():
+                if int(key, 16) not in self._skeleton_trees:
+                    self._skeleton_trees[int(key, 16)] = SkeletonTree(
+                        node_names,
+                        torch.from_numpy(
+                            arrays["skeleton_{}_parent_indices".format(key)]
+                        ),
+                        torch.from_numpy(
+                            arrays["skeleton_{}_local_translation".format(key)]
+                        ),
+                    )
+            for name in INDEX_COLUMNS:
+                columns[name].append(arrays["index_" + name])
+            shard_indices.append(np.full(header["num_clips"], shard_index))
+            self._clip_dtypes.extend(
+                arrays["clip_{}".format(clip_id)].dtype
+                for clip_id in arrays["index_clip_id"]
+            )
+
+        if len(shard_indices) == 0:
+            self._index = OrderedDict(
+                (name, np.zeros(0, dtype=dtype))
+                for name, dtype in INDEX_COLUMNS.items()
+            )
+            self._shard_indices = np.zeros(0, dtype=np.int64)
+            return
+        # sort by clip id so that the clip id is the row of the clip in the index table
+        clip_ids = np.concatenate(columns["clip_id"])
+        order = np.argsort(clip_ids, kind="stable")
+        assert np.array_equal(
+            clip_ids[order], np.arange(len(clip_ids))
+        ), "the clip ids of the dataset are not consecutive"
+        self._index = OrderedDict(
+            (name, np.concatenate(column)[order]) for name, column in columns.items()
+        )
+        self._shard_indices = np.concatenate(shard_indices)[order]
+        self._clip_dtypes = [self._clip_dtypes[i] for i in order]
+
+    @staticmethod
+    def _shard_paths(directory):
+        return sorted(glob.glob(os.path.join(directory, SHARD_GLOB)))
+
+    def __len__(self):
+        return len(self._shard_indices)
+
+    def __getitem__(self, clip_id: int) -> SkeletonMotion:
+        return self.clip(clip_id)
+
+    def __repr__(self):
+        return "MotionDataset(directory={}, num_clips={}, num_shards={})".format(
+            self._directory, len(self), len(self._buffers)
+        )
+
+    @property
+    def index(self):
+        """the index table of all the clips, one array per column (clip_id, offset, length, fps,
+        is_local, skeleton_hash), ordered by clip id"""
+        return self._index
+
+    @property
+    def skeleton_trees(self):
+        """the skeleton trees of the dataset by hash"""
+        return self._skeleton_trees
+
+    def clip(
+        self, clip_id: int, start: Optional[int] = None, end: Optional[int] = None
+    ) -> SkeletonMotion:
+        """A clip, or the frames [start: end] of a clip, as a view of the memory-mapped shard
+
+        :param clip_id: the clip id
+        :type clip_id: int
+        :param start: the first frame
+        :type start: int, optional
+        :param end: the end frame (excluded)
+        :type end: int, optional
+        :rtype: SkeletonMotion
+        """
+        if clip_id < 0:
+            clip_id += len(self)
+        if not 0 <= clip_id < len(self):
+            raise IndexError("clip id {} out of range".format(clip_id))
+        skeleton_tree = self._skeleton_trees[int(self._index["skeleton_hash"][clip_id])]
+        length = int(self._index["length"][clip_id])
+        start, end, _ = slice(start, end).indices(length)
+        end = max(start, end)
+        dtype = self._clip_dtypes[clip_id]
+        width = len(skeleton_tree) * 10 + 3
+        frames = np.ndarray(
+            (end - start, width),
+            dtype=dtype,
+            buffer=self._buffers[self._shard_indices[clip_id]],
+            offset=int(self._index["offset"][clip_id]) + start * width * dtype.itemsize,
+        )
+        return SkeletonMotion(
+            torch.from_numpy(frames),
+            skeleton_tree=skeleton_tree,
+            is_local=bool(self._index["is_local"][clip_id]),
+            fps=float(self._index["fps"][clip_id]),
+            copy=False,
+        )
@@ -0,0 +1,227 @@
+"""
+A library of motion clips packed into contiguous buffers, to query the state of many agents at
+many (clip, time) pairs in a single vectorized call
+"""
+
+from typing import List, NamedTuple, Optional
+
+import torch
+
+from ..core import *
+from .skeleton3d import JointDofSpec, SkeletonMotion
+
+
+class MotionSample(NamedTuple):
+    """The state of N queries of a MotionLibrary, the velocities are in the global frame"""
+
+    root_translation: torch.Tensor  # (N, 3)
+    root_rotation: torch.Tensor  # (N, 4)
+    root_velocity: torch.Tensor  # (N, 3)
+    root_angular_velocity: torch.Tensor  # (N, 3)
+    local_rotation: torch.Tensor  # (N, num_joints, 4)
+    dof_pos: Optional[torch.Tensor]  # (N, num_dofs), None without a JointDofSpec
+    dof_vel: Optional[torch.Tensor]  # (N, num_dofs), None without a JointDofSpec
+
+
+class MotionLibrary:
+    """
+    Packs the frames of many motions (of the same skeleton) into concatenated buffers, along with
+    an offsets table giving where each motion starts. The state at any (motion, time) pair is
+    interpolated from the two closest frames: rotations are slerped and everything else is
+    linearly interpolated, for all the queries at once.
+
+    Example:
+        >>> library = MotionLibrary([walk, run], weights=[1.0, 3.0])
+        >>> motion_ids = library.sample_motions(4096)
+        >>> times = library.sample_times(motion_ids)
+        >>> state = library.sample(motion_ids, times)
+        >>> state.local_rotation.shape
+        torch.Size([4096, 13, 4])
+    """
+
+    def __init__(
+        self,
+        motions: List[SkeletonMotion],
+        weights=None,
+        dof_spec: Optional[JointDofSpec] = None,
+        device=None,
+    ):
+        """
+        :param motions: the motion clips, they must have a single (time) dimension and share the
+        same skeleton
+        :type motions: List[SkeletonMotion]
+        :param weights: relative probabilities of the clips in `sample_motions()` (uniform if
+        not given)
+        :type weights: List[float] or Tensor, optional
+        :param dof_spec: the joint DOFs, required to get DOF positions and velocities
+        :type dof_spec: JointDofSpec, optional
+        :param device: the device of the buffers (the device of the motions if not given)
+        :type device: torch.device, optional
+        """
+        assert len(motions) > 0, "the library needs at least one motion"
+        self._skeleton_tree = motions[0].skeleton_tree
+        for motion in motions:
+            assert (
+                motion.skeleton_tree.node_names == self._skeleton_tree.node_names
+            ), "all the motions must share the same skeleton"
+            assert len(motion.shape) == 1, "expected motions with a single dimension"
+        self._dof_spec = dof_spec
+
+        def _pack(tensors):
+            return torch.cat(tensors, dim=0).to(device).contiguous()
+
+        self._local_rotation = _pack([motion.local_rotation for motion in motions])
+        self._root_translation = _pack([motion.root_translation for motion in motions])
+        self._root_velocity = _pack([motion.global_root_velocity for motion in motions])
+        self._root_angular_velocity = _pack(
+            [motion.global_root_angular_velocity for motion in motions]
+        )
+        if dof_spec is not None:
+            self._dof_vel = _pack(
+                [motion.dof_pos_and_vel(dof_spec)[1] for motion in motions]
+            )
+            hinge_indices, ball_indices = dof_spec.node_indices_in(self._skeleton_tree)
+            self._dof_node_indices = torch.cat([hinge_indices, ball_indices]).to(
+                self._local_rotation.device
+            )
+
+        device = self._local_rotation.device
+        self._motion_lengths = torch.tensor(
+            [len(motion) for motion in motions], dtype=torch.long, device=device
+        )
+        self._motion_offsets = self._motion_lengths.cumsum(0) - self._motion_lengths
+        self._motion_fps = torch.tensor(
+            [float(motion.fps) for motion in motions],
+            dtype=torch.float64,
+            device=device,
+        )
+        self._motion_durations = (self._motion_lengths - 1) / self._motion_fps
+        if weights is None:
+            weights = torch.ones(len(motions))
+        weights = torch.as_tensor(weights, dtype=torch.float64, device=device)
+        assert weights.shape == (len(motions),), "expected one weight per motion"
+        self._motion_weights = weights / weights.sum()
+
+    def __len__(self):
+        return len(self._motion_lengths)
+
+    def __repr__(self):
+        return "MotionLibrary(num_motions={}, num_frames={})".format(
+            len(self), self.num_frames
+        )
+
+    @property
+    def skeleton_tree(self):
+        return self._skeleton_tree
+
+    @property
+    def dof_spec(self):
+        return self._dof_spec
+
+    @property
+    def num_frames(self):
+        """total number of frames of all the motions"""
+        return len(self._local_rotation)
+
+    @property
+    def motion_lengths(self):
+        """number of frames of each motion"""
+        return self._motion_lengths
+
+    @property
+    def motion_offsets(self):
+        """index of the first frame of each motion in the packed buffers"""
+        return self._motion_offsets
+
+    @property
+    def motion_fps(self):
+        return self._motion_fps
+
+    @property
+    def motion_durations(self):
+        """duration of each motion in seconds"""
+        return self._motion_durations
+
+    @property
+    def motion_weights(self):
+        """normalized sampling probability of each motion"""
+        return self._motion_weights
+
+    def sample_motions(self, n: int, generator: Optional[torch.Generator] = None):
+        """Draw motion ids with replacement, following the motion weights
+
+        :param n: number of motion ids
+        :type n: int
+        :param generator: the random number generator
+        :type generator: torch.Generator, optional
+        :rtype: Tensor
+        """
+        return torch.multinomial(
+            self._motion_weights, n, replacement=True, generator=generator
+        )
+
+    def sample_times(self, motion_ids, generator: Optional[torch.Generator] = None):
+        """Draw a time uniformly within each of the given motions
+
+        :param motion_ids: the motion ids
+        :type motion_ids: Tensor
+        :param generator: the random number generator
+        :type generator: torch.Generator, optional
+        :rtype: Tensor
+        """
+        phase = torch.rand(
+            motion_ids.shape,
+            dtype=torch.float64,
+            device=self._motion_durations.device,
+            generator=generator,
+        )
+        return phase * self._motion_durations[motion_ids]
+
+    def sample(self, motion_ids, times) -> MotionSample:
+        """Interpolate the state of the given motions at the given times (in seconds, clamped
+        to the duration of each motion)
+
+        :param motion_ids: the motion ids, of shape (N,)
+        :type motion_ids: Tensor
+        :param times: the times, of shape (N,)
+        :type times: Tensor
+        :rtype: MotionSample
+        """
+        device = self._motion_lengths.device
+        motion_ids = torch.as_tensor(motion_ids, dtype=torch.long, device=device)
+        times = torch.as_tensor(times, dtype=torch.float64, device=device)
+        motion_lengths = self._motion_lengths[motion_ids]
+        frame_positions = (times * self._motion_fps[motion_ids]).clamp(min=0)
+        frame_positions = torch.minimum(frame_positions, motion_lengths - 1.0)
+        prev_frames = torch.minimum(
+            frame_positions.floor().long(), (motion_lengths - 2).clamp(min=0)
+        )
+        next_frames = torch.minimum(prev_frames + 1, motion_lengths - 1)
+        blend = (frame_positions - prev_frames).to(self._local_rotation.dtype)
+        prev_indices = self._motion_offsets[motion_ids] + prev_frames
+        next_indices = self._motion_offsets[motion_ids] + next_frames
+
+        def _lerp(x):
+            weight = blend.view((-1,) + (1,) * (x.dim() - 1))
+            return torch.lerp(x[prev_indices], x[next_indices], weight)
+
+        local_rotation = quat_slerp(
+            self._local_rotation[prev_indices],
+            self._local_rotation[next_indices],
+            blend.unsqueeze(-1),
+        )
+        dof_pos = dof_vel = None
+        if self._dof_spec is not None:
+            dof_pos = self._dof_spec.to_dofs(
+                quat_to_exp_map(local_rotation[:, self._dof_node_indices])
+            )
+            dof_vel = _lerp(self._dof_vel)
+        return MotionSample(
+            root_translation=_lerp(self._root_translation),
+            root_rotation=local_rotation[:, 0],
+            root_velocity=_lerp(self._root_velocity),
+            root_angular_velocity=_lerp(self._root_angular_velocity),
+            local_rotation=local_rotation,
+            dof_pos=dof_pos,
+            dof_vel=dof_vel,
+        )
@@ -0,0 +1,216 @@
+"""
+A set of motions stored once in shared memory (or in a memory-mapped file) and attached by any
+number of processes, each of them getting zero-copy, read-only SkeletonMotion objects
+"""
+
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional
+import warnings
+
+import numpy as np
+import torch
+
+from ..core.backend.packed import packed_layout, read_packed, write_packed
+from .skeleton3d import SkeletonMotion, SkeletonTree
+
+# names of the shared memory segments created by this process, whose resource tracker owns them
+_CREATED_SEGMENTS = set()
+
+
+class SharedMotionDataset:
+    """
+    The motions are packed with :mod:`poselib.core.backend.packed`: one array block per motion
+    tensor and per distinct skeleton tree, and a JSON header with the rest of the metadata (node
+    names, fps, is_local). The loader process calls `create()` once, the workers `attach()` by
+    name (shared memory) or path (memory-mapped file) and only map the pages they read.
+
+    Example:
+        >>> dataset = SharedMotionDataset.create(motions, name="motions")
+        >>> # in a worker process
+        >>> dataset = SharedMotionDataset.attach(name="motions")
+        >>> dataset[0].global_translation.shape
+        torch.Size([120, 24, 3])
+
+    The tensors of the attached motions are read-only views of the shared buffer, writing to them
+    is undefined behavior: clone a motion to modify it. A shared memory segment can only be
+    closed once the motions taken from it are released, see `close()`. The creator must call
+    `unlink()` once all the workers are done to free a shared memory segment.
+    """
+
+    def __init__(self, buffer, header, arrays, shm=None, path=None):
+        """Use `create()` or `attach()` instead"""
+        self._buffer = buffer
+        self._header = header
+        self._shm = shm
+        self._path = path
+        with warnings.catch_warnings():
+            # the buffer is read-only in the workers, torch warns about it on every tensor
+            warnings.simplefilter("ignore", UserWarning)
+            tensors = OrderedDict(
+                (key, torch.from_numpy(array)) for key, array in arrays.items()
+            )
+        skeleton_trees = [
+            SkeletonTree(
+                node_names,
+                tensors["skeleton_tree_{}_parent_indices".format(i)],
+                tensors["skeleton_tree_{}_local_translation".format(i)],
+            )
+            for i, node_names in enumerate(header["node_names"])
+        ]
+        self._motions = [
+            SkeletonMotion(
+                tensors["motion_{}".format(i)],
+                skeleton_tree=skeleton_trees[entry["skeleton_tree"]],
+                is_local=entry["is_local"],
+                fps=entry["fps"],
+                copy=False,
+            )
+            for i, entry in enumerate(header["motions"])
+        ]
+
+    def __len__(self):
+        return len(self._motions)
+
+    def __getitem__(self, index) -> SkeletonMotion:
+        return self._motions[index]
+
+    def __iter__(self):
+        yield from self._motions
+
+    def __repr__(self):
+        return "SharedMotionDataset(name={}, path={}, num_motions={})".format(
+            self.name, self._path, len(self)
+        )
+
+    @property
+    def name(self):
+        """name of the shared memory segment, None for a memory-mapped file"""
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def path(self):
+        """path of the memory-mapped file, None for a shared memory segment"""
+        return self._path
+
+    @property
+    def nbytes(self):
+        """size of the shared buffer in bytes"""
+        return self._buffer.nbytes
+
+    @property
+    def header(self):
+        """metadata of the motions: node names of the skeleton trees, fps and is_local"""
+        return self._header
+
+    @staticmethod
+    def _pack(motions):
+        header = OrderedDict([("node_names", []), ("motions", [])])
+        arrays = OrderedDict()
+        tree_indices = {}
+        for i, motion in enumerate(motions):
+            tree = motion.skeleton_tree
+            if id(tree) not in tree_indices:
+                tree_index = len(header["node_names"])
+                tree_indices[id(tree)] = tree_index
+                header["node_names"].append(list(tree.node_names))
+                prefix = "skeleton_tree_{}_".format(tree_index)
+                arrays[prefix + "parent_indices"] = tree.parent_indices.cpu().numpy()
+                arrays[prefix + "local_translation"] = (
+                    tree.local_translation.cpu().numpy()
+                )
+            header["motions"].append(
+                OrderedDict(
+                    [
+                        ("skeleton_tree", tree_indices[id(tree)]),
+                        ("is_local", motion.is_local),
+                        ("fps", float(motion.fps)),
+                    ]
+                )
+            )
+            arrays["motion_{}".format(i)] = motion.tensor.detach().cpu().numpy()
+        return header, arrays
+
+    @classmethod
+    def create(
+        cls,
+        motions: List[SkeletonMotion],
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> "SharedMotionDataset":
+        """Copy the motions into a new shared memory segment, or into a file that is then
+        memory-mapped if `path` is given
+
+        :param motions: the motions
+        :type motions: List[SkeletonMotion]
+        :param name: name of the shared memory segment (a random name is picked if not given)
+        :type name: str, optional
+        :param path: path of the file to write instead of a shared memory segment
+        :type path: str, optional
+        :rtype: SharedMotionDataset
+        """
+        header, arrays = cls._pack(motions)
+        size = packed_layout(header, arrays)[2]
+        if path is not None:
+            buffer = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+            write_packed(buffer, header, arrays)
+            buffer.flush()
+            return cls.attach(path=path)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _CREATED_SEGMENTS.add(shm.name)
+        write_packed(shm.buf, header, arrays)
+        buffer = np.frombuffer(shm.buf, dtype=np.uint8, count=size)
+        buffer.flags.writeable = False
+        return cls(buffer, *read_packed(buffer), shm=shm)
+
+    @classmethod
+    def attach(
+        cls, name: Optional[str] = None, path: Optional[str] = None
+    ) -> "SharedMotionDataset":
+        """Attach to a dataset made by `create()`, without copying any motion data
+
+        :param name: name of the shared memory segment
+        :type name: str, optional
+        :param path: path of the memory-mapped file
+        :type path: str, optional
+        :rtype: SharedMotionDataset
+        """
+        assert (name is None) != (path is None), "expected either a name or a path"
+        if path is not None:
+            buffer = np.memmap(path, dtype=np.uint8, mode="r")
+            return cls(buffer, *read_packed(buffer), path=path)
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.name not in _CREATED_SEGMENTS:
+            # the creator owns the segment, the resource tracker of another attaching process
+            # must not unlink it when that process exits
+            resource_tracker.unregister(shm._name, "shared_memory")
+        buffer = np.frombuffer(shm.buf, dtype=np.uint8)
+        buffer.flags.writeable = False
+        return cls(buffer, *read_packed(buffer), shm=shm)
+
+    def close(self) -> bool:
+        """Detach from the shared buffer. The dataset drops its own views of the buffer, but the
+        motions taken from it (`dataset[i]`, iteration) are views too: a shared memory segment
+        is only closed once none of them is referenced anymore. Otherwise it stays mapped, and
+        `close()` can be called again after releasing them.
+
+        :return: whether the buffer was closed
+        :rtype: bool
+        """
+        self._motions = []
+        self._buffer = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # motions of the dataset still export the buffer
+                return False
+        return True
+
+    def unlink(self):
+        """Free the shared memory segment (once every process has closed it), only the creator
+        should call this
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+            _CREATED_SEGMENTS.discard(self._shm.name)
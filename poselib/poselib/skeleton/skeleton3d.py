@@ -5,6 +5,7 @@
 # distribution of this software and related documentation without an express
 # license agreement from NVIDIA CORPORATION is strictly prohibited.
 
+import math
 import os
 import xml.etree.ElementTree as ET
 from collections import OrderedDict
@@ -14,10 +15,194 @@ import numpy as np
 import torch
 
 from ..core import *
+from ..core.compression import (
+    rotation_from_compact_dict,
+    rotation_to_compact_dict,
+    translation_from_compact_dict,
+    translation_to_compact_dict,
+)
 from .backend.fbx.fbx_read_wrapper import fbx_to_array
+from .backend.bvh.bvh_reader import bvh_to_array, channel_indices
 import scipy.ndimage.filters as filters
 
 
+class SkeletonTopology:
+    """
+    An immutable index over the structure of a skeleton tree. Every quantity is computed once from
+    the parent indices so that consumers (forward kinematics, node dropping, retargeting, drawing)
+    don't need to walk the tree joint by joint. The nodes need to be topologically sorted, i.e.
+    the parent of a node always appears before the node itself.
+
+    Basic Usage:
+        >>> t = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+        >>> t.topology.depth
+        tensor([0, 1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2, 3])
+        >>> t.topology.children(0)
+        tensor([ 1,  4,  7, 10])
+        >>> t.topology.root_paths[3]
+        (0, 1, 2, 3)
+        >>> t.topology.bone_indices
+        (tensor([ 1,  2,  3,  4,  5,  6,  7,  8,  9, 10, 11, 12]), tensor([ 0,  1,  2,  0,  4,  5,  0,  7,  8,  0, 10, 11]))
+    """
+
+    __slots__ = (
+        "_depth",
+        "_depth_levels",
+        "_children_offsets",
+        "_children_indices",
+        "_ancestor_mask",
+        "_root_paths",
+        "_bone_indices",
+    )
+
+    def __init__(self, parent_indices):
+        """
+        :param parent_indices: the parent index of each node, -1 represents a root node
+        :type parent_indices: Tensor
+        """
+        parents = parent_indices.cpu().numpy().astype(np.int64)
+        num_nodes = len(parents)
+        depth = np.zeros(num_nodes, dtype=np.int64)
+        ancestor_mask = np.zeros((num_nodes, num_nodes), dtype=bool)
+        root_paths = []
+        for node_index in range(num_nodes):
+            parent_index = parents[node_index]
+            if parent_index == -1:
+                root_paths.append((node_index,))
+                continue
+            assert (
+                parent_index < node_index
+            ), "the parent of each node must appear before the node itself"
+            depth[node_index] = depth[parent_index] + 1
+            ancestor_mask[node_index] = ancestor_mask[parent_index]
+            ancestor_mask[node_index, parent_index] = True
+            root_paths.append(root_paths[parent_index] + (node_index,))
+
+        depth_levels = []
+        for level in range(int(depth.max()) + 1 if num_nodes > 0 else 0):
+            node_indices = np.nonzero(depth == level)[0]
+            depth_levels.append(
+                (
+                    torch.from_numpy(node_indices),
+                    torch.from_numpy(parents[node_indices]),
+                )
+            )
+
+        bone_children = np.nonzero(parents != -1)[0]
+        bone_parents = parents[bone_children]
+        children_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        children_offsets[1:] = np.cumsum(np.bincount(bone_parents, minlength=num_nodes))
+        children_indices = bone_children[np.argsort(bone_parents, kind="stable")]
+
+        self._depth = torch.from_numpy(depth)
+        self._depth_levels = tuple(depth_levels)
+        self._children_offsets = torch.from_numpy(children_offsets)
+        self._children_indices = torch.from_numpy(children_indices)
+        self._ancestor_mask = torch.from_numpy(ancestor_mask)
+        self._root_paths = tuple(root_paths)
+        self._bone_indices = (
+            torch.from_numpy(bone_children),
+            torch.from_numpy(bone_parents),
+        )
+
+    def __len__(self):
+        """number of nodes in the topology"""
+        return len(self._root_paths)
+
+    @property
+    def depth(self):
+        """depth of each node, the root node(s) have depth 0
+
+        :rtype: Tensor
+        """
+        return self._depth
+
+    @property
+    def depth_levels(self):
+        """the forward kinematics schedule of the tree. It has one entry per tree depth, each entry
+        being a pair of (node_indices, parent_indices) tensors. Every node in a level only depends
+        on the nodes from the previous levels, so a whole level can be evaluated in one batched
+        operation. The first level holds the root node(s) and their -1 parents.
+
+        :rtype: Tuple[Tuple[Tensor, Tensor]]
+        """
+        return self._depth_levels
+
+    @property
+    def children_offsets(self):
+        """CSR row offsets of the children, the children of node i are
+        `children_indices[children_offsets[i]:children_offsets[i + 1]]`
+
+        :rtype: Tensor
+        """
+        return self._children_offsets
+
+    @property
+    def children_indices(self):
+        """CSR column indices of the children, grouped by parent in increasing node order
+
+        :rtype: Tensor
+        """
+        return self._children_indices
+
+    @property
+    def ancestor_mask(self):
+        """dense (num_nodes, num_nodes) boolean mask where `ancestor_mask[i, j]` is True if node j
+        is a strict ancestor of node i
+
+        :rtype: Tensor
+        """
+        return self._ancestor_mask
+
+    @property
+    def root_paths(self):
+        """the path from the root to each node, both ends included
+
+        :rtype: Tuple[Tuple[int]]
+        """
+        return self._root_paths
+
+    @property
+    def bone_indices(self):
+        """the (child_indices, parent_indices) pair of every bone, in the order of the child nodes
+
+        :rtype: Tuple[Tensor, Tensor]
+        """
+        return self._bone_indices
+
+    def children(self, node_index):
+        """get the indices of the children of the given node
+
+        :param node_index: the index of the node
+        :type node_index: int
+        :rtype: Tensor
+        """
+        return self._children_indices[
+            self._children_offsets[node_index] : self._children_offsets[node_index + 1]
+        ]
+
+    def nearest_ancestors(self, node_mask, include_self=False):
+        """For every node, find the closest ancestor that is selected by the given mask.
+
+        :param node_mask: a boolean tensor of shape (num_nodes,) selecting the candidate nodes
+        :type node_mask: Tensor
+        :param include_self: whether a selected node is its own nearest ancestor
+        :type include_self: bool, optional, default=False
+        :return: the index of the nearest selected ancestor of each node, -1 if there is none
+        :rtype: Tensor
+        """
+        candidates = self._ancestor_mask & node_mask.bool().unsqueeze(0)
+        if include_self:
+            candidates = candidates | torch.diag(node_mask.bool())
+        candidate_depth = torch.where(
+            candidates,
+            self._depth.unsqueeze(0),
+            torch.full_like(candidates, -1, dtype=torch.long),
+        )
+        max_depth, nearest = candidate_depth.max(dim=-1)
+        return torch.where(max_depth >= 0, nearest, torch.full_like(nearest, -1))
+
+
 class SkeletonTree(Serializable):
     """
     A skeleton tree gives a complete description of a rigid skeleton. It describes a tree structure
@@ -134,6 +319,25 @@ class SkeletonTree(Serializable):
         """number of nodes in the skeleton tree"""
         return len(self)
 
+    @property
+    def topology(self):
+        """the cached topology index of the tree (depth levels, children, ancestors and bones). It
+        is built on first access and shared by every state that uses this tree
+
+        :rtype: SkeletonTopology
+        """
+        if not hasattr(self, "_topology"):
+            self._topology = SkeletonTopology(self.parent_indices)
+        return self._topology
+
+    @property
+    def depth_levels(self):
+        """the forward kinematics schedule of the tree, see `SkeletonTopology.depth_levels`
+
+        :rtype: Tuple[Tuple[Tensor, Tensor]]
+        """
+        return self.topology.depth_levels
+
     @classmethod
     def from_dict(cls, dict_repr, *args, **kwargs):
         return cls(
@@ -162,6 +366,25 @@ class SkeletonTree(Serializable):
         :return: The skeleton tree constructed from the mjcf file
         :rtype: SkeletonTree
         """
+        xml_bodies, parent_indices = SkeletonTree._parse_mjcf_bodies(path)
+        node_names = [xml_body.attrib.get("name") for xml_body in xml_bodies]
+        # parse the local translation into float list
+        local_translation = [
+            np.fromstring(xml_body.attrib.get("pos"), dtype=float, sep=" ")
+            for xml_body in xml_bodies
+        ]
+        return cls(
+            node_names,
+            torch.from_numpy(np.array(parent_indices, dtype=np.int32)),
+            torch.from_numpy(np.array(local_translation, dtype=np.float32)),
+        )
+
+    @staticmethod
+    def _parse_mjcf_bodies(path: str):
+        """Parses the bodies of a mujoco xml scene description file in depth-first order (the
+        order of the nodes of the skeleton tree), and returns the body xml elements along with
+        the index of their parents
+        """
         tree = ET.parse(path)
         xml_doc_root = tree.getroot()
         xml_world_body = xml_doc_root.find("worldbody")
@@ -172,31 +395,19 @@ class SkeletonTree(Serializable):
         if xml_body_root is None:
             raise ValueError("MJCF parsed incorrectly please verify it.")
 
-        node_names = []
+        xml_bodies = []
         parent_indices = []
-        local_translation = []
 
         # recursively adding all nodes into the skel_tree
-        def _add_xml_node(xml_node, parent_index, node_index):
-            node_name = xml_node.attrib.get("name")
-            # parse the local translation into float list
-            pos = np.fromstring(xml_node.attrib.get("pos"), dtype=float, sep=" ")
-            node_names.append(node_name)
+        def _add_xml_node(xml_node, parent_index):
+            curr_index = len(xml_bodies)
+            xml_bodies.append(xml_node)
             parent_indices.append(parent_index)
-            local_translation.append(pos)
-            curr_index = node_index
-            node_index += 1
             for next_node in xml_node.findall("body"):
-                node_index = _add_xml_node(next_node, curr_index, node_index)
-            return node_index
+                _add_xml_node(next_node, curr_index)
 
-        _add_xml_node(xml_body_root, -1, 0)
-
-        return cls(
-            node_names,
-            torch.from_numpy(np.array(parent_indices, dtype=np.int32)),
-            torch.from_numpy(np.array(local_translation, dtype=np.float32)),
-        )
+        _add_xml_node(xml_body_root, -1)
+        return xml_bodies, parent_indices
 
     def parent_of(self, node_name):
         """get the name of the parent of the given node
@@ -219,43 +430,40 @@ class SkeletonTree(Serializable):
     def drop_nodes_by_names(
         self, node_names: List[str], pairwise_translation=None
     ) -> "SkeletonTree":
-        new_length = len(self) - len(node_names)
-        new_node_names = []
-        new_local_translation = torch.zeros(
-            new_length, 3, dtype=self.local_translation.dtype
-        )
-        new_parent_indices = torch.zeros(new_length, dtype=self.parent_indices.dtype)
-        parent_indices = self.parent_indices.numpy()
-        new_node_indices: dict = {}
-        new_node_index = 0
-        for node_index in range(len(self)):
-            if self[node_index] in node_names:
-                continue
-            tb_node_index = parent_indices[node_index]
-            if tb_node_index != -1:
-                local_translation = self.local_translation[node_index, :]
-                while tb_node_index != -1 and self[tb_node_index] in node_names:
-                    local_translation += self.local_translation[tb_node_index, :]
-                    tb_node_index = parent_indices[tb_node_index]
-                assert tb_node_index != -1, "the root node cannot be dropped"
-
-                if pairwise_translation is not None:
-                    local_translation = pairwise_translation[
-                        tb_node_index, node_index, :
-                    ]
-            else:
-                local_translation = self.local_translation[node_index, :]
+        dropped_node_names = set(node_names)
+        keep_mask = torch.tensor([name not in dropped_node_names for name in self])
+        topology = self.topology
+        is_root = self.parent_indices == -1
+        # every kept node gets re-attached to its nearest kept ancestor
+        nearest_indices = topology.nearest_ancestors(keep_mask)
+        assert bool(
+            (is_root | (nearest_indices != -1))[keep_mask].all()
+        ), "the root node cannot be dropped"
+
+        if pairwise_translation is not None:
+            local_translation = pairwise_translation[
+                nearest_indices.clamp(min=0), torch.arange(len(self)), :
+            ].to(self.local_translation)
+            local_translation[is_root] = self.local_translation[is_root]
+        else:
+            # accumulate the translation of the dropped nodes in between
+            dropped_in_between = topology.ancestor_mask & (
+                topology.depth.unsqueeze(0)
+                > topology.depth[nearest_indices.clamp(min=0)].unsqueeze(-1)
+            )
+            local_translation = self.local_translation + (
+                dropped_in_between.to(self.local_translation) @ self.local_translation
+            )
 
-            new_node_names.append(self[node_index])
-            new_local_translation[new_node_index, :] = local_translation
-            if tb_node_index == -1:
-                new_parent_indices[new_node_index] = -1
-            else:
-                new_parent_indices[new_node_index] = new_node_indices[
-                    self[tb_node_index]
-                ]
-            new_node_indices[self[node_index]] = new_node_index
-            new_node_index += 1
+        new_node_indices = torch.cumsum(keep_mask.long(), dim=0) - 1
+        new_parent_indices = torch.where(
+            is_root,
+            torch.full_like(nearest_indices, -1),
+            new_node_indices[nearest_indices.clamp(min=0)],
+        )
+        new_node_names = [name for name in self if name not in dropped_node_names]
+        new_parent_indices = new_parent_indices[keep_mask].to(self.parent_indices)
+        new_local_translation = local_translation[keep_mask]
 
         return SkeletonTree(new_node_names, new_parent_indices, new_local_translation)
 
@@ -266,6 +474,319 @@ class SkeletonTree(Serializable):
         return self.drop_nodes_by_names(nodes_to_drop, pairwise_translation)
 
 
+class JointDofSpec:
+    """
+    Per-joint degrees of freedom of a simulated articulation, used to turn a motion into the DOF
+    positions and velocities of the simulator (e.g. Isaac Gym PD targets). Each node of the
+    skeleton is either fixed (0 DOF), a hinge about an axis of its own frame (1 DOF) or a ball
+    joint (3 DOFs, parameterized by the exponential map of its local rotation). The DOFs are
+    ordered by node index, which for MJCF files is the order of the joints in the file.
+
+    Example:
+        >>> spec = JointDofSpec.from_mjcf(SkeletonTree.__example_mjcf_path__)
+        >>> spec.num_dofs
+        8
+        >>> spec.dof_sizes
+        [0, 0, 1, 1, 0, 1, 1, 0, 1, 1, 0, 1, 1]
+    """
+
+    def __init__(self, node_names, dof_sizes, hinge_axes=None):
+        """
+        :param node_names: the names of the nodes the DOFs belong to
+        :type node_names: List[str]
+        :param dof_sizes: the number of DOFs of each node, 0, 1 (hinge) or 3 (ball)
+        :type dof_sizes: List[int]
+        :param hinge_axes: the axis of every node, only the ones of the hinges are used
+        :type hinge_axes: Tensor, optional
+        """
+        assert len(node_names) == len(dof_sizes)
+        assert all(
+            dof_size in (0, 1, 3) for dof_size in dof_sizes
+        ), "a joint has 0, 1 (hinge) or 3 (ball) DOFs, got {}".format(dof_sizes)
+        self._node_names = list(node_names)
+        self._dof_sizes = list(dof_sizes)
+        dof_sizes = torch.tensor(self._dof_sizes, dtype=torch.long)
+        self._hinge_node_indices = (dof_sizes == 1).nonzero().flatten()
+        self._ball_node_indices = (dof_sizes == 3).nonzero().flatten()
+        if len(self._hinge_node_indices) > 0:
+            assert hinge_axes is not None, "the hinges need an axis"
+            hinge_axes = hinge_axes[self._hinge_node_indices]
+            self._hinge_axes = hinge_axes / hinge_axes.norm(dim=-1, keepdim=True)
+        else:
+            self._hinge_axes = torch.zeros(0, 3)
+        self._dof_offsets = torch.cat(
+            [torch.zeros(1, dtype=torch.long), dof_sizes.cumsum(0)]
+        )
+        # the hinge DOFs are computed first and the ball DOFs after them, this permutation puts
+        # them back in node order
+        num_hinges = len(self._hinge_node_indices)
+        hinge_order = torch.arange(num_hinges).view(-1, 1)
+        ball_order = num_hinges + torch.arange(3 * len(self._ball_node_indices))
+        dof_order = torch.empty(self.num_dofs, dtype=torch.long)
+        dof_order[self._dof_offsets[self._hinge_node_indices]] = hinge_order.flatten()
+        ball_offsets = self._dof_offsets[self._ball_node_indices].view(-1, 1)
+        dof_order[(ball_offsets + torch.arange(3)).flatten()] = ball_order
+        self._dof_order = dof_order
+
+    def __len__(self):
+        return len(self._node_names)
+
+    def __repr__(self):
+        return "JointDofSpec(num_nodes={}, num_dofs={})".format(
+            len(self), self.num_dofs
+        )
+
+    @property
+    def node_names(self):
+        return self._node_names
+
+    @property
+    def dof_sizes(self):
+        """number of DOFs of each node"""
+        return self._dof_sizes
+
+    @property
+    def dof_offsets(self):
+        """index of the first DOF of each node, followed by the total number of DOFs"""
+        return self._dof_offsets
+
+    @property
+    def num_dofs(self):
+        return int(self._dof_offsets[-1])
+
+    @property
+    def hinge_node_indices(self):
+        return self._hinge_node_indices
+
+    @property
+    def hinge_axes(self):
+        """unit axes of the hinges, in the frame of their nodes"""
+        return self._hinge_axes
+
+    @property
+    def ball_node_indices(self):
+        return self._ball_node_indices
+
+    @property
+    def dof_order(self):
+        """permutation from the hinge DOFs followed by the flattened ball DOFs to node order"""
+        return self._dof_order
+
+    @classmethod
+    def from_mjcf(cls, path: str) -> "JointDofSpec":
+        """
+        Parses the joint tags of a mujoco xml scene description file, the nodes are the same as
+        the ones of `SkeletonTree.from_mjcf()`. A body with a single hinge becomes a hinge, a body
+        with a ball joint or with three hinges (the usual way to describe a ball joint whose
+        axes can be limited independently) becomes a ball. The joints of the root body (usually a
+        free joint) are ignored, its motion is given by the root translation and rotation.
+
+        :param path:
+        :type path: string
+        :rtype: JointDofSpec
+        """
+        xml_bodies, parent_indices = SkeletonTree._parse_mjcf_bodies(path)
+        node_names = []
+        dof_sizes = []
+        hinge_axes = []
+        for xml_body, parent_index in zip(xml_bodies, parent_indices):
+            node_names.append(xml_body.attrib.get("name"))
+            xml_joints = xml_body.findall("joint") if parent_index != -1 else []
+            joint_types = [
+                xml_joint.attrib.get("type", "hinge") for xml_joint in xml_joints
+            ]
+            axis = np.array([0.0, 0.0, 1.0])
+            if len(joint_types) == 0:
+                dof_size = 0
+            elif joint_types == ["hinge"]:
+                dof_size = 1
+                axis = np.fromstring(
+                    xml_joints[0].attrib.get("axis", "0 0 1"), dtype=float, sep=" "
+                )
+            elif joint_types == ["ball"] or joint_types == ["hinge"] * 3:
+                dof_size = 3
+            else:
+                raise ValueError(
+                    "unsupported joints {} on body {}".format(
+                        joint_types, node_names[-1]
+                    )
+                )
+            dof_sizes.append(dof_size)
+            hinge_axes.append(axis)
+        return cls(
+            node_names,
+            dof_sizes,
+            torch.from_numpy(np.array(hinge_axes, dtype=np.float32)),
+        )
+
+    def to_dofs(self, x):
+        """Assemble per-node 3D quantities into DOFs: the hinge ones are projected on their axis,
+        the ball ones are kept as is, and the result is in node order
+
+        :param x: the quantities of the hinge nodes followed by the ones of the ball nodes, of
+        shape (..., num_hinges + num_balls, 3)
+        :type x: Tensor
+        :rtype: Tensor
+        """
+        num_hinges = len(self._hinge_node_indices)
+        hinge_dofs = (x[..., :num_hinges, :] * self._hinge_axes.to(x)).sum(dim=-1)
+        ball_dofs = x[..., num_hinges:, :].flatten(-2)
+        return torch.cat([hinge_dofs, ball_dofs], dim=-1).index_select(
+            -1, self._dof_order.to(x.device)
+        )
+
+    def node_indices_in(self, skeleton_tree):
+        """Map the nodes of the spec to the nodes of a skeleton tree (by name)
+
+        :param skeleton_tree: the skeleton tree
+        :type skeleton_tree: SkeletonTree
+        :rtype: Tuple[Tensor, Tensor]
+        :return: the tree indices of the hinge nodes and of the ball nodes
+        """
+        if skeleton_tree.node_names == self._node_names:
+            return self._hinge_node_indices, self._ball_node_indices
+        tree_indices = torch.tensor(
+            [skeleton_tree.index(node_name) for node_name in self._node_names],
+            dtype=torch.long,
+        )
+        return (
+            tree_indices[self._hinge_node_indices],
+            tree_indices[self._ball_node_indices],
+        )
+
+
+class SkeletonStateCache:
+    """
+    Memoization of the quantities derived from the state vector of a :class:`SkeletonState`
+    (forward kinematics, local/global rotation, ...). The cache is keyed on the identity and the
+    version counter of the state tensor: reassigning `.tensor` or modifying it in place
+    invalidates every cached value on the next access.
+
+    Large intermediates (e.g. the local transformation used by the forward kinematics) can be
+    dropped once the final quantities are computed, either explicitly with
+    `evict_intermediates()` or automatically by setting `retain_intermediates` to False.
+
+    Example:
+        >>> t = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+        >>> zero_pose = SkeletonState.zero_pose(t)
+        >>> zero_pose.cache.retain_intermediates = False
+        >>> global_translation = zero_pose.global_translation
+        >>> zero_pose.cache
+        SkeletonStateCache(keys=['rotation', 'root_translation', 'global_transformation', 'global_translation'], hits=1, misses=6)
+    """
+
+    __slots__ = (
+        "_tensor",
+        "_version",
+        "_values",
+        "_intermediates",
+        "retain_intermediates",
+        "hits",
+        "misses",
+    )
+
+    def __init__(self, retain_intermediates=True):
+        """
+        :param retain_intermediates: whether to keep the intermediates after the quantities that \
+        depend on them are computed
+        :type retain_intermediates: bool, optional, default=True
+        """
+        self._tensor = None
+        self._version = -1
+        self._values = OrderedDict()
+        self._intermediates = set()
+        self.retain_intermediates = retain_intermediates
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """number of cached values"""
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __repr__(self):
+        return "SkeletonStateCache(keys={}, hits={}, misses={})".format(
+            list(self._values), self.hits, self.misses
+        )
+
+    @staticmethod
+    def _tensor_version(tensor):
+        try:
+            return tensor._version
+        except RuntimeError:
+            # inference tensors don't track their version, only the identity is checked
+            return None
+
+    def _is_valid(self, tensor):
+        return tensor is self._tensor and self._tensor_version(tensor) == self._version
+
+    def _validate(self, tensor):
+        if not self._is_valid(tensor):
+            self._values.clear()
+            self._intermediates.clear()
+            self._tensor = tensor
+            self._version = self._tensor_version(tensor)
+
+    def get(self, tensor, key, compute, intermediate=False):
+        """Get a cached value, computing it if it is missing or if the tensor has changed.
+
+        :param tensor: the state tensor the value is derived from
+        :type tensor: Tensor
+        :param key: the name of the value
+        :type key: string
+        :param compute: the function that computes the value
+        :type compute: Callable[[], Tensor]
+        :param intermediate: whether the value is an evictable intermediate
+        :type intermediate: bool, optional, default=False
+        """
+        self._validate(tensor)
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        self.misses += 1
+        value = compute()
+        self._validate(tensor)
+        self._values[key] = value
+        if intermediate:
+            self._intermediates.add(key)
+        elif not self.retain_intermediates:
+            self.evict_intermediates()
+        return value
+
+    def peek(self, tensor, key):
+        """Get a cached value without computing it, None if it's not cached or stale
+
+        :rtype: Tensor, optional
+        """
+        if not self._is_valid(tensor):
+            return None
+        return self._values.get(key)
+
+    def evict(self, *keys):
+        """Drop the given values from the cache"""
+        for key in keys:
+            self._values.pop(key, None)
+            self._intermediates.discard(key)
+
+    def evict_intermediates(self):
+        """Drop all the intermediates from the cache"""
+        self.evict(*list(self._intermediates))
+
+    def clear(self):
+        """Drop every cached value. The hit/miss counters are kept"""
+        self._values.clear()
+        self._intermediates.clear()
+        self._tensor = None
+        self._version = -1
+
+    def reset_counters(self):
+        """Reset the hit/miss counters"""
+        self.hits = 0
+        self.misses = 0
+
+
 class SkeletonState(Serializable):
     """
     A skeleton state contains all the information needed to describe a static state of a skeleton.
@@ -336,21 +857,73 @@ class SkeletonState(Serializable):
         torch.Size([55])
     """
 
-    def __init__(self, tensor_backend, skeleton_tree, is_local):
+    def __init__(self, tensor_backend, skeleton_tree, is_local, copy=True):
         self._skeleton_tree = skeleton_tree
         self._is_local = is_local
-        self.tensor = tensor_backend.clone()
+        self._cache = SkeletonStateCache()
+        self.tensor = tensor_backend.clone() if copy else tensor_backend
 
     def __len__(self):
         return self.tensor.shape[0]
 
+    def __getitem__(self, index):
+        """index the state dimensions (all but the last dimension of `.tensor`). Basic indexing
+        (integers and slices) returns a state that shares storage with this one"""
+        return SkeletonState(
+            self.tensor[SkeletonState._state_index(index)],
+            self.skeleton_tree,
+            self.is_local,
+            copy=False,
+        )
+
+    @staticmethod
+    def _state_index(index):
+        # index the state dimensions and keep the state vector dimension untouched
+        if not isinstance(index, tuple):
+            index = (index,)
+        return index + (slice(None),)
+
+    @property
+    def shape(self):
+        """shape of the state, i.e. the shape of `.tensor` without its last dimension
+
+        :rtype: torch.Size
+        """
+        return self.tensor.shape[:-1]
+
+    @property
+    def tensor(self):
+        """the state vector that backs every other quantity of the state. Reassigning it or
+        modifying it in place invalidates all the cached derived quantities
+
+        :rtype: Tensor
+        """
+        return self._tensor
+
+    @tensor.setter
+    def tensor(self, tensor_backend):
+        self._tensor = tensor_backend
+        self._cache.clear()
+
+    @property
+    def cache(self):
+        """the cache of the quantities derived from `.tensor`
+
+        :rtype: SkeletonStateCache
+        """
+        return self._cache
+
+    def _cached(self, key, compute, intermediate=False):
+        return self._cache.get(self.tensor, key, compute, intermediate=intermediate)
+
     @property
     def rotation(self):
-        if not hasattr(self, "_rotation"):
-            self._rotation = self.tensor[..., : self.num_joints * 4].reshape(
+        return self._cached(
+            "rotation",
+            lambda: self.tensor[..., : self.num_joints * 4].reshape(
                 *(self.tensor.shape[:-1] + (self.num_joints, 4))
-            )
-        return self._rotation
+            ),
+        )
 
     @property
     def _local_rotation(self):
@@ -400,56 +973,41 @@ class SkeletonState(Serializable):
 
         :rtype: Tensor
         """
-        if not hasattr(self, "_root_translation"):
-            self._root_translation = self.tensor[
-                ..., self.num_joints * 4 : self.num_joints * 4 + 3
-            ]
-        return self._root_translation
+        return self._cached(
+            "root_translation",
+            lambda: self.tensor[..., self.num_joints * 4 : self.num_joints * 4 + 3],
+        )
 
     @property
     def global_transformation(self):
         """global transformation of each joint (transform from joint frame to global frame)"""
         # Forward Kinematics
-        if not hasattr(self, "_global_transformation"):
-            local_transformation = self.local_transformation
-            global_transformation = []
-            parent_indices = self.skeleton_tree.parent_indices.numpy()
-            # global_transformation = local_transformation.identity_like()
-            for node_index in range(len(self.skeleton_tree)):
-                parent_index = parent_indices[node_index]
-                if parent_index == -1:
-                    global_transformation.append(
-                        local_transformation[..., node_index, :]
-                    )
-                else:
-                    global_transformation.append(
-                        transform_mul(
-                            global_transformation[parent_index],
-                            local_transformation[..., node_index, :],
-                        )
-                    )
-            self._global_transformation = torch.stack(global_transformation, axis=-2)
-        return self._global_transformation
+        return self._cached(
+            "global_transformation",
+            lambda: SkeletonState._forward_kinematics(
+                self.local_transformation, self.skeleton_tree.depth_levels
+            ),
+        )
 
     @property
     def global_rotation(self):
         """global rotation of each joint (rotation matrix to rotate from joint's F.O.R to global
         F.O.R)"""
         if self._global_rotation is None:
-            if not hasattr(self, "_comp_global_rotation"):
-                self._comp_global_rotation = transform_rotation(
-                    self.global_transformation
-                )
-            return self._comp_global_rotation
+            return self._cached(
+                "global_rotation",
+                lambda: transform_rotation(self.global_transformation),
+            )
         else:
             return self._global_rotation
 
     @property
     def global_translation(self):
         """global translation of each joint"""
-        if not hasattr(self, "_global_translation"):
-            self._global_translation = transform_translation(self.global_transformation)
-        return self._global_translation
+        return self._cached(
+            "global_translation",
+            lambda: transform_translation(self.global_transformation),
+        )
 
     @property
     def global_translation_xy(self):
@@ -471,84 +1029,84 @@ class SkeletonState(Serializable):
         """the rotation from child frame to parent frame given in the order of child nodes appeared
         in `.skeleton_tree.node_names`"""
         if self._local_rotation is None:
-            if not hasattr(self, "_comp_local_rotation"):
-                local_rotation = quat_identity_like(self.global_rotation)
-                for node_index in range(len(self.skeleton_tree)):
-                    parent_index = self.skeleton_tree.parent_indices[node_index]
-                    if parent_index == -1:
-                        local_rotation[..., node_index, :] = self.global_rotation[
-                            ..., node_index, :
-                        ]
-                    else:
-                        local_rotation[..., node_index, :] = quat_mul_norm(
-                            quat_inverse(self.global_rotation[..., parent_index, :]),
-                            self.global_rotation[..., node_index, :],
-                        )
-                self._comp_local_rotation = local_rotation
-            return self._comp_local_rotation
+            return self._cached("local_rotation", self._compute_local_rotation)
         else:
             return self._local_rotation
 
+    def _compute_local_rotation(self):
+        global_rotation = self.global_rotation
+        parent_indices = self.skeleton_tree.parent_indices
+        is_root = (parent_indices == -1).unsqueeze(-1)
+        # root nodes gather themselves and are masked back to their global rotation
+        parent_rotation = global_rotation[..., parent_indices.clamp(min=0), :]
+        local_rotation = quat_mul_norm(quat_inverse(parent_rotation), global_rotation)
+        return torch.where(is_root, global_rotation, local_rotation)
+
     @property
     def local_transformation(self):
         """local translation + local rotation. It describes the transformation from child frame to
         parent frame given in the order of child nodes appeared in `.skeleton_tree.node_names`
         """
-        if not hasattr(self, "_local_transformation"):
-            self._local_transformation = transform_from_rotation_translation(
+        return self._cached(
+            "local_transformation",
+            lambda: transform_from_rotation_translation(
                 r=self.local_rotation, t=self.local_translation
-            )
-        return self._local_transformation
+            ),
+            intermediate=True,
+        )
 
     @property
     def local_translation(self):
         """local translation of the skeleton state. It is identical to the local translation in
         `.skeleton_tree.local_translation` except the root translation. The root translation is
         identical to `.root_translation`"""
-        if not hasattr(self, "_local_translation"):
-            broadcast_shape = (
-                tuple(self.tensor.shape[:-1])
-                + (len(self.skeleton_tree),)
-                + tuple(self.skeleton_tree.local_translation.shape[-1:])
-            )
-            local_translation = self.skeleton_tree.local_translation.broadcast_to(
-                *broadcast_shape
-            ).clone()
-            local_translation[..., 0, :] = self.root_translation
-            self._local_translation = local_translation
-        return self._local_translation
+        return self._cached(
+            "local_translation", self._compute_local_translation, intermediate=True
+        )
+
+    def _compute_local_translation(self):
+        broadcast_shape = (
+            tuple(self.tensor.shape[:-1])
+            + (len(self.skeleton_tree),)
+            + tuple(self.skeleton_tree.local_translation.shape[-1:])
+        )
+        local_translation = self.skeleton_tree.local_translation.broadcast_to(
+            *broadcast_shape
+        ).clone()
+        local_translation[..., 0, :] = self.root_translation
+        return local_translation
 
     # Root Properties
     @property
     def root_translation_xy(self):
         """root translation on xy"""
-        if not hasattr(self, "_root_translation_xy"):
-            self._root_translation_xy = self.global_translation_xy[..., 0, :]
-        return self._root_translation_xy
+        return self._cached(
+            "root_translation_xy", lambda: self.global_translation_xy[..., 0, :]
+        )
 
     @property
     def global_root_rotation(self):
         """root rotation"""
-        if not hasattr(self, "_global_root_rotation"):
-            self._global_root_rotation = self.global_rotation[..., 0, :]
-        return self._global_root_rotation
+        return self._cached(
+            "global_root_rotation", lambda: self.global_rotation[..., 0, :]
+        )
 
     @property
     def global_root_yaw_rotation(self):
         """root yaw rotation"""
-        if not hasattr(self, "_global_root_yaw_rotation"):
-            self._global_root_yaw_rotation = self.global_root_rotation.yaw_rotation()
-        return self._global_root_yaw_rotation
+        return self._cached(
+            "global_root_yaw_rotation",
+            lambda: self.global_root_rotation.yaw_rotation(),
+        )
 
     # Properties relative to root
     @property
     def local_translation_to_root(self):
         """The 3D translation from joint frame to the root frame."""
-        if not hasattr(self, "_local_translation_to_root"):
-            self._local_translation_to_root = (
-                self.global_translation - self.root_translation.unsqueeze(-1)
-            )
-        return self._local_translation_to_root
+        return self._cached(
+            "local_translation_to_root",
+            lambda: self.global_translation - self.root_translation.unsqueeze(-1),
+        )
 
     @property
     def local_rotation_to_root(self):
@@ -596,6 +1154,30 @@ class SkeletonState(Serializable):
 
         return torch.from_numpy(forward_direction)
 
+    @staticmethod
+    def _forward_kinematics(local_transformation, depth_levels):
+        """Compose the local transformations along the tree, one depth level at a time. Each level
+        is a single gather of the parent global transformations followed by one `transform_mul`,
+        and the results are written into a preallocated output buffer.
+
+        :param local_transformation: local transformation of each joint, in shape of (..., J, 7)
+        :type local_transformation: Tensor
+        :param depth_levels: the schedule given by `SkeletonTree.depth_levels`
+        :type depth_levels: Tuple[Tuple[Tensor, Tensor]]
+        :rtype: Tensor
+        """
+        global_transformation = torch.empty_like(local_transformation)
+        root_indices, _ = depth_levels[0]
+        global_transformation[..., root_indices, :] = local_transformation[
+            ..., root_indices, :
+        ]
+        for node_indices, parent_indices in depth_levels[1:]:
+            global_transformation[..., node_indices, :] = transform_mul(
+                global_transformation[..., parent_indices, :],
+                local_transformation[..., node_indices, :],
+            )
+        return global_transformation
+
     @staticmethod
     def _to_state_vector(rot, rt):
         state_shape = rot.shape[:-2]
@@ -610,6 +1192,21 @@ class SkeletonState(Serializable):
     def from_dict(
         cls: Type["SkeletonState"], dict_repr: OrderedDict, *args, **kwargs
     ) -> "SkeletonState":
+        if "tensor" in dict_repr:
+            # written by to_packed_dict(), the tensor is used as is
+            return cls(
+                TensorUtils.from_dict(dict_repr["tensor"], *args, **kwargs),
+                SkeletonTree.from_dict(dict_repr["skeleton_tree"], *args, **kwargs),
+                dict_repr["is_local"],
+                copy=False,
+            )
+        if "codes" in dict_repr["rotation"]:
+            # written by to_compact_dict()
+            return cls.from_rotation_and_root_translation(
+                SkeletonTree.from_dict(dict_repr["skeleton_tree"], *args, **kwargs),
+                *SkeletonState._from_compact_dict(dict_repr, **kwargs),
+                is_local=dict_repr["is_local"],
+            )
         rot = TensorUtils.from_dict(dict_repr["rotation"], *args, **kwargs)
         rt = TensorUtils.from_dict(dict_repr["root_translation"], *args, **kwargs)
         return cls(
@@ -628,6 +1225,48 @@ class SkeletonState(Serializable):
             ]
         )
 
+    def to_packed_dict(self) -> OrderedDict:
+        return OrderedDict(
+            [
+                ("tensor", tensor_to_dict(self.tensor.contiguous())),
+                ("skeleton_tree", self.skeleton_tree.to_dict()),
+                ("is_local", self.is_local),
+            ]
+        )
+
+    def to_compact_dict(self, bits: int = 16, resolution: float = 1e-4) -> OrderedDict:
+        """
+        Construct an ordered dictionary where the rotations are quantized with the
+        smallest-three encoding and the root translation is stored in fixed point relative to
+        its first value, see :mod:`poselib.core.compression`
+
+        :param bits: number of bits of each of the three stored quaternion components
+        :type bits: int
+        :param resolution: the quantization step of the root translation
+        :type resolution: float
+        :rtype: OrderedDict
+        """
+        return OrderedDict(
+            [
+                ("rotation", rotation_to_compact_dict(self.rotation, bits=bits)),
+                (
+                    "root_translation",
+                    translation_to_compact_dict(
+                        self.root_translation, resolution=resolution
+                    ),
+                ),
+                ("skeleton_tree", self.skeleton_tree.to_dict()),
+                ("is_local", self.is_local),
+            ]
+        )
+
+    @staticmethod
+    def _from_compact_dict(dict_repr, device=None, **kwargs):
+        return (
+            rotation_from_compact_dict(dict_repr["rotation"], device=device),
+            translation_from_compact_dict(dict_repr["root_translation"], device=device),
+        )
+
     @classmethod
     def from_rotation_and_root_translation(cls, skeleton_tree, r, t, is_local=True):
         """
@@ -937,17 +1576,24 @@ class SkeletonState(Serializable):
         )
 
         # STEP 5: Putting 3 and 4 together
+        # every target joint takes the rotation of its nearest ancestor (or itself) that exists in
+        # the current skeleton tree
         current_skeleton_tree = source_state.skeleton_tree
-        shape = source_state.global_rotation.shape[:-1]
-        shape = shape[:-1] + target_tpose.global_rotation.shape[-2:-1]
-        new_global_rotation_output = quat_identity(shape)
-        for current_index, name in enumerate(target_skeleton_tree):
-            while name not in current_skeleton_tree:
-                name = target_skeleton_tree.parent_of(name)
-            parent_index = current_skeleton_tree.index(name)
-            new_global_rotation_output[:, current_index, :] = new_global_rotation[
-                :, parent_index, :
-            ]
+        current_node_names = set(current_skeleton_tree)
+        present_mask = torch.tensor(
+            [name in current_node_names for name in target_skeleton_tree]
+        )
+        nearest_indices = target_skeleton_tree.topology.nearest_ancestors(
+            present_mask, include_self=True
+        )
+        assert bool(
+            (nearest_indices != -1).all()
+        ), "the root of the target skeleton tree is not part of the joint mapping"
+        current_indices = [
+            current_skeleton_tree.index(target_skeleton_tree[target_index])
+            for target_index in nearest_indices.tolist()
+        ]
+        new_global_rotation_output = new_global_rotation[..., current_indices, :]
 
         source_state = SkeletonState.from_rotation_and_root_translation(
             skeleton_tree=target_skeleton_tree,
@@ -1012,11 +1658,45 @@ class SkeletonMotion(SkeletonState):
         self._fps = fps
         super().__init__(tensor_backend, skeleton_tree, is_local, *args, **kwargs)
 
+    def __getitem__(self, index):
+        """index the frames of the motion, see :class:`SkeletonMotionView`
+
+        :rtype: SkeletonMotionView
+        """
+        return SkeletonMotionView(self, index)
+
     def clone(self):
         return SkeletonMotion(
             self.tensor.clone(), self.skeleton_tree, self._is_local, self._fps
         )
 
+    def frame(self, frame_index: int) -> "SkeletonMotionView":
+        """
+        A zero-copy view of a single frame of the motion
+
+        :param frame_index: the index of the frame
+        :type frame_index: int
+        :rtype: SkeletonMotionView
+        """
+        return self[frame_index]
+
+    def window(
+        self, start: Optional[int] = None, end: Optional[int] = None, step: int = 1
+    ) -> "SkeletonMotionView":
+        """
+        A zero-copy view of the frames [start: end: step] of the motion. The fps of the view is
+        the same as the fps of the motion, use `crop()` to get a standalone motion instead.
+
+        :param start: the beginning frame index
+        :type start: int, optional
+        :param end: the ending frame index
+        :type end: int, optional
+        :param step: the stride between two frames
+        :type step: int, optional, default=1
+        :rtype: SkeletonMotionView
+        """
+        return self[start:end:step]
+
     @property
     def invariant_property(self):
         return {
@@ -1147,6 +1827,21 @@ class SkeletonMotion(SkeletonState):
     def from_dict(
         cls: Type["SkeletonMotion"], dict_repr: OrderedDict, *args, **kwargs
     ) -> "SkeletonMotion":
+        if "tensor" in dict_repr:
+            # written by to_packed_dict(), the tensor is used as is
+            return cls(
+                TensorUtils.from_dict(dict_repr["tensor"], *args, **kwargs),
+                skeleton_tree=SkeletonTree.from_dict(
+                    dict_repr["skeleton_tree"], *args, **kwargs
+                ),
+                is_local=dict_repr["is_local"],
+                fps=dict_repr["fps"],
+                copy=False,
+            )
+        if "codes" in dict_repr["rotation"]:
+            # written by to_compact_dict(), the velocities are recomputed
+            skeleton_state = SkeletonState.from_dict(dict_repr, *args, **kwargs)
+            return cls.from_skeleton_state(skeleton_state, fps=dict_repr["fps"])
         rot = TensorUtils.from_dict(dict_repr["rotation"], *args, **kwargs)
         rt = TensorUtils.from_dict(dict_repr["root_translation"], *args, **kwargs)
         vel = TensorUtils.from_dict(dict_repr["global_velocity"], *args, **kwargs)
@@ -1178,6 +1873,22 @@ class SkeletonMotion(SkeletonState):
             ]
         )
 
+    def to_packed_dict(self) -> OrderedDict:
+        packed_dict = super().to_packed_dict()
+        packed_dict["fps"] = self.fps
+        return packed_dict
+
+    def to_compact_dict(self, bits: int = 16, resolution: float = 1e-4) -> OrderedDict:
+        """
+        Same as `SkeletonState.to_compact_dict()`, the velocities are not stored, they are
+        recomputed from the decoded poses by `from_dict()`
+
+        :rtype: OrderedDict
+        """
+        compact_dict = super().to_compact_dict(bits=bits, resolution=resolution)
+        compact_dict["fps"] = self.fps
+        return compact_dict
+
     @classmethod
     def from_fbx(
         cls: Type["SkeletonMotion"],
@@ -1197,7 +1908,9 @@ class SkeletonMotion(SkeletonState):
 
         :param fbx_file_path: the path of the fbx file
         :type fbx_file_path: string
-        :param fbx_configs: the configuration in terms of {"tmp_path": ..., "fbx_py27_path": ...}
+        :param fbx_configs: the configuration in terms of {"fbx_py27_path": ..., "num_workers": ...},
+            the file is read by a pool of `num_workers` python 2.7 processes shared by every call
+            with the same configuration, so that many files can be read in parallel from threads
         :type fbx_configs: dict
         :param skeleton_tree: the optional skeleton tree that the rotation will be applied to
         :type skeleton_tree: SkeletonTree, optional
@@ -1232,21 +1945,98 @@ class SkeletonMotion(SkeletonState):
             skeleton_state = skeleton_state.global_repr()
         return cls.from_skeleton_state(skeleton_state=skeleton_state, fps=fps)
 
+    @classmethod
+    def from_bvh(
+        cls: Type["SkeletonMotion"],
+        bvh_file_path,
+        skeleton_tree=None,
+        is_local=True,
+        fps=None,
+        scale=1.0,
+        *args,
+        **kwargs,
+    ) -> "SkeletonMotion":
+        """
+        Construct a skeleton motion from a bvh file. If the skeleton tree is not given, it is
+        built from the offsets of the hierarchy (End Sites are skipped). The root translation
+        comes from the position channels of the root, the position channels of the other joints
+        are ignored. The euler angles are converted with one batched call per distinct channel
+        order.
+
+        :param bvh_file_path: the path of the bvh file
+        :type bvh_file_path: string
+        :param skeleton_tree: the optional skeleton tree that the rotation will be applied to, its
+            nodes must be in the order of the joints of the file
+        :type skeleton_tree: SkeletonTree, optional
+        :param is_local: the state vector uses local or global rotation as the representation
+        :type is_local: bool, optional, default=True
+        :param fps: the frame rate, 1 / Frame Time of the file if not given
+        :type fps: float, optional
+        :param scale: the factor applied to the offsets and positions, e.g. 0.01 for a file in
+            centimeters to get meters
+        :type scale: float, optional, default=1.0
+        :rtype: SkeletonMotion
+        """
+        joint_names, joint_parents, offsets, channels, motion, frame_time = (
+            bvh_to_array(bvh_file_path)
+        )
+        rotation_columns, position_columns = channel_indices(channels)
+        motion = torch.from_numpy(motion)
+        num_frames = motion.shape[0]
+
+        local_rotation = torch.zeros(
+            num_frames, len(joint_names), 4, dtype=motion.dtype
+        )
+        local_rotation[..., 3] = 1
+        for order, joints in rotation_columns.items():
+            columns = [
+                column for _, joint_columns in joints for column in joint_columns
+            ]
+            # bvh channels are intrinsic rotations, listed from the outermost one
+            local_rotation[:, [joint_index for joint_index, _ in joints]] = (
+                quat_from_euler(
+                    motion[:, columns].reshape(num_frames, len(joints), 3),
+                    order,
+                    degree=True,
+                )
+            )
+        if position_columns is not None:
+            root_translation = motion[:, position_columns] * scale
+        else:
+            root_translation = torch.from_numpy(offsets[0] * scale).expand(
+                num_frames, 3
+            )
+
+        if skeleton_tree is None:
+            skeleton_tree = SkeletonTree(
+                joint_names,
+                torch.from_numpy(np.array(joint_parents, dtype=np.int32)),
+                torch.from_numpy(offsets * scale).float(),
+            )
+        skeleton_state = SkeletonState.from_rotation_and_root_translation(
+            skeleton_tree,
+            r=local_rotation.float(),
+            t=root_translation.float(),
+            is_local=True,
+        )
+        if not is_local:
+            skeleton_state = skeleton_state.global_repr()
+        return cls.from_skeleton_state(
+            skeleton_state=skeleton_state,
+            fps=fps if fps is not None else 1.0 / frame_time,
+        )
+
     @staticmethod
     def _compute_velocity(p, time_delta, guassian_filter=True):
-        velocity = np.gradient(p.numpy(), axis=-3) / time_delta
+        # assume the third last dimension is the time axis
+        velocity = torch.gradient(p, spacing=time_delta, dim=-3)[0]
         if guassian_filter:
-            velocity = torch.from_numpy(
-                filters.gaussian_filter1d(velocity, 2, axis=-3, mode="nearest")
-            ).to(p)
-        else:
-            velocity = torch.from_numpy(velocity).to(p)
-
+            velocity = tensor_gaussian_filter1d(velocity, 2, dim=-3)
         return velocity
 
     @staticmethod
     def _compute_angular_velocity(r, time_delta: float, guassian_filter=True):
-        # assume the second last dimension is the time axis
+        # assume the third last dimension is the time axis
         diff_quat_data = quat_identity_like(r).to(r)
         diff_quat_data[..., :-1, :, :] = quat_mul_norm(
             r[..., 1:, :, :], quat_inverse(r[..., :-1, :, :])
@@ -1254,47 +2044,154 @@ class SkeletonMotion(SkeletonState):
         diff_angle, diff_axis = quat_angle_axis(diff_quat_data)
         angular_velocity = diff_axis * diff_angle.unsqueeze(-1) / time_delta
         if guassian_filter:
-            angular_velocity = torch.from_numpy(
-                filters.gaussian_filter1d(
-                    angular_velocity.numpy(), 2, axis=-3, mode="nearest"
-                ),
-            )
+            angular_velocity = tensor_gaussian_filter1d(angular_velocity, 2, dim=-3)
         return angular_velocity
 
-    def crop(self, start: int, end: int, fps: Optional[int] = None):
+    def dof_pos_and_vel(self, dof_spec: JointDofSpec):
+        """
+        Compute the simulator DOF positions and velocities of the whole motion in one batched
+        pass. A ball joint's position is the exponential map of its local rotation and a hinge's
+        is its projection on the hinge axis. The velocities are the angular velocities of the
+        nodes relative to their parents, in the frame of the nodes (projected on the axis for
+        hinges).
+
+        :param dof_spec: the DOFs of the joints, see `JointDofSpec.from_mjcf()`
+        :type dof_spec: JointDofSpec
+        :rtype: Tuple[Tensor, Tensor]
+        :return: the DOF positions and velocities, both of shape (..., num_dofs)
+        """
+        hinge_indices, ball_indices = dof_spec.node_indices_in(self.skeleton_tree)
+        node_indices = torch.cat([hinge_indices, ball_indices]).to(self.tensor.device)
+        parent_indices = self.skeleton_tree.parent_indices.long().to(
+            node_indices.device
+        )
+        parent_indices = parent_indices[node_indices]
+
+        exp_map = quat_to_exp_map(self.local_rotation[..., node_indices, :])
+        angular_velocity = self.global_angular_velocity
+        relative_angular_velocity = angular_velocity[
+            ..., node_indices, :
+        ] - torch.where(
+            (parent_indices == -1).unsqueeze(-1),
+            torch.zeros_like(angular_velocity[..., node_indices, :]),
+            angular_velocity[..., parent_indices.clamp(min=0), :],
+        )
+        local_angular_velocity = quat_rotate(
+            quat_inverse(self.global_rotation[..., node_indices, :]),
+            relative_angular_velocity,
+        )
+
+        return dof_spec.to_dofs(exp_map), dof_spec.to_dofs(local_angular_velocity)
+
+    def resample(self, fps: Optional[float] = None, times=None):
+        """
+        Resample the motion along its last axis, either at a new frame rate or at explicit query
+        timestamps. Rotations are interpolated with slerp and the root translation linearly, all
+        the output frames are computed in one batched pass. When resampling at a new frame rate
+        the velocities are re-estimated from the resampled poses, the velocities at explicit
+        timestamps (which need not be evenly spaced) are linearly interpolated instead.
+
+        :param fps: number of frames per second in the output. The first output frame is the
+        first frame of the motion and the last one is at or before its end. When `times` is
+        given, this is only stored as the fps of the output (defaults to the mean rate of `times`,
+        which then needs at least two timestamps)
+        :type fps: float, optional
+        :param times: strictly increasing query timestamps in seconds relative to the first frame,
+        they are clamped to the duration of the motion
+        :type times: Tensor or np.ndarray, optional
+        :rtype: SkeletonMotion
+        :raises ValueError: if `times` is not strictly increasing, or has fewer than two
+        timestamps and `fps` is not given
+        """
+        assert fps is not None or times is not None, "either fps or times is required"
+        num_frames = self.shape[-1]
+        device = self.tensor.device
+        if times is None:
+            num_new_frames = (
+                int(math.floor((num_frames - 1) * fps / self.fps + 1e-6)) + 1
+            )
+            frame_positions = torch.arange(
+                num_new_frames, dtype=torch.float64, device=device
+            ) * (self.fps / fps)
+        else:
+            times = torch.as_tensor(times, dtype=torch.float64, device=device)
+            assert times.dim() == 1, "times must be a 1D sequence of timestamps"
+            if not bool((times[1:] > times[:-1]).all()):
+                raise ValueError("times must be strictly increasing")
+            frame_positions = times * self.fps
+            if fps is None:
+                if len(times) < 2:
+                    raise ValueError(
+                        "fps is required to resample at fewer than two timestamps"
+                    )
+                fps = float((len(times) - 1) / (times[-1] - times[0]))
+        frame_positions = frame_positions.clamp(0, num_frames - 1)
+        prev_indices = frame_positions.floor().long().clamp(max=max(num_frames - 2, 0))
+        next_indices = (prev_indices + 1).clamp(max=num_frames - 1)
+        blend = (frame_positions - prev_indices).to(self.tensor.dtype)
+
+        # the frame axis of a per-joint quantity (..., frames, joints, k) is the third last one
+        def gather_frames(x, frame_indices, dim=-3):
+            return x.index_select(x.dim() + dim, frame_indices)
+
+        rotation = quat_slerp(
+            gather_frames(self.rotation, prev_indices),
+            gather_frames(self.rotation, next_indices),
+            blend.unsqueeze(-1),
+        )
+        root_translation = torch.lerp(
+            gather_frames(self.root_translation, prev_indices, dim=-2),
+            gather_frames(self.root_translation, next_indices, dim=-2),
+            blend.unsqueeze(-1),
+        )
+        skeleton_state = SkeletonState.from_rotation_and_root_translation(
+            self.skeleton_tree, r=rotation, t=root_translation, is_local=self.is_local
+        )
+        if times is None:
+            return SkeletonMotion.from_skeleton_state(skeleton_state, fps=fps)
+
+        def lerp_frames(x):
+            return torch.lerp(
+                gather_frames(x, prev_indices),
+                gather_frames(x, next_indices),
+                blend.view(-1, 1, 1),
+            )
+
+        return SkeletonMotion.from_state_vector_and_velocity(
+            skeleton_tree=self.skeleton_tree,
+            state_vector=skeleton_state.tensor,
+            global_velocity=lerp_frames(self.global_velocity),
+            global_angular_velocity=lerp_frames(self.global_angular_velocity),
+            is_local=self.is_local,
+            fps=fps,
+        )
+
+    def crop(self, start: int, end: int, fps: Optional[float] = None):
         """
-        Crop the motion along its last axis. This is equivalent to performing a slicing on the
-        object with [..., start: end: skip_every] where skip_every = old_fps / fps. Note that the
-        new fps provided must be a factor of the original fps.
+        Crop the motion along its last axis. When the new fps is a factor of the original fps,
+        this is equivalent to performing a slicing on the object with [..., start: end: skip_every]
+        where skip_every = old_fps / fps. Any other fps resamples the cropped motion, see
+        `resample()`.
 
         :param start: the beginning frame index
         :type start: int
         :param end: the ending frame index
         :type end: int
         :param fps: number of frames per second in the output (if not given the original fps will be used)
-        :type fps: int, optional
+        :type fps: float, optional
         :rtype: SkeletonMotion
         """
-        if fps is None:
-            new_fps = int(self.fps)
-            old_fps = int(self.fps)
-        else:
-            new_fps = int(fps)
-            old_fps = int(self.fps)
-            assert old_fps % fps == 0, (
-                "the resampling doesn't support fps with non-integer division "
-                "from the original fps: {} => {}".format(old_fps, fps)
-            )
-        skip_every = old_fps // new_fps
+        old_fps = self.fps
+        new_fps = old_fps if fps is None else fps
+        if old_fps % new_fps != 0:
+            return self[..., start:end].resample(fps=new_fps)
+        skip_every = int(old_fps // new_fps)
         s = slice(start, end, skip_every)
         z = self[..., s]
 
-        rot = z.local_rotation if z.is_local else z.global_rotation
-        rt = z.root_translation
-        vel = z.global_velocity
-        avel = z.global_angular_velocity
+        # the view shares storage with the motion, only the cropped frames are copied
         return SkeletonMotion(
-            SkeletonMotion._to_state_vector(rot, rt, vel, avel),
+            z.tensor,
             skeleton_tree=z.skeleton_tree,
             is_local=z.is_local,
             fps=new_fps,
@@ -1408,3 +2305,82 @@ class SkeletonMotion(SkeletonState):
             scale_to_target_skeleton,
             z_up,
         )
+
+
+class SkeletonMotionView(SkeletonMotion):
+    """
+    A frame, a frame range or a strided range of a :class:`SkeletonMotion` that shares storage
+    with the tensor of the motion. Nothing is copied when the view is created: the forward
+    kinematics and every other derived quantity are computed lazily on the viewed frames only,
+    or sliced from the motion if the motion has already computed them. Writing into the view
+    writes into the motion.
+
+    Example:
+        >>> motion = SkeletonMotion.from_file("motion.npy")
+        >>> motion.frame(10).global_translation  # FK of the 10th frame only
+        >>> window = motion.window(100, 200, 2)
+        >>> window.tensor.data_ptr() == motion.tensor[100].data_ptr()
+        True
+    """
+
+    def __init__(self, skeleton_motion: SkeletonMotion, index):
+        """
+        :param skeleton_motion: the motion to view
+        :type skeleton_motion: SkeletonMotion
+        :param index: index of the frames to view (an integer, a slice or a tuple of them)
+        :type index: int, slice or tuple
+        """
+        self._base = skeleton_motion
+        self._base_tensor = skeleton_motion.tensor
+        self._index = SkeletonMotionView._expand_index(
+            index, len(skeleton_motion.shape)
+        )
+        super().__init__(
+            skeleton_motion.tensor[self._index + (slice(None),)],
+            skeleton_motion.skeleton_tree,
+            skeleton_motion.is_local,
+            skeleton_motion.fps,
+            copy=False,
+        )
+
+    @property
+    def base(self):
+        """the motion being viewed
+
+        :rtype: SkeletonMotion
+        """
+        return self._base
+
+    @property
+    def index(self):
+        """the index of the view into the state dimensions of the motion
+
+        :rtype: tuple
+        """
+        return self._index
+
+    @staticmethod
+    def _expand_index(index, state_dim):
+        # replace the ellipsis by explicit slices so that the index can be applied to any value
+        # whose leading dimensions are the state dimensions
+        if not isinstance(index, tuple):
+            index = (index,)
+        assert all(
+            isinstance(i, (int, np.integer, slice, type(Ellipsis))) for i in index
+        ), "only integers, slices and ellipsis are supported by motion views"
+        if Ellipsis in index:
+            position = index.index(Ellipsis)
+            num_expanded = state_dim - (len(index) - 1)
+            index = (
+                index[:position] + (slice(None),) * num_expanded + index[position + 1 :]
+            )
+        assert len(index) <= state_dim, "too many indices for the motion"
+        return index
+
+    def _cached(self, key, compute, intermediate=False):
+        # reuse the values that the viewed motion has already computed
+        if self._base.tensor is self._base_tensor:
+            base_value = self._base.cache.peek(self._base_tensor, key)
+            if base_value is not None:
+                compute = lambda: base_value[self._index]
+        return super()._cached(key, compute, intermediate=intermediate)
@@ -0,0 +1,49 @@
+"""
+Helpers shared by the skeleton tests
+"""
+
+from typing import Optional
+
+from ...core import quat_normalize
+from ..skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+
+import torch
+
+
+def random_motion(
+    skeleton_tree: Optional[SkeletonTree] = None,
+    num_frames: int = 8,
+    fps: int = 30,
+    dtype: torch.dtype = torch.float32,
+    smooth: bool = False,
+    seed: Optional[int] = None,
+) -> SkeletonMotion:
+    """A motion with random local rotations and root translations
+
+    :param skeleton_tree: the skeleton tree, defaults to the example mjcf tree
+    :type skeleton_tree: SkeletonTree, optional
+    :param smooth: a random walk from one frame to the next instead of independent frames, for
+    the tests that interpolate between frames
+    :type smooth: bool, optional
+    :param seed: seeds torch's global generator first if given
+    :type seed: int, optional
+    :rtype: SkeletonMotion
+    """
+    if seed is not None:
+        torch.manual_seed(seed)
+    if skeleton_tree is None:
+        skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    num_joints = skeleton_tree.num_joints
+    if smooth:
+        r = quat_normalize(
+            torch.randn(1, num_joints, 4, dtype=dtype)
+            + 0.1 * torch.randn(num_frames, num_joints, 4, dtype=dtype).cumsum(0)
+        )
+        t = 0.05 * torch.randn(num_frames, 3, dtype=dtype).cumsum(0)
+    else:
+        r = quat_normalize(torch.randn(num_frames, num_joints, 4, dtype=dtype))
+        t = torch.randn(num_frames, 3, dtype=dtype)
+    skeleton_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=True
+    )
+    return SkeletonMotion.from_skeleton_state(skeleton_state, fps=fps)
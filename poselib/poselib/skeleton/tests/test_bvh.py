@@ -0,0 +1,86 @@
+import numpy as np
+import torch
+from scipy.spatial.transform import Rotation
+
+from ..skeleton3d import SkeletonMotion
+
+BVH = """HIERARCHY
+ROOT Hips
+{
+  OFFSET 0.0 90.0 0.0
+  CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation
+  JOINT Chest
+  {
+    OFFSET 0.0 10.0 0.0
+    CHANNELS 3 Zrotation Xrotation Yrotation
+    End Site
+    {
+      OFFSET 0.0 5.0 0.0
+    }
+  }
+  JOINT Left Leg
+  {
+    OFFSET 5.0 0.0 0.0
+    CHANNELS 3 Xrotation Yrotation Zrotation
+    JOINT Foot
+    {
+      OFFSET 0.0 -40.0 0.0
+      CHANNELS 3 Xrotation Yrotation Zrotation
+    }
+  }
+}
+MOTION
+Frames: 3
+Frame Time: 0.0333333
+"""
+
+
+def _write_bvh(path, motion):
+    with open(path, "w") as f:
+        f.write(BVH)
+        for frame in motion:
+            f.write(" ".join("{:.6f}".format(value) for value in frame) + "\n")
+
+
+def _rotate(q, v):
+    return torch.from_numpy(Rotation.from_quat(q.numpy()).apply(v.numpy())).float()
+
+
+def test_from_bvh(tmp_path):
+    rng = np.random.RandomState(0)
+    motion = np.round(rng.uniform(-90, 90, (3, 15)), 6)
+    path = str(tmp_path / "motion.bvh")
+    _write_bvh(path, motion)
+
+    skeleton_motion = SkeletonMotion.from_bvh(path, scale=0.01)
+    skeleton_tree = skeleton_motion.skeleton_tree
+    assert skeleton_tree.node_names == ["Hips", "Chest", "Left Leg", "Foot"]
+    assert skeleton_tree.parent_indices.tolist() == [-1, 0, 0, 2]
+    assert torch.allclose(
+        skeleton_tree.local_translation,
+        torch.tensor([[0, 0.9, 0], [0, 0.1, 0], [0.05, 0, 0], [0, -0.4, 0]]),
+    )
+    assert abs(skeleton_motion.fps - 30) < 1e-3
+    assert torch.allclose(
+        skeleton_motion.root_translation, torch.from_numpy(motion[:, :3] * 0.01).float()
+    )
+
+    # bvh channels are intrinsic rotations, as the uppercase orders of scipy
+    for joint_index, order, columns in (
+        (0, "ZXY", slice(3, 6)),
+        (1, "ZXY", slice(6, 9)),
+        (2, "XYZ", slice(9, 12)),
+        (3, "XYZ", slice(12, 15)),
+    ):
+        expected = torch.from_numpy(
+            Rotation.from_euler(order, motion[:, columns], degrees=True).as_quat()
+        ).float()
+        actual = skeleton_motion.local_rotation[:, joint_index]
+        assert ((actual * expected).sum(dim=-1).abs() > 1 - 1e-6).all()
+
+    expected_chest = skeleton_motion.root_translation + _rotate(
+        skeleton_motion.local_rotation[:, 0], torch.tensor([0, 0.1, 0])
+    )
+    assert torch.allclose(
+        skeleton_motion.global_translation[:, 1], expected_chest, atol=1e-5
+    )
@@ -0,0 +1,98 @@
+from ...core import *
+from ..skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion, JointDofSpec
+
+import pytest
+import torch
+
+_BALL_MJCF = """<mujoco model="arm">
+  <worldbody>
+    <body name="pelvis" pos="0 0 1">
+      <freejoint name="root"/>
+      <body name="chest" pos="0 0 0.3">
+        <joint name="chest_x" type="hinge" axis="1 0 0"/>
+        <joint name="chest_y" type="hinge" axis="0 1 0"/>
+        <joint name="chest_z" type="hinge" axis="0 0 1"/>
+        <body name="head" pos="0 0 0.3"/>
+        <body name="shoulder" pos="0.2 0 0.2">
+          <joint name="shoulder" type="ball"/>
+          <body name="elbow" pos="0.3 0 0">
+            <joint name="elbow" axis="0 1 0"/>
+          </body>
+        </body>
+      </body>
+    </body>
+  </worldbody>
+</mujoco>
+"""
+
+
+def _motion_from_dofs(skeleton_tree, dof_spec, dof_pos, fps=60):
+    # local rotations that realize the given DOF positions
+    num_frames = dof_pos.shape[0]
+    r = quat_identity([num_frames, skeleton_tree.num_joints])
+    hinge_angles = dof_pos[:, dof_spec.dof_offsets[dof_spec.hinge_node_indices]]
+    r[:, dof_spec.hinge_node_indices] = quat_from_angle_axis(
+        hinge_angles, dof_spec.hinge_axes
+    )
+    for node_index in dof_spec.ball_node_indices.tolist():
+        offset = int(dof_spec.dof_offsets[node_index])
+        r[:, node_index] = quat_from_exp_map(dof_pos[:, offset : offset + 3])
+    skeleton_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=torch.zeros(num_frames, 3), is_local=True
+    )
+    return SkeletonMotion.from_skeleton_state(skeleton_state, fps=fps)
+
+
+def test_dof_spec_from_mjcf(tmp_path):
+    dof_spec = JointDofSpec.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    assert dof_spec.num_dofs == 8
+    assert dof_spec.hinge_node_indices.tolist() == [2, 3, 5, 6, 8, 9, 11, 12]
+    assert torch.allclose(
+        dof_spec.hinge_axes[1], torch.tensor([-1.0, 1.0, 0.0]) / 2**0.5
+    )
+
+    path = tmp_path / "arm.xml"
+    path.write_text(_BALL_MJCF)
+    dof_spec = JointDofSpec.from_mjcf(str(path))
+    assert dof_spec.node_names == SkeletonTree.from_mjcf(str(path)).node_names
+    assert dof_spec.dof_sizes == [0, 3, 0, 3, 1]
+    assert dof_spec.dof_offsets.tolist() == [0, 0, 3, 3, 6, 7]
+    # hinge DOFs are computed first, then the ball ones
+    assert dof_spec.dof_order.tolist() == [1, 2, 3, 4, 5, 6, 0]
+
+    path.write_text(_BALL_MJCF.replace('type="ball"', 'type="slide"'))
+    with pytest.raises(ValueError):
+        JointDofSpec.from_mjcf(str(path))
+
+
+def test_dof_pos_and_vel(tmp_path):
+    torch.manual_seed(0)
+    path = tmp_path / "arm.xml"
+    path.write_text(_BALL_MJCF)
+    for mjcf_path in (SkeletonTree.__example_mjcf_path__, str(path)):
+        skeleton_tree = SkeletonTree.from_mjcf(mjcf_path)
+        dof_spec = JointDofSpec.from_mjcf(mjcf_path)
+        # DOFs moving at a constant rate
+        time = torch.arange(60).float().unsqueeze(-1) / 60
+        dof_vel = torch.rand(dof_spec.num_dofs) - 0.5
+        dof_pos = 0.1 + dof_vel * time
+        motion = _motion_from_dofs(skeleton_tree, dof_spec, dof_pos)
+        actual_pos, actual_vel = motion.dof_pos_and_vel(dof_spec)
+        assert actual_pos.shape == actual_vel.shape == (60, dof_spec.num_dofs)
+        assert actual_pos.is_contiguous()
+        assert torch.allclose(actual_pos, dof_pos, atol=1e-5)
+        hinge_dofs = dof_spec.dof_offsets[dof_spec.hinge_node_indices]
+        # away from the clip edges, where the velocity estimation is smoothed
+        assert torch.allclose(
+            actual_vel[10:-10, hinge_dofs], dof_vel[hinge_dofs], atol=1e-3
+        )
+
+    # the nodes are matched by name when the spec covers other nodes than the tree
+    sub_spec = JointDofSpec(
+        ["elbow", "chest"], [1, 3], torch.tensor([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    )
+    hinge_indices, ball_indices = sub_spec.node_indices_in(skeleton_tree)
+    assert hinge_indices.tolist() == [4] and ball_indices.tolist() == [1]
+    sub_pos, sub_vel = motion.dof_pos_and_vel(sub_spec)
+    assert torch.equal(sub_pos, actual_pos[:, [6, 0, 1, 2]])
+    assert torch.equal(sub_vel, actual_vel[:, [6, 0, 1, 2]])
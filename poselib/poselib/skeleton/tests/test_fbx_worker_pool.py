@@ -0,0 +1,142 @@
+import shlex
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ..backend.fbx.fbx_read_wrapper import FbxWorkerPool
+
+# speaks the protocol of `fbx_py27_backend.py --serve` without the fbx SDK: the file path
+# selects the behavior, a number of frames answers with transforms counting up from 0
+STAND_IN_BACKEND = """
+import json
+import sys
+import time
+
+import numpy as np
+
+out = sys.stdout.buffer
+for line in sys.stdin:
+    path = json.loads(line)["fbx_file_path"]
+    if path == "error":
+        out.write(b'{"error": "RuntimeError: No root joint found!! Exiting"}\\n')
+    elif path == "crash":
+        time.sleep(0.5)
+        sys.exit(3)
+    else:
+        num_frames = int(path.split(":")[-1])
+        transforms = np.arange(num_frames * 2 * 16, dtype="<f8")
+        header = {
+            "names": ["root", "child"],
+            "parents": [-1, 0],
+            "fps": 30.0,
+            "dtype": "<f8",
+            "shape": [num_frames, 2, 4, 4],
+        }
+        out.write((json.dumps(header) + "\\n").encode("utf-8"))
+        payload = transforms.tobytes()
+        if path.startswith("truncated"):
+            out.write(payload[: len(payload) // 2])
+            out.flush()
+            sys.exit(3)
+        if path.startswith("slow"):
+            time.sleep(0.5)
+        out.write(payload)
+    out.flush()
+"""
+
+
+def _pool(tmp_path, num_workers):
+    script = tmp_path / "stand_in_backend.py"
+    script.write_text(STAND_IN_BACKEND)
+    command = " ".join(shlex.quote(arg) for arg in (sys.executable, str(script)))
+    return FbxWorkerPool(command, num_workers=num_workers)
+
+
+def _check(output, num_frames):
+    names, parents, transforms, fps = output
+    assert names == ["root", "child"] and parents.tolist() == [-1, 0] and fps == 30.0
+    assert transforms.shape == (num_frames, 2, 4, 4)
+    assert np.array_equal(transforms.reshape(-1), np.arange(num_frames * 32))
+
+
+def _run_in_threads(functions, timeout=30):
+    results = [None] * len(functions)
+
+    def run(i):
+        try:
+            results[i] = functions[i]()
+        except Exception as e:
+            results[i] = e
+
+    threads = [
+        threading.Thread(target=run, args=(i,), daemon=True)
+        for i in range(len(functions))
+    ]
+    for thread in threads:
+        thread.start()
+        # the first call holds the worker, the next ones wait for it
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join(timeout)
+        assert not thread.is_alive(), "a conversion is stuck"
+    return results
+
+
+def test_convert(tmp_path):
+    with _pool(tmp_path, num_workers=2) as pool:
+        for num_frames in (1, 5, 1000):
+            _check(pool.convert("frames:{}".format(num_frames), "", 30), num_frames)
+        results = _run_in_threads(
+            [
+                lambda n=n: pool.convert("frames:{}".format(n), "", 30)
+                for n in range(1, 9)
+            ]
+        )
+        for num_frames, output in enumerate(results, 1):
+            _check(output, num_frames)
+        # workers are only started when no idle one is available
+        assert 1 <= len(pool._workers) <= 2
+
+        # an error response leaves the worker usable
+        with pytest.raises(RuntimeError, match="No root joint found"):
+            pool.convert("error", "", 30)
+        worker = pool._idle[-1]
+        _check(pool.convert("frames:3", "", 30), 3)
+        assert worker in pool._workers
+
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.convert("frames:3", "", 30)
+
+
+def test_crash_mid_response(tmp_path):
+    with _pool(tmp_path, num_workers=1) as pool:
+        with pytest.raises(RuntimeError, match="mid-response"):
+            pool.convert("truncated:100", "", 30)
+        assert len(pool._workers) == 0
+        _check(pool.convert("frames:4", "", 30), 4)
+
+
+def test_crash_while_waiting(tmp_path):
+    with _pool(tmp_path, num_workers=1) as pool:
+        crashed, waited = _run_in_threads(
+            [
+                lambda: pool.convert("crash", "", 30),
+                lambda: pool.convert("frames:6", "", 30),
+            ]
+        )
+        assert isinstance(crashed, RuntimeError) and "exited with code 3" in str(
+            crashed
+        )
+        _check(waited, 6)
+
+
+def test_close_waits_for_conversions(tmp_path):
+    pool = _pool(tmp_path, num_workers=1)
+    converted, _ = _run_in_threads(
+        [lambda: pool.convert("slow:7", "", 30), lambda: pool.close()]
+    )
+    _check(converted, 7)
+    assert len(pool._workers) == 0
@@ -0,0 +1,111 @@
+from ...core import *
+from ..skeleton3d import SkeletonTree, SkeletonState
+
+import torch
+
+
+def _random_state(skeleton_tree, shape, is_local=True):
+    torch.manual_seed(0)
+    r = quat_normalize(torch.randn(*shape, skeleton_tree.num_joints, 4))
+    t = torch.randn(*shape, 3)
+    return SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=is_local
+    )
+
+
+def _loop_global_transformation(skeleton_state):
+    # reference implementation: one transform_mul per joint
+    local_transformation = skeleton_state.local_transformation
+    parent_indices = skeleton_state.skeleton_tree.parent_indices.numpy()
+    global_transformation = []
+    for node_index in range(len(skeleton_state.skeleton_tree)):
+        parent_index = parent_indices[node_index]
+        if parent_index == -1:
+            global_transformation.append(local_transformation[..., node_index, :])
+        else:
+            global_transformation.append(
+                transform_mul(
+                    global_transformation[parent_index],
+                    local_transformation[..., node_index, :],
+                )
+            )
+    return torch.stack(global_transformation, axis=-2)
+
+
+def test_depth_levels():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    depth_levels = skeleton_tree.depth_levels
+    assert len(depth_levels) == 4
+    assert depth_levels[0][0].tolist() == [0]
+    assert depth_levels[1][0].tolist() == [1, 4, 7, 10]
+    assert depth_levels[1][1].tolist() == [0, 0, 0, 0]
+    visited = torch.cat([node_indices for node_indices, _ in depth_levels])
+    assert sorted(visited.tolist()) == list(range(len(skeleton_tree)))
+
+
+def test_local_rotation_from_global():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    for shape in [(), (7,), (3, 5)]:
+        local_state = _random_state(skeleton_tree, shape)
+        global_state = _random_state(skeleton_tree, shape).global_repr()
+        assert not global_state.is_local
+        local_rotation = global_state.local_rotation
+        assert local_rotation.shape == local_state.local_rotation.shape
+        # the root keeps its global rotation untouched
+        assert torch.equal(
+            local_rotation[..., 0, :], global_state.global_rotation[..., 0, :]
+        )
+        for node_index in range(1, len(skeleton_tree)):
+            parent_index = skeleton_tree.parent_indices[node_index]
+            expected = quat_mul_norm(
+                quat_inverse(global_state.global_rotation[..., parent_index, :]),
+                global_state.global_rotation[..., node_index, :],
+            )
+            assert torch.equal(local_rotation[..., node_index, :], expected)
+        assert torch.allclose(local_rotation, local_state.local_rotation, atol=1e-5)
+
+
+def test_local_rotation_keeps_dtype():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    r = quat_normalize(torch.randn(4, skeleton_tree.num_joints, 4, dtype=torch.float64))
+    global_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=torch.zeros(4, 3, dtype=torch.float64), is_local=False
+    )
+    assert global_state.local_rotation.dtype == torch.float64
+
+
+def test_global_transformation_matches_loop():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    for shape in [(), (7,), (3, 5)]:
+        skeleton_state = _random_state(skeleton_tree, shape)
+        expected = _loop_global_transformation(skeleton_state)
+        assert skeleton_state.global_transformation.shape == expected.shape
+        assert torch.equal(skeleton_state.global_transformation, expected)
+
+
+def test_global_translation_backward():
+    # the kernels only write into buffers when given out=, forward kinematics stays
+    # differentiable
+    mjcf_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    # a float64 tree, the local translations of a float32 one would round the root translation
+    skeleton_tree = SkeletonTree(
+        mjcf_tree.node_names,
+        mjcf_tree.parent_indices,
+        mjcf_tree.local_translation.double(),
+    )
+    torch.manual_seed(0)
+    r = quat_normalize(torch.randn(2, skeleton_tree.num_joints, 4, dtype=torch.float64))
+    t = torch.randn(2, 3, dtype=torch.float64)
+
+    def global_translation(r, t):
+        return SkeletonState.from_rotation_and_root_translation(
+            skeleton_tree, r=r, t=t, is_local=True
+        ).global_translation
+
+    assert torch.autograd.gradcheck(
+        global_translation, (r.requires_grad_(), t.requires_grad_())
+    )
+    assert torch.autograd.gradcheck(
+        lambda x: transform_inverse(x),
+        torch.randn(3, 7, dtype=torch.float64).requires_grad_(),
+    )
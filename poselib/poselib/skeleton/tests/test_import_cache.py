@@ -0,0 +1,70 @@
+import os
+
+from ..skeleton3d import SkeletonMotion
+from ..import_cache import ImportCache
+from .common import random_motion
+
+import torch
+
+
+def test_hits_and_misses(tmp_path):
+    torch.manual_seed(0)
+    source = os.path.join(str(tmp_path), "source.npy")
+    random_motion(num_frames=20).to_file(source)
+    cache = ImportCache(os.path.join(str(tmp_path), "cache"))
+    imports = []
+
+    def importer():
+        imports.append(source)
+        return SkeletonMotion.from_file(source)
+
+    motion = cache.get_or_import(source, importer, root_joint="pelvis", fps=30)
+    cached = cache.get_or_import(source, importer, root_joint="pelvis", fps=30)
+    assert len(imports) == 1 and (cache.hits, cache.misses) == (1, 1)
+    assert torch.equal(cached.tensor, motion.tensor) and cached.fps == motion.fps
+    assert cached.skeleton_tree.node_names == motion.skeleton_tree.node_names
+
+    # other parameters, or an edited source, are other entries
+    cache.get_or_import(source, importer, root_joint="pelvis", fps=60)
+    random_motion(num_frames=20).to_file(source)
+    cache.get_or_import(source, importer, root_joint="pelvis", fps=30)
+    assert len(imports) == 3
+    # the digest of the edited source replaced the one of its earlier version
+    assert list(cache._hashes) == [os.path.abspath(source)]
+    # the digests of the source files are kept across instances
+    other = ImportCache(cache.directory)
+    assert other._hashes == cache._hashes
+    assert other.get(other.key(source, root_joint="pelvis", fps=30)) is not None
+
+
+def test_eviction(tmp_path):
+    torch.manual_seed(0)
+    cache = ImportCache(str(tmp_path))
+    motions = [random_motion(num_frames=50) for _ in range(3)]
+    cache.put("a", motions[0])
+    entry_bytes = cache.nbytes()
+    cache = ImportCache(str(tmp_path), max_bytes=2 * entry_bytes)
+    cache.put("b", motions[1])
+    # "a" becomes the most recently used entry
+    os.utime(os.path.join(str(tmp_path), "b.plib"), ns=(0, 0))
+    assert cache.get("a") is not None
+    cache.put("c", motions[2])
+    assert cache.evictions == 1 and cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.nbytes() == 2 * entry_bytes
+    assert "3 hits, 1 misses (75.0% hit rate), 1 evictions" in cache.report()
+
+
+def test_evicted_while_loading(tmp_path, monkeypatch):
+    # another process evicts the entry between its utime() and its loading
+    cache = ImportCache(str(tmp_path))
+    cache.put("a", random_motion(num_frames=10, seed=0))
+    utime = os.utime
+
+    def utime_then_evict(path, *args, **kwargs):
+        utime(path, *args, **kwargs)
+        os.remove(path)
+
+    monkeypatch.setattr(os, "utime", utime_then_evict)
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (0, 1)
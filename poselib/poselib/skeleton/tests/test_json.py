@@ -0,0 +1,66 @@
+import json
+import os
+
+from ..skeleton3d import SkeletonTree, SkeletonMotion
+from .common import random_motion
+
+import pytest
+import torch
+
+
+def test_round_trip(tmp_path):
+    motion = random_motion(seed=0)
+    for sidecar in (False, True):
+        path = os.path.join(str(tmp_path), "motion_{}.json".format(sidecar))
+        motion.to_file(path, sidecar=sidecar)
+        assert os.path.exists(path + ".bin") == sidecar
+        with open(path) as f:
+            rotation = json.load(f)["rotation"]["arr"]
+        assert rotation["dtype"] == "<f4" and rotation["shape"] == [8, 13, 4]
+        loaded = SkeletonMotion.from_file(path)
+        assert loaded.fps == motion.fps and loaded.is_local == motion.is_local
+        assert torch.equal(loaded.tensor, motion.tensor)
+        assert loaded.skeleton_tree.node_names == motion.skeleton_tree.node_names
+
+
+def test_list_format(tmp_path):
+    # files written before the arrays were stored as base64 strings
+    skeleton_tree = random_motion(seed=0).skeleton_tree
+
+    def _array(x):
+        return {"__ndarray__": x.tolist(), "dtype": str(x.dtype), "shape": x.shape}
+
+    d = {
+        "node_names": skeleton_tree.node_names,
+        "parent_indices": {
+            "arr": _array(skeleton_tree.parent_indices.numpy()),
+            "context": {"dtype": "int64"},
+        },
+        "local_translation": {
+            "arr": _array(skeleton_tree.local_translation.numpy()),
+            "context": {"dtype": "float32"},
+        },
+        "__name__": "SkeletonTree",
+    }
+    path = os.path.join(str(tmp_path), "skeleton_tree.json")
+    with open(path, "w") as f:
+        json.dump(d, f)
+    loaded = SkeletonTree.from_file(path)
+    assert torch.equal(loaded.parent_indices, skeleton_tree.parent_indices)
+    assert torch.equal(loaded.local_translation, skeleton_tree.local_translation)
+
+
+def test_sidecar_name(tmp_path):
+    motion = random_motion(seed=0)
+    path = os.path.join(str(tmp_path), "motion.json")
+    motion.to_file(path, sidecar=True)
+    # the json file points to its sidecar by the name recorded when it was written
+    os.makedirs(os.path.join(str(tmp_path), "renamed"))
+    renamed = os.path.join(str(tmp_path), "renamed", "clip.json")
+    os.rename(path, renamed)
+    os.rename(path + ".bin", os.path.join(str(tmp_path), "renamed", "motion.json.bin"))
+    assert torch.equal(SkeletonMotion.from_file(renamed).tensor, motion.tensor)
+
+    os.remove(os.path.join(str(tmp_path), "renamed", "motion.json.bin"))
+    with pytest.raises(FileNotFoundError, match="motion.json.bin"):
+        SkeletonMotion.from_file(renamed)
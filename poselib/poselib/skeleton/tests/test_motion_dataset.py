@@ -0,0 +1,71 @@
+import os
+
+from ..skeleton3d import SkeletonTree
+from ..motion_dataset import MotionDataset, MotionDatasetWriter, skeleton_tree_hash
+from .common import random_motion
+
+import torch
+
+
+def test_write_and_read(tmp_path):
+    torch.manual_seed(0)
+    directory = os.path.join(str(tmp_path), "dataset")
+    ant = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    chain = SkeletonTree(["a", "b", "c"], torch.tensor([-1, 0, 1]), torch.rand(3, 3))
+    motions = [
+        random_motion(ant, 10, 30),
+        random_motion(chain, 5, 60, dtype=torch.float64),
+        random_motion(ant, 7, 30),
+    ]
+    # two shards: the first clip goes alone into a shard (a 1 byte limit flushes it right away),
+    # a second writer reopens the dataset and puts the last two clips together in a second shard
+    with MotionDatasetWriter(directory, max_shard_bytes=1) as writer:
+        assert writer.append(motions[0]) == 0
+    with MotionDatasetWriter(directory, max_shard_bytes=1 << 20) as writer:
+        assert writer.append(motions[1]) == 1
+        assert writer.append(motions[2]) == 2
+    assert len(os.listdir(directory)) == 2
+
+    dataset = MotionDataset(directory)
+    assert len(dataset) == 3
+    assert dataset.index["length"].tolist() == [10, 5, 7]
+    assert dataset.index["fps"].tolist() == [30, 60, 30]
+    assert set(dataset.skeleton_trees) == {
+        skeleton_tree_hash(ant),
+        skeleton_tree_hash(chain),
+    }
+    for clip_id, motion in enumerate(motions):
+        clip = dataset[clip_id]
+        assert clip.fps == motion.fps and clip.is_local == motion.is_local
+        assert clip.skeleton_tree.node_names == motion.skeleton_tree.node_names
+        assert clip.tensor.dtype == motion.tensor.dtype
+        assert torch.equal(clip.tensor, motion.tensor)
+    assert dataset[0].skeleton_tree is dataset[2].skeleton_tree
+
+    window = dataset.clip(2, start=2, end=5)
+    assert torch.equal(window.tensor, motions[2].tensor[2:5])
+    assert len(dataset.clip(2, start=5, end=3)) == 0
+    assert torch.equal(dataset[-1].tensor, motions[2].tensor)
+
+
+def test_reopen_after_removing_a_shard(tmp_path):
+    torch.manual_seed(0)
+    directory = os.path.join(str(tmp_path), "dataset")
+    motions = [random_motion(num_frames=n) for n in (4, 5, 6, 7)]
+    with MotionDatasetWriter(directory, max_shard_bytes=1) as writer:
+        for motion in motions[:3]:
+            writer.append(motion)
+    os.remove(os.path.join(directory, "shard_00000.plib"))
+    with open(os.path.join(directory, "shard_00002.plib"), "rb") as f:
+        last_shard = f.read()
+
+    # the new shard and clip ids come after the last ones, no shard is replaced
+    with MotionDatasetWriter(directory, max_shard_bytes=1) as writer:
+        assert writer.append(motions[3]) == 3
+    assert sorted(os.listdir(directory)) == [
+        "shard_00001.plib",
+        "shard_00002.plib",
+        "shard_00003.plib",
+    ]
+    with open(os.path.join(directory, "shard_00002.plib"), "rb") as f:
+        assert f.read() == last_shard
@@ -0,0 +1,80 @@
+from ..skeleton3d import SkeletonTree, JointDofSpec
+from ..motion_lib import MotionLibrary
+from ...core.tests.common import same_rotation
+from .common import random_motion
+
+import torch
+
+
+def test_packing():
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    motions = [random_motion(skeleton_tree, n, 30, smooth=True) for n in (10, 2, 25)]
+    library = MotionLibrary(motions)
+    assert len(library) == 3 and library.num_frames == 37
+    assert library.motion_offsets.tolist() == [0, 10, 12]
+    assert library.motion_durations.tolist() == [9 / 30, 1 / 30, 24 / 30]
+
+    # the times are clamped to the motion
+    state = library.sample(torch.tensor([1, 1]), torch.tensor([-1.0, 5.0]))
+    assert torch.allclose(state.root_translation, motions[1].root_translation)
+    assert same_rotation(state.local_rotation, motions[1].local_rotation, atol=1e-5)
+
+
+def test_sample_matches_resample():
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    dof_spec = JointDofSpec.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    motions = [
+        random_motion(skeleton_tree, 40, 30, smooth=True),
+        random_motion(skeleton_tree, 33, 60, smooth=True),
+    ]
+    library = MotionLibrary(motions, dof_spec=dof_spec)
+
+    motion_ids = torch.tensor([0, 1, 1, 0, 1])
+    times = torch.tensor([0.1, 0.013, 0.5, 1.3, -1.0])
+    state = library.sample(motion_ids, times)
+    assert state.local_rotation.shape == (5, skeleton_tree.num_joints, 4)
+    assert state.dof_pos.shape == state.dof_vel.shape == (5, dof_spec.num_dofs)
+    for i, (motion_id, time) in enumerate(zip(motion_ids, times)):
+        motion = motions[motion_id]
+        expected = motion.resample(times=time.clamp(min=0).view(1), fps=motion.fps)
+        assert same_rotation(
+            state.local_rotation[i], expected.local_rotation[0], atol=1e-5
+        )
+        assert same_rotation(
+            state.root_rotation[i], expected.local_rotation[0, 0], atol=1e-5
+        )
+        assert torch.allclose(state.root_translation[i], expected.root_translation[0])
+        assert torch.allclose(
+            state.root_velocity[i], expected.global_root_velocity[0], atol=1e-5
+        )
+        assert torch.allclose(
+            state.root_angular_velocity[i],
+            expected.global_root_angular_velocity[0],
+            atol=1e-5,
+        )
+        dof_pos, dof_vel = expected.dof_pos_and_vel(dof_spec)
+        assert torch.allclose(state.dof_pos[i], dof_pos[0], atol=1e-5)
+
+    # at the frames themselves, the DOFs are the ones of the motion
+    dof_pos, dof_vel = motions[1].dof_pos_and_vel(dof_spec)
+    state = library.sample(torch.ones(33, dtype=torch.long), torch.arange(33) / 60)
+    assert torch.allclose(state.dof_pos, dof_pos, atol=1e-5)
+    assert torch.allclose(state.dof_vel, dof_vel, atol=1e-5)
+
+
+def test_weighted_sampling():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    motions = [
+        random_motion(skeleton_tree, 10 * (i + 1), 30, smooth=True) for i in range(3)
+    ]
+    library = MotionLibrary(motions, weights=[1.0, 0.0, 3.0])
+    generator = torch.Generator().manual_seed(0)
+    motion_ids = library.sample_motions(10000, generator=generator)
+    counts = torch.bincount(motion_ids, minlength=3)
+    assert counts[1] == 0
+    assert abs(counts[2] / counts[0] - 3.0) < 0.3
+    times = library.sample_times(motion_ids, generator=generator)
+    assert bool((times >= 0).all())
+    assert bool((times <= library.motion_durations[motion_ids]).all())
@@ -0,0 +1,56 @@
+from ..skeleton3d import SkeletonMotion, SkeletonMotionView
+from .common import random_motion
+
+import torch
+
+
+def test_views_share_storage():
+    motion = random_motion(num_frames=40, seed=0)
+    frame = motion.frame(5)
+    assert isinstance(frame, SkeletonMotionView)
+    assert frame.shape == ()
+    assert frame.tensor.data_ptr() == motion.tensor[5].data_ptr()
+
+    window = motion.window(10, 30, 2)
+    assert len(window) == 10
+    assert window.fps == motion.fps
+    assert window.tensor.data_ptr() == motion.tensor[10].data_ptr()
+    assert torch.equal(window.global_velocity, motion.global_velocity[10:30:2])
+
+    assert torch.equal(motion[..., 3:7].tensor, motion.tensor[3:7])
+
+
+def test_view_forward_kinematics():
+    motion = random_motion(num_frames=40, seed=0)
+    window = motion.window(10, 30, 3)
+    expected = motion.clone().global_translation[10:30:3]
+    assert torch.equal(window.global_translation, expected)
+    assert torch.equal(motion.frame(7).global_rotation, motion.global_rotation[7])
+
+
+def test_view_reuses_motion_cache():
+    motion = random_motion(num_frames=40, seed=0)
+    global_transformation = motion.global_transformation
+    window = motion.window(0, 20, 2)
+    assert window.global_transformation.data_ptr() == global_transformation.data_ptr()
+    # writes through the view invalidate both the view and the motion
+    root_offset = motion.num_joints * 4
+    window.tensor[..., root_offset : root_offset + 3] += 1.0
+    assert torch.allclose(
+        window.global_translation,
+        global_transformation[0:20:2, :, 4:] + 1.0,
+        atol=1e-6,
+    )
+    assert torch.allclose(
+        motion.global_translation[0:20:2], window.global_translation, atol=1e-6
+    )
+
+
+def test_crop():
+    motion = random_motion(num_frames=40, seed=0)
+    cropped = motion.crop(4, 24, fps=15)
+    assert type(cropped) == SkeletonMotion
+    assert cropped.fps == 15
+    assert len(cropped) == 10
+    assert torch.equal(cropped.tensor, motion.tensor[4:24:2])
+    assert cropped.tensor.data_ptr() != motion.tensor.data_ptr()
@@ -0,0 +1,83 @@
+import os
+
+from ...core.backend import ArrayInfo
+from ..skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+from .common import random_motion
+
+import numpy as np
+import torch
+
+
+def test_round_trip(tmp_path):
+    motion = random_motion(seed=0)
+    objects = [motion.skeleton_tree, SkeletonState.zero_pose(motion.skeleton_tree)]
+    objects.append(motion)
+    for obj in objects:
+        path = os.path.join(str(tmp_path), type(obj).__name__ + ".plib")
+        obj.to_file(path)
+        loaded = type(obj).from_file(path)
+        assert loaded.to_dict().keys() == obj.to_dict().keys()
+        if isinstance(obj, SkeletonTree):
+            assert loaded.node_names == obj.node_names
+            assert torch.equal(loaded.parent_indices, obj.parent_indices)
+            assert torch.equal(loaded.local_translation, obj.local_translation)
+        else:
+            assert loaded.is_local == obj.is_local
+            assert torch.equal(loaded.tensor, obj.tensor)
+    assert loaded.fps == motion.fps
+
+
+def test_memory_mapped(tmp_path):
+    motion = random_motion(seed=0)
+    path = os.path.join(str(tmp_path), "motion.plib")
+    motion.to_file(path)
+    with open(path, "rb") as f:
+        assert f.read(4) == b"PLIB"
+    loaded = SkeletonMotion.from_file(path)
+    # the state tensor is an aligned block of the mapping, not a copy made by from_dict()
+    assert loaded.tensor.data_ptr() % 64 == 0
+    # the mapping is copy-on-write: modifying the motion does not modify the file
+    loaded.tensor.zero_()
+    assert torch.equal(SkeletonMotion.from_file(path).tensor, motion.tensor)
+
+
+def test_read_file_header(tmp_path):
+    motion = random_motion(seed=0)
+    for extension in (".plib", ".npy"):
+        path = os.path.join(str(tmp_path), "motion" + extension)
+        motion.to_file(path)
+        header = SkeletonMotion.read_file_header(path)
+        assert header["__name__"] == "SkeletonMotion" and header["fps"] == 30
+        assert header["skeleton_tree"]["node_names"] == motion.skeleton_tree.node_names
+        rotation = header["tensor" if extension == ".plib" else "rotation"]["arr"]
+        assert isinstance(rotation, ArrayInfo) and rotation.dtype == np.float32
+
+        stats = SkeletonMotion.read_file_stats(path, chunk_size=100)
+        translation = motion.skeleton_tree.local_translation
+        assert stats["skeleton_tree/local_translation/arr"]["max"] == translation.max()
+        assert np.isclose(
+            stats["skeleton_tree/local_translation/arr"]["mean"], translation.mean()
+        )
+    assert header["rotation"]["arr"].shape == tuple(motion.rotation.shape)
+
+
+def test_compact(tmp_path):
+    motion = random_motion(seed=0)
+    for extension in (".plib", ".npy"):
+        path = os.path.join(str(tmp_path), "compact" + extension)
+        motion.to_file(path, compact=True, resolution=1e-5)
+        header = SkeletonMotion.read_file_header(path)
+        assert "global_velocity" not in header
+        assert header["rotation"]["codes"].dtype == np.uint16
+        loaded = SkeletonMotion.from_file(path)
+        assert loaded.tensor.dtype == motion.tensor.dtype and loaded.fps == motion.fps
+        assert (loaded.root_translation - motion.root_translation).abs().max() <= 5e-6
+        q, decoded = motion.local_rotation, loaded.local_rotation
+        sign = torch.sign((q * decoded).sum(dim=-1, keepdim=True))
+        assert (decoded * sign - q).abs().max() < 4e-5
+        # the velocities are recomputed from the decoded poses
+        recomputed = SkeletonMotion._compute_velocity(
+            loaded.global_translation, 1 / motion.fps
+        )
+        assert torch.equal(loaded.global_velocity, recomputed)
+        assert torch.allclose(loaded.global_velocity, motion.global_velocity, atol=1e-3)
@@ -0,0 +1,80 @@
+from ..skeleton3d import SkeletonMotion
+from ...core.tests.common import same_rotation
+from .common import random_motion
+
+import numpy as np
+import pytest
+import torch
+from scipy.spatial.transform import Rotation, Slerp
+
+
+def test_resample_at_integer_ratio_matches_crop():
+    motion = random_motion(num_frames=49, fps=240, smooth=True, seed=0)
+    resampled = motion.resample(fps=80)
+    cropped = motion.crop(0, len(motion), fps=80)
+    assert resampled.fps == 80
+    assert len(resampled) == len(cropped) == 17
+    assert same_rotation(resampled.local_rotation, cropped.local_rotation, atol=1e-5)
+    assert torch.allclose(
+        resampled.root_translation, cropped.root_translation, atol=1e-6
+    )
+
+
+def test_resample_matches_scipy_slerp():
+    motion = random_motion(num_frames=49, fps=240, smooth=True, seed=0)
+    resampled = motion.crop(0, len(motion), fps=50)
+    assert resampled.fps == 50
+    # 48 frames at 240 Hz last 0.2 s, i.e. 10 intervals at 50 Hz
+    assert len(resampled) == 11
+
+    source_times = np.arange(len(motion)) / 240
+    target_times = np.arange(len(resampled)) / 50
+    for joint_index in range(motion.num_joints):
+        slerp = Slerp(
+            source_times,
+            Rotation.from_quat(motion.local_rotation[:, joint_index].numpy()),
+        )
+        expected = torch.from_numpy(slerp(target_times).as_quat()).float()
+        assert same_rotation(
+            resampled.local_rotation[:, joint_index], expected, atol=1e-5
+        )
+    for axis in range(3):
+        expected = np.interp(
+            target_times, source_times, motion.root_translation[:, axis].numpy()
+        )
+        assert np.allclose(
+            resampled.root_translation[:, axis].numpy(), expected, atol=1e-6
+        )
+    assert torch.allclose(
+        resampled.global_velocity,
+        SkeletonMotion._compute_velocity(resampled.global_translation, 1 / 50),
+    )
+
+
+def test_resample_at_timestamps():
+    motion = random_motion(num_frames=49, fps=240, smooth=True, seed=0)
+    times = torch.tensor([0.0, 2.5 / 240, 0.0125, 0.1, 1.0])
+    resampled = motion.resample(times=times)
+    assert len(resampled) == len(times)
+    assert same_rotation(
+        resampled.local_rotation[0], motion.local_rotation[0], atol=1e-5
+    )
+    # the timestamps past the end of the motion are clamped
+    assert same_rotation(
+        resampled.local_rotation[-1], motion.local_rotation[-1], atol=1e-5
+    )
+    # 2.5 / 240 s is halfway between the frames 2 and 3, 0.0125 s is the frame 3
+    expected = 0.5 * (motion.global_velocity[2] + motion.global_velocity[3])
+    assert torch.allclose(resampled.global_velocity[1], expected, atol=1e-4)
+    assert torch.allclose(
+        resampled.global_velocity[2], motion.global_velocity[3], atol=1e-4
+    )
+
+
+def test_resample_at_invalid_timestamps():
+    motion = random_motion(num_frames=10, seed=0)
+    for times in ([0.1, 0.1, 0.2], [0.2, 0.1], [0.05]):
+        with pytest.raises(ValueError):
+            motion.resample(times=torch.tensor(times))
+    # an explicit fps does not depend on the span of the timestamps
+    assert motion.resample(times=torch.tensor([0.05]), fps=30).fps == 30
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+
+from ..skeleton3d import SkeletonTree
+from ..shared_motion import SharedMotionDataset
+from .common import random_motion
+
+import torch
+
+
+def _motions():
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    return [random_motion(skeleton_tree, n, fps) for n, fps in ((10, 30), (4, 60))]
+
+
+def _check(dataset, motions):
+    assert len(dataset) == len(motions)
+    for shared, motion in zip(dataset, motions):
+        assert shared.fps == motion.fps and shared.is_local == motion.is_local
+        assert shared.skeleton_tree.node_names == motion.skeleton_tree.node_names
+        assert torch.equal(shared.tensor, motion.tensor)
+        assert torch.allclose(shared.global_translation, motion.global_translation)
+    # the motions share their skeleton tree and so do the attached ones
+    assert dataset[0].skeleton_tree is dataset[1].skeleton_tree
+
+
+def _check_no_copy(dataset):
+    start = dataset._buffer.ctypes.data
+    for motion in dataset:
+        assert start <= motion.tensor.data_ptr() < start + dataset.nbytes
+        assert motion.tensor.data_ptr() % 64 == 0
+
+
+def _attach_in_worker(name, queue):
+    dataset = SharedMotionDataset.attach(name=name)
+    queue.put(dataset[1].global_translation.sum().item())
+    dataset.close()
+
+
+def test_shared_memory():
+    motions = _motions()
+    dataset = SharedMotionDataset.create(motions)
+    try:
+        attached = SharedMotionDataset.attach(name=dataset.name)
+        _check(attached, motions)
+        _check_no_copy(attached)
+        attached.close()
+
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        worker = context.Process(target=_attach_in_worker, args=(dataset.name, queue))
+        worker.start()
+        result = queue.get(timeout=60)
+        worker.join()
+        assert worker.exitcode == 0
+        assert abs(result - motions[1].global_translation.sum().item()) < 1e-3
+    finally:
+        dataset.close()
+        dataset.unlink()
+
+
+def test_close_with_motions_referenced():
+    motions = _motions()
+    dataset = SharedMotionDataset.create(motions)
+    try:
+        # released before closing
+        attached = SharedMotionDataset.attach(name=dataset.name)
+        assert torch.equal(attached[0].tensor, motions[0].tensor)
+        assert attached.close()
+
+        # closed while a motion is still referenced: the segment stays mapped until it is
+        # released and the dataset is closed again
+        attached = SharedMotionDataset.attach(name=dataset.name)
+        motion = attached[1]
+        assert not attached.close()
+        assert torch.equal(motion.global_translation, motions[1].global_translation)
+        del motion
+        assert attached.close()
+    finally:
+        assert dataset.close()
+        dataset.unlink()
+
+
+def test_attach_in_creator(monkeypatch):
+    # the resource tracker of the creator keeps the segment registered, so that `unlink()`
+    # unregisters it and a segment leaked by the creator is still reported
+    unregistered = []
+    monkeypatch.setattr(
+        "multiprocessing.resource_tracker.unregister",
+        lambda name, rtype: unregistered.append(name),
+    )
+    dataset = SharedMotionDataset.create(_motions())
+    attached = SharedMotionDataset.attach(name=dataset.name)
+    assert unregistered == []
+    attached.close()
+    dataset.close()
+    monkeypatch.undo()
+    dataset.unlink()
+
+
+def test_memory_mapped_file(tmp_path):
+    motions = _motions()
+    path = os.path.join(str(tmp_path), "motions.bin")
+    SharedMotionDataset.create(motions, path=path)
+    dataset = SharedMotionDataset.attach(path=path)
+    assert dataset.name is None and dataset.path == path
+    _check(dataset, motions)
+    _check_no_copy(dataset)
@@ -0,0 +1,67 @@
+from ...core import *
+from ..skeleton3d import SkeletonTree, SkeletonState
+
+import torch
+
+
+def _random_state(shape=(6,)):
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    r = quat_normalize(torch.randn(*shape, skeleton_tree.num_joints, 4))
+    t = torch.randn(*shape, 3)
+    return SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=True
+    )
+
+
+def test_cache_hits_and_misses():
+    skeleton_state = _random_state()
+    cache = skeleton_state.cache
+    global_translation = skeleton_state.global_translation
+    misses = cache.misses
+    assert misses > 0
+    assert skeleton_state.global_translation is global_translation
+    assert cache.misses == misses
+    assert cache.hits > 0
+    cache.reset_counters()
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_invalidated_by_reassignment():
+    skeleton_state = _random_state()
+    other_state = _random_state(shape=(3,))
+    first = skeleton_state.global_translation.clone()
+    skeleton_state.tensor = other_state.tensor
+    assert "global_translation" not in skeleton_state.cache
+    assert (
+        skeleton_state.global_translation.shape == other_state.global_translation.shape
+    )
+    assert torch.equal(
+        skeleton_state.global_translation, other_state.global_translation
+    )
+    assert not torch.equal(skeleton_state.global_translation[:3], first[:3])
+
+
+def test_cache_invalidated_by_inplace_mutation():
+    skeleton_state = _random_state()
+    global_translation = skeleton_state.global_translation.clone()
+    skeleton_state.tensor[..., -3:] += 1.0
+    assert torch.allclose(
+        skeleton_state.global_translation, global_translation + 1.0, atol=1e-6
+    )
+
+
+def test_evict_intermediates():
+    skeleton_state = _random_state()
+    skeleton_state.global_translation
+    assert "local_transformation" in skeleton_state.cache
+    skeleton_state.cache.evict_intermediates()
+    assert "local_transformation" not in skeleton_state.cache
+    assert "global_transformation" in skeleton_state.cache
+
+    skeleton_state = _random_state()
+    skeleton_state.cache.retain_intermediates = False
+    skeleton_state.global_rotation
+    assert "local_transformation" not in skeleton_state.cache
+    assert "local_translation" not in skeleton_state.cache
+    assert "global_rotation" in skeleton_state.cache
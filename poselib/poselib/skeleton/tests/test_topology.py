@@ -0,0 +1,87 @@
+from ..skeleton3d import SkeletonTree, SkeletonState
+
+import pytest
+import torch
+
+
+def _loop_drop_nodes_by_names(skeleton_tree, node_names):
+    # reference implementation: walk up the parents one by one
+    parent_indices = skeleton_tree.parent_indices.numpy()
+    new_node_names, new_parent_indices, new_local_translation = [], [], []
+    for node_index in range(len(skeleton_tree)):
+        if skeleton_tree[node_index] in node_names:
+            continue
+        tb_node_index = parent_indices[node_index]
+        local_translation = skeleton_tree.local_translation[node_index, :].clone()
+        while tb_node_index != -1 and skeleton_tree[tb_node_index] in node_names:
+            local_translation += skeleton_tree.local_translation[tb_node_index, :]
+            tb_node_index = parent_indices[tb_node_index]
+        new_node_names.append(skeleton_tree[node_index])
+        new_local_translation.append(local_translation)
+        new_parent_indices.append(
+            -1
+            if tb_node_index == -1
+            else new_node_names.index(skeleton_tree[tb_node_index])
+        )
+    return new_node_names, new_parent_indices, torch.stack(new_local_translation)
+
+
+def test_topology():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    topology = skeleton_tree.topology
+    assert skeleton_tree.topology is topology
+    assert len(topology) == len(skeleton_tree)
+    assert topology.depth.tolist() == [0, 1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2, 3]
+    assert topology.children(0).tolist() == [1, 4, 7, 10]
+    assert topology.children(4).tolist() == [5]
+    assert topology.children(12).tolist() == []
+    assert topology.root_paths[6] == (0, 4, 5, 6)
+    assert topology.ancestor_mask[6].nonzero().flatten().tolist() == [0, 4, 5]
+    assert not bool(topology.ancestor_mask[0].any())
+    child_indices, parent_indices = topology.bone_indices
+    assert child_indices.tolist() == list(range(1, len(skeleton_tree)))
+    assert torch.equal(parent_indices, skeleton_tree.parent_indices[1:])
+
+
+def test_nearest_ancestors():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    node_mask = torch.zeros(len(skeleton_tree), dtype=torch.bool)
+    node_mask[[0, 2]] = True
+    nearest = skeleton_tree.topology.nearest_ancestors(node_mask)
+    assert nearest.tolist() == [-1, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    nearest = skeleton_tree.topology.nearest_ancestors(node_mask, include_self=True)
+    assert nearest.tolist() == [0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def test_drop_nodes_by_names_matches_loop():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    original_local_translation = skeleton_tree.local_translation.clone()
+    node_names = ["front_left_leg", "aux_1", "aux_3", "right_back_foot"]
+    new_skeleton_tree = skeleton_tree.drop_nodes_by_names(node_names)
+    names, parents, local_translation = _loop_drop_nodes_by_names(
+        skeleton_tree, node_names
+    )
+    assert new_skeleton_tree.node_names == names
+    assert new_skeleton_tree.parent_indices.tolist() == parents
+    assert torch.allclose(new_skeleton_tree.local_translation, local_translation)
+    # the source tree must not be modified
+    assert torch.equal(skeleton_tree.local_translation, original_local_translation)
+
+    with pytest.raises(AssertionError):
+        skeleton_tree.drop_nodes_by_names(["torso"])
+
+
+def test_drop_nodes_with_pairwise_translation():
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    zero_pose = SkeletonState.zero_pose(skeleton_tree)
+    pairwise_translation = zero_pose._get_pairwise_average_translation()
+    new_skeleton_tree = skeleton_tree.keep_nodes_by_names(
+        ["torso", "aux_1", "front_left_foot"], pairwise_translation
+    )
+    assert new_skeleton_tree.node_names == ["torso", "aux_1", "front_left_foot"]
+    assert new_skeleton_tree.parent_indices.tolist() == [-1, 0, 1]
+    assert torch.allclose(
+        new_skeleton_tree.local_translation,
+        torch.tensor([[0.0, 0.0, 0.75], [0.2, 0.2, 0.0], [0.2, 0.2, 0.0]]),
+        atol=1e-6,
+    )
@@ -0,0 +1,64 @@
+from ...core import *
+from ..skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+
+import numpy as np
+import torch
+from scipy.ndimage import gaussian_filter1d
+
+
+def _random_state(num_frames, dtype=torch.float32):
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    # a smooth random walk so that the finite differences are meaningful
+    r = quat_normalize(
+        torch.randn(1, skeleton_tree.num_joints, 4)
+        + 0.05 * torch.randn(num_frames, skeleton_tree.num_joints, 4).cumsum(0)
+    )
+    t = 0.05 * torch.randn(num_frames, 3).cumsum(0)
+    return SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r.to(dtype), t=t.to(dtype), is_local=True
+    )
+
+
+def _scipy_velocity(p, time_delta):
+    velocity = np.gradient(p.numpy(), axis=-3) / time_delta
+    return gaussian_filter1d(velocity, 2, axis=-3, mode="nearest")
+
+
+def test_gaussian_filter1d():
+    x = torch.randn(3, 50, 4, dtype=torch.float64)
+    for sigma in (0.5, 2, 3.3):
+        expected = gaussian_filter1d(x.numpy(), sigma, axis=1, mode="nearest")
+        actual = tensor_gaussian_filter1d(x, sigma, dim=1)
+        assert actual.dtype == x.dtype
+        assert np.allclose(actual.numpy(), expected, atol=1e-12)
+    # shorter than the kernel radius
+    x = torch.randn(3, 4)
+    expected = gaussian_filter1d(x.numpy(), 2, axis=-1, mode="nearest")
+    assert np.allclose(tensor_gaussian_filter1d(x, 2).numpy(), expected, atol=1e-6)
+
+
+def test_velocity_matches_scipy():
+    skeleton_state = _random_state(120)
+    motion = SkeletonMotion.from_skeleton_state(skeleton_state, fps=30)
+    expected = _scipy_velocity(skeleton_state.global_translation, 1 / 30)
+    assert motion.global_velocity.dtype == torch.float32
+    assert np.allclose(motion.global_velocity.numpy(), expected, atol=1e-4)
+
+    r = skeleton_state.global_rotation
+    diff_quat_data = quat_identity_like(r)
+    diff_quat_data[:-1] = quat_mul_norm(r[1:], quat_inverse(r[:-1]))
+    diff_angle, diff_axis = quat_angle_axis(diff_quat_data)
+    angular_velocity = (diff_axis * diff_angle.unsqueeze(-1) * 30).numpy()
+    expected = gaussian_filter1d(angular_velocity, 2, axis=-3, mode="nearest")
+    assert np.allclose(motion.global_angular_velocity.numpy(), expected, atol=1e-4)
+
+
+def test_velocity_batched_and_dtype():
+    skeleton_state = _random_state(60, dtype=torch.float64)
+    p = skeleton_state.global_translation
+    batched = torch.stack((p, 2 * p))
+    velocity = SkeletonMotion._compute_velocity(batched, 1 / 30)
+    assert velocity.dtype == torch.float64
+    assert np.allclose(velocity[0].numpy(), _scipy_velocity(p, 1 / 30))
+    assert np.allclose(velocity[1].numpy(), _scipy_velocity(2 * p, 1 / 30))
@@ -51,14 +51,10 @@ class Draw3DSkeletonState(BasePlotterTask):
             len(skeleton_state.tensor.shape) == 1
         ), "the state has to be zero dimensional"
         dots = skeleton_state.global_translation.numpy()
-        skeleton_tree = skeleton_state.skeleton_tree
-        parent_indices = skeleton_tree.parent_indices.numpy()
-        lines = []
-        for node_index in range(len(skeleton_tree)):
-            parent_index = parent_indices[node_index]
-            if parent_index != -1:
-                lines.append([dots[node_index], dots[parent_index]])
-        lines = np.array(lines)
+        child_indices, parent_indices = skeleton_state.skeleton_tree.topology.bone_indices
+        lines = np.stack(
+            (dots[child_indices.numpy()], dots[parent_indices.numpy()]), axis=1
+        )
         return lines, dots
 
     def _update(self, lines, dots) -> None:
@@ -87,12 +83,10 @@ class Draw3DSkeletonMotion(BasePlotterTask):
         super().__init__(task_name=task_name, task_type="3DSkeletonMotion")
         self._trail_length = trail_length
         self._skeleton_motion = skeleton_motion
-        # if frame_index is None:
-        curr_skeleton_motion = self._skeleton_motion.clone()
-        if frame_index is not None:
-            curr_skeleton_motion.tensor = self._skeleton_motion.tensor[frame_index, :]
-        # else:
-        #     curr_skeleton_motion = self._skeleton_motion[frame_index, :]
+        # the current frame is a zero-copy view of the motion, see `_select_frame()`
+        self._curr_skeleton_motion = self._skeleton_motion
+        self._curr_frame_index = None
+        curr_skeleton_motion = self._select_frame(frame_index)
         self._skeleton_state_task = Draw3DSkeletonState(
             self.get_scoped_name("skeleton_state"),
             curr_skeleton_motion,
@@ -136,10 +130,10 @@ class Draw3DSkeletonMotion(BasePlotterTask):
     def update(self, frame_index=None, reset_trail=False, skeleton_motion=None) -> None:
         if skeleton_motion is not None:
             self._skeleton_motion = skeleton_motion
+            self._curr_skeleton_motion = self._skeleton_motion
+            self._curr_frame_index = None
 
-        curr_skeleton_motion = self._skeleton_motion.clone()
-        if frame_index is not None:
-            curr_skeleton_motion.tensor = curr_skeleton_motion.tensor[frame_index, :]
+        curr_skeleton_motion = self._select_frame(frame_index)
         if reset_trail:
             self._com_pos = curr_skeleton_motion.root_translation.numpy()[
                 np.newaxis, ...
@@ -156,6 +150,17 @@ class Draw3DSkeletonMotion(BasePlotterTask):
         self._com_trail_task.update(self._com_pos)
         self._update(*Draw3DSkeletonMotion._get_vel_and_avel(curr_skeleton_motion))
 
+    def _select_frame(self, frame_index):
+        """Select a zero-copy view of the given frame (or the whole motion if it's None). The view
+        is only re-created when the frame changes, so its cached quantities are reused otherwise
+        """
+        if frame_index is None:
+            self._curr_skeleton_motion = self._skeleton_motion
+        elif frame_index != self._curr_frame_index:
+            self._curr_skeleton_motion = self._skeleton_motion.frame(frame_index)
+        self._curr_frame_index = frame_index
+        return self._curr_skeleton_motion
+
     @staticmethod
     def _get_vel_and_avel(skeleton_motion):
         """Get all the velocity and angular velocity lines
@@ -1,8 +1,15 @@
 import numpy as np
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import argparse
+import os
 import sys
 
+from poselib.core.backend import ArrayInfo, Serializable
+
+# Extensions of the files written by Serializable.to_file(), inspected in directory mode
+MOTION_FILE_EXTENSIONS = (".npy", ".plib", ".json")
+
 # Define a threshold for array size to decide between full print and summary
 # You can adjust this number based on what you consider "large"
 ARRAY_SUMMARY_THRESHOLD = 1000 # If total elements > 1000, print summary
@@ -56,6 +63,9 @@ def print_recursive_beautiful(data, indent=0):
             indented_array_str = "\n".join([f"{indent_str}    {line}" for line in array_str.splitlines()])
             print(indented_array_str, end="") # end="" to avoid double newline
 
+    elif isinstance(data, ArrayInfo):
+        print(f"array (shape: {tuple(data.shape)}, dtype: {data.dtype})", end="")
+
     elif isinstance(data, list):
         print("[")
         for i, item in enumerate(data):
@@ -96,6 +106,8 @@ def print_recursive_beautiful(data, indent=0):
     # Add a newline after printing a value, unless it's a nested structure
     if not isinstance(data, (OrderedDict, dict, list, tuple, np.ndarray)):
          print("")
+    elif isinstance(data, ArrayInfo):
+         print("")
 
 
 def print_proto_motion_npy_beautiful(npy_file_path):
@@ -118,9 +130,87 @@ def print_proto_motion_npy_beautiful(npy_file_path):
     except Exception as e:
         print(f"An error occurred: {e}")
 
+def print_file_header(file_path):
+    """
+    Prints the metadata of a file written by Serializable.to_file() (.npy, .plib or .json)
+    without loading its arrays, only their shapes and dtypes are printed.
+    """
+    try:
+        print_recursive_beautiful(Serializable.read_file_header(file_path))
+        print("\n")
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+
+def _frames_shape(entry):
+    # the array of a tensor entry is "arr", or "codes" for the entries of compact files
+    array = entry["arr"] if "arr" in entry else entry["codes"]
+    return tuple(array.shape[:-1])
+
+
+def summarize_file(file_path, with_stats=False):
+    """
+    Returns a one-line summary of a motion file (class, frames, fps, joints), read from its
+    header only. With with_stats, the min/max/mean of each array are appended, they are
+    computed by streaming over the (memory-mapped for .plib) arrays. A file that cannot be
+    read is summarized by an error line.
+    """
+    try:
+        header = Serializable.read_file_header(file_path)
+        fields = [header.get("__name__", "?")]
+        for key in ("tensor", "root_translation"):
+            # the state tensor of .plib files, the root translation of the others
+            if key in header:
+                fields.append(f"shape={_frames_shape(header[key])}")
+                break
+        if "fps" in header:
+            fields.append(f"fps={header['fps']}")
+        if "skeleton_tree" in header:
+            fields.append(f"joints={len(header['skeleton_tree']['node_names'])}")
+        elif "node_names" in header:
+            fields.append(f"joints={len(header['node_names'])}")
+        line = f"{file_path}: " + " ".join(fields)
+        if with_stats:
+            for name, stats in Serializable.read_file_stats(file_path).items():
+                if stats is not None:
+                    line += (f"\n    {name}: min: {stats['min']:.6g}, max: {stats['max']:.6g},"
+                             f" mean: {stats['mean']:.6g}")
+    except Exception as e:
+        return f"{file_path}: error: {e}"
+    return line
+
+
+def summarize_directory(directory, workers=None, with_stats=False):
+    """
+    Prints a one-line summary of every motion file under a directory (recursively), the files
+    are inspected in parallel by a pool of worker processes.
+    """
+    file_paths = sorted(
+        os.path.join(root, file_name)
+        for root, _, file_names in os.walk(directory)
+        for file_name in file_names
+        if file_name.endswith(MOTION_FILE_EXTENSIONS)
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        lines = executor.map(
+            summarize_file,
+            file_paths,
+            [with_stats] * len(file_paths),
+            chunksize=max(1, len(file_paths) // (4 * (workers or os.cpu_count() or 1))),
+        )
+        for line in lines:
+            print(line)
+    print(f"{len(file_paths)} files")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Print content of a ProtoMotion .npy file beautifully (summarizing large arrays).')
-    parser.add_argument('npy_file', type=str, help='Path to the ProtoMotion .npy file')
+    parser.add_argument('npy_file', type=str, help='Path to the ProtoMotion .npy file, or to a directory to summarize every motion file in it')
+    parser.add_argument('--header-only', action='store_true', help='Only print the metadata and array shapes, without loading the arrays')
+    parser.add_argument('--stats', action='store_true', help='In directory mode, also print the min/max/mean of each array')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes in directory mode (default: number of CPUs)')
     # Optional argument to print full arrays if needed (can be added later)
     # parser.add_argument('--full', action='store_true', help='Print full content of large arrays (can be very verbose)')
 
@@ -130,4 +220,9 @@ if __name__ == "__main__":
     # if args.full:
     #     ARRAY_SUMMARY_THRESHOLD = -1 # Set threshold low to print all
 
-    print_proto_motion_npy_beautiful(args.npy_file)
\ No newline at end of file
+    if os.path.isdir(args.npy_file):
+        summarize_directory(args.npy_file, workers=args.workers, with_stats=args.stats)
+    elif args.header_only or not args.npy_file.endswith(".npy"):
+        print_file_header(args.npy_file)
+    else:
+        print_proto_motion_npy_beautiful(args.npy_file)
\ No newline at end of file
@@ -0,0 +1,44 @@
+import os
+
+import torch
+
+from poselib.core import quat_normalize
+from poselib.skeleton.skeleton3d import SkeletonTree, SkeletonState, SkeletonMotion
+
+from print_content import summarize_directory, summarize_file
+
+
+def _write_motions(directory):
+    torch.manual_seed(0)
+    skeleton_tree = SkeletonTree.from_mjcf(SkeletonTree.__example_mjcf_path__)
+    r = quat_normalize(torch.randn(6, skeleton_tree.num_joints, 4))
+    t = torch.randn(6, 3)
+    skeleton_state = SkeletonState.from_rotation_and_root_translation(
+        skeleton_tree, r=r, t=t, is_local=True
+    )
+    motion = SkeletonMotion.from_skeleton_state(skeleton_state, fps=30)
+    paths = []
+    for name, compact in (("motion.plib", False), ("compact.plib", True), ("compact.json", True)):
+        paths.append(os.path.join(directory, name))
+        motion.to_file(paths[-1], compact=compact)
+    return paths
+
+
+def test_summarize_compact_file(tmp_path):
+    for path in _write_motions(str(tmp_path)):
+        line = summarize_file(path, with_stats=True)
+        assert line.startswith(f"{path}: SkeletonMotion shape=(6,) fps=30 joints=13"), line
+        assert ("root_translation/codes: min:" in line) == ("compact" in os.path.basename(path))
+
+
+def test_summarize_directory(tmp_path, capsys):
+    paths = _write_motions(str(tmp_path))
+    broken = os.path.join(str(tmp_path), "broken.plib")
+    with open(broken, "wb") as f:
+        f.write(b"not a motion file")
+    summarize_directory(str(tmp_path), workers=2, with_stats=True)
+    out = capsys.readouterr().out
+    for path in paths:
+        assert f"{path}: SkeletonMotion shape=(6,)" in out
+    assert f"{broken}: error:" in out
+    assert out.endswith("4 files\n")